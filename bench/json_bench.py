@@ -0,0 +1,127 @@
+"""
+Compare the default FastAPI JSON path with src.json_codec for the /webhook and
+/loads response shapes (no database needed).
+
+    uv run --extra fast python -m bench.json_bench
+    uv run --extra fast python -m bench.json_bench --loads 100 --requests 3000
+
+For every JSON_BACKEND that is installed (stdlib, orjson, msgspec) it times:
+  - encode: a page of `--loads` rows with Decimal / datetime columns
+      default = jsonable_encoder + JSONResponse.render, codec = json_codec.dumps
+  - decode: a /webhook body, request.json()-style json.loads vs decode(WebhookBody)
+  - asgi:   requests/sec through a FastAPI app (httpx ASGI transport) serving
+      /webhook the old way (dict in, dict out) and the new way (decode + spliced echo)
+"""
+import argparse
+import asyncio
+import datetime
+import decimal
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKENDS = ("stdlib", "orjson", "msgspec")
+
+
+def _rows(n: int) -> list:
+    base = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    return [{
+        "load_id": f"L-{i}", "origin": "Dallas, TX", "destination": "Atlanta, GA",
+        "pickup_datetime": base + datetime.timedelta(hours=i),
+        "delivery_datetime": base + datetime.timedelta(hours=i + 20),
+        "equipment_type": "Van", "loadboard_rate": decimal.Decimal(f"{1200 + i}.50"),
+        "notes": "no touch freight", "weight": 40000, "commodity_type": "paper",
+        "num_of_pieces": 20, "miles": 780, "dimensions": {"length": 53},
+    } for i in range(n)]
+
+
+BODY = json.dumps({
+    "job_id": "bench-job", "origin": "Dallas, TX", "destination": "Atlanta, GA",
+    "weight_kg": "18000", "rate_min": "1000", "rate_max": "", "limit": 10,
+    "echo": {"caller": "bench", "transcript": "need a van out of dallas " * 20},
+}).encode()
+
+
+def _per_sec(fn, seconds: float = 1.0) -> float:
+    n, t0 = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - t0) < seconds:
+        for _ in range(50):
+            fn()
+        n += 50
+    return n / elapsed
+
+
+async def _asgi_rps(app, path: str, requests: int) -> float:
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post(path, content=BODY)
+        t0 = time.perf_counter()
+        for _ in range(requests):
+            r = await client.post(path, content=BODY)
+            assert r.status_code == 200, r.text
+        return requests / (time.perf_counter() - t0)
+
+
+def child(n_loads: int, requests: int) -> dict:
+    from fastapi import FastAPI, Request
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from src.json_codec import JSON_BACKEND, RawJSONResponse, decode, dumps
+    from src.schemas import WebhookBody
+
+    rows = _rows(n_loads)
+    out = {"backend": JSON_BACKEND, "loads": n_loads}
+    out["encode_default_per_sec"] = _per_sec(lambda: JSONResponse(None).render(jsonable_encoder({"loads": rows})))
+    out["encode_codec_per_sec"] = _per_sec(lambda: dumps({"loads": rows}))
+    out["decode_default_per_sec"] = _per_sec(lambda: json.loads(BODY))
+    out["decode_codec_per_sec"] = _per_sec(lambda: decode(BODY, WebhookBody))
+
+    app = FastAPI()
+
+    @app.post("/old")
+    async def old(request: Request):
+        body = await request.json()
+        return {"ok": True, "echo": body, "suggested_loads": rows}
+
+    @app.post("/new")
+    async def new(request: Request):
+        raw = await request.body()
+        decode(raw, WebhookBody)
+        return RawJSONResponse(b'{"ok":true,"echo":' + raw + b',"suggested_loads":' + dumps(rows) + b"}")
+
+    out["asgi_old_rps"] = asyncio.run(_asgi_rps(app, "/old", requests))
+    out["asgi_new_rps"] = asyncio.run(_asgi_rps(app, "/new", requests))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--loads", type=int, default=10, help="rows in the response")
+    ap.add_argument("--requests", type=int, default=2000, help="requests per ASGI run")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.loads, args.requests)))
+        return
+
+    for backend in BACKENDS:
+        env = dict(os.environ, JSON_BACKEND=backend)
+        proc = subprocess.run([sys.executable, "-m", "bench.json_bench", "--child",
+                               "--loads", str(args.loads), "--requests", str(args.requests)],
+                              env=env, capture_output=True, text=True)
+        if proc.returncode:
+            print(f"{backend:8s} skipped ({proc.stderr.strip().splitlines()[-1]})")
+            continue
+        r = json.loads(proc.stdout)
+        print(f"{backend:8s} encode {r['encode_default_per_sec']:9.0f} -> {r['encode_codec_per_sec']:9.0f}/s   "
+              f"decode {r['decode_default_per_sec']:9.0f} -> {r['decode_codec_per_sec']:9.0f}/s   "
+              f"/webhook {r['asgi_old_rps']:6.0f} -> {r['asgi_new_rps']:6.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Generate a synthetic CSV / NDJSON feed and time src.load_ingest against it.
+
+    DATABASE_URL=... uv run python -m bench.load_ingest_bench --rows 1000000
+    DATABASE_URL=... uv run python -m bench.load_ingest_bench --rows 1000000 --format ndjson
+    DATABASE_URL=... uv run python -m bench.load_ingest_bench --cleanup
+
+Every run ingests the file twice: first as inserts, then again with 10% of the rows
+changed (upsert path). Synthetic rows use load_id 'INGEST-<n>'.
+Run against a scratch database, not production.
+"""
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+
+import psycopg
+
+from src.load_ingest import LOAD_COLS, _file_chunks, ingest
+
+CITIES = ["San Jose, CA", "Dallas, TX", "Chicago, IL", "Atlanta, GA", "Denver, CO",
+          "Phoenix, AZ", "Seattle, WA", "Miami, FL", "Newark, NJ", "Reno, NV"]
+
+
+def _row(n: int, bump: bool) -> dict:
+    pickup = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=n % 500_000)
+    return {
+        "load_id": f"INGEST-{n}",
+        "origin": CITIES[n % len(CITIES)],
+        "destination": CITIES[(n * 7 + 3) % len(CITIES)],
+        "pickup_datetime": pickup.isoformat(),
+        "delivery_datetime": (pickup + datetime.timedelta(hours=10)).isoformat(),
+        "equipment_type": ("Van", "Reefer", "Flatbed")[n % 3],
+        "loadboard_rate": f"{200 + n % 4000 + (50 if bump else 0)}.00",
+        "notes": "bench, \"quoted\"" if n % 100 == 0 else "",
+        "weight": str(100 + n % 20000),
+        "commodity_type": "bench",
+        "num_of_pieces": str(1 + n % 30),
+        "miles": str(5 + n % 1500),
+        "dimensions": json.dumps({"length": 48, "width": 8, "height": 8, "unit": "ft"}) if n % 10 == 0 else "",
+    }
+
+
+def write_feed(path: str, rows: int, fmt: str, changed_every: int = 0) -> None:
+    with open(path, "w", newline="") as f:
+        if fmt == "csv":
+            w = csv.DictWriter(f, fieldnames=LOAD_COLS)
+            w.writeheader()
+            for n in range(1, rows + 1):
+                w.writerow(_row(n, bool(changed_every) and n % changed_every == 0))
+        else:
+            for n in range(1, rows + 1):
+                f.write(json.dumps(_row(n, bool(changed_every) and n % changed_every == 0)) + "\n")
+
+
+def run(path: str, fmt: str, batch_size: int) -> dict:
+    with open(path, "rb") as f:
+        result = asyncio.run(ingest(_file_chunks(f), fmt, batch_size))
+    result.pop("batches")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    db_url = os.environ["DATABASE_URL"]
+    if args.cleanup:
+        with psycopg.connect(db_url) as conn:
+            n = conn.execute("DELETE FROM loads WHERE load_id LIKE 'INGEST-%'").rowcount
+        print(f"removed {n} rows")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, changed_every in (("insert", 0), ("upsert, 10% changed", 10)):
+            path = os.path.join(tmp, f"feed.{args.format}")
+            t0 = time.perf_counter()
+            write_feed(path, args.rows, args.format, changed_every)
+            print(f"generated {args.rows} rows ({os.path.getsize(path) >> 20} MB) in {time.perf_counter() - t0:.1f}s")
+            print(label, json.dumps(run(path, args.format, args.batch_size)))
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    main()
@@ -0,0 +1,364 @@
+"""
+Drive scripted traffic mixes through the API and report throughput and latency
+per route.
+
+    DATABASE_URL=... uv run python -m bench.load_test --mix default --concurrency 32 --duration 30
+    DATABASE_URL=... uv run python -m bench.load_test --mix negotiation --rps 200 --seed-loads 50000
+    uv run python -m bench.load_test --target http://127.0.0.1:8000 --mix search   # app already running
+    uv run python -m bench.load_test --compare bench/results/default-baseline.json
+
+Without --target it starts bench.mock_upstreams (FMCSA / HappyRobot / negotiation
+webhook stand-ins) and the app under uvicorn on free ports, pointed at the mocks and
+at DATABASE_URL. --seed-loads adds BENCH-* rows first (bench.search_loads_bench
+--cleanup removes them). Run against a scratch database, not production.
+
+--concurrency workers send back to back (closed loop); --rps caps the total send
+rate instead. Flows that wait for a callback (start_clean, negotiate) record every
+request they make, including the long-poll for the result. Results are written
+to bench/results/<mix>-<time>.json (or --save); --compare flags routes whose p95
+grew or whose throughput fell by more than --threshold percent, exiting 1.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+CITIES = ["Dallas, TX", "Chicago, IL", "Atlanta, GA", "Denver, CO", "Phoenix, AZ",
+          "Seattle, WA", "Miami, FL", "Newark, NJ", "San Jose, CA", "Houston, TX"]
+MC_NUMBERS = 500        # distinct MC numbers; later lookups hit the carrier cache
+
+Sample = Tuple[str, int, float]       # route, status (0 = transport error), ms
+
+
+class Flow:
+    """One scripted user action; record() every request it makes."""
+
+    def __init__(self, client: httpx.AsyncClient, token: str):
+        self.client = client
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.samples: List[Sample] = []
+
+    async def call(self, route: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.samples.append((route, 0, (time.perf_counter() - t0) * 1000))
+            return None
+        self.samples.append((route, r.status_code, (time.perf_counter() - t0) * 1000))
+        return r
+
+
+async def webhook(f: Flow) -> None:
+    await f.call("POST /webhook", "POST", "/webhook", headers=f.auth, json={
+        "job_id": f"bench-{uuid.uuid4().hex[:12]}",
+        "origin": random.choice(CITIES), "destination": random.choice(CITIES),
+        "limit": 10,
+    })
+
+
+async def webhook_text(f: Flow) -> None:
+    await f.call("POST /webhook (text)", "POST", "/webhook", headers=f.auth, json={
+        "job_id": f"bench-{uuid.uuid4().hex[:12]}",
+        "echo": f"{random.randint(500, 20000)}kg {random.randint(50, 1500)} miles",
+    })
+
+
+async def loads(f: Flow) -> None:
+    r = await f.call("GET /loads", "GET", "/loads", params={"limit": 50})
+    if r is not None and r.is_success and random.random() < 0.3 and r.json().get("next_cursor"):
+        await f.call("GET /loads", "GET", "/loads", params={"limit": 50, "cursor": r.json()["next_cursor"]})
+
+
+async def mc_key(f: Flow) -> None:
+    await f.call("POST /mc_key/{mc_key}", "POST", f"/mc_key/{random.randint(100001, 100000 + MC_NUMBERS)}",
+                 headers=f.auth)
+
+
+async def negotiate(f: Flow) -> None:
+    session_id = f"bench-{uuid.uuid4().hex[:12]}"
+    rate = random.randint(800, 4000)
+    r = await f.call("POST /negotiate/start", "POST", "/negotiate/start", headers=f.auth, json={
+        "session_id": session_id,
+        "load": {"load_id": f"BENCH-{random.randint(1, 1000)}", "loadboard_rate": rate, "miles": 700},
+        "user_message": f"can you do {rate + 300}?", "user_requested_price": rate + 300,
+        "cur_round": 1, "max_rounds": 3,
+    })
+    if r is not None and r.is_success:
+        await f.call("GET /negotiate/result/{session_id}/wait", "GET",
+                     f"/negotiate/result/{session_id}/wait", params={"timeout": 10})
+
+
+async def negotiate_v2(f: Flow) -> None:
+    await f.call("POST /negotiate/start/v2", "POST", "/negotiate/start/v2", headers=f.auth, json={
+        "session_id": f"bench-{uuid.uuid4().hex[:12]}",
+        "load": {"load_id": f"BENCH-{random.randint(1, 1000)}", "loadboard_rate": random.randint(800, 4000),
+                 "miles": random.randint(50, 1500)},
+        "user_message": "bench", "history": "bench", "cur_round": 1, "max_rounds": 3,
+    })
+
+
+async def start_clean(f: Flow) -> None:
+    r = await f.call("POST /start_clean", "POST", "/start_clean", json={"user_message": "need a van out of dallas"})
+    if r is not None and r.is_success:
+        job_id = r.json()["job_id"]
+        await f.call("GET /result/{job_id}/wait", "GET", f"/result/{job_id}/wait",
+                     headers=f.auth, params={"timeout": 10})
+
+
+FLOWS: Dict[str, Callable[[Flow], Awaitable[None]]] = {
+    "webhook": webhook, "webhook_text": webhook_text, "loads": loads, "mc_key": mc_key,
+    "negotiate": negotiate, "negotiate_v2": negotiate_v2, "start_clean": start_clean,
+}
+
+# flow -> weight
+MIXES: Dict[str, Dict[str, int]] = {
+    "default": {"webhook": 30, "webhook_text": 5, "loads": 20, "mc_key": 20,
+                "negotiate": 10, "negotiate_v2": 10, "start_clean": 5},
+    "search": {"webhook": 60, "webhook_text": 10, "loads": 30},
+    "negotiation": {"negotiate": 50, "negotiate_v2": 30, "mc_key": 20},
+    "callbacks": {"start_clean": 50, "negotiate": 50},
+    "carriers": {"mc_key": 100},
+}
+
+
+def _pct(sorted_ms: List[float], q: float) -> float:
+    # nearest-rank percentile
+    return sorted_ms[min(len(sorted_ms) - 1, max(0, int(round(q * len(sorted_ms))) - 1))]
+
+
+def summarize(samples: List[Sample], seconds: float) -> Dict[str, Dict[str, Any]]:
+    by_route: Dict[str, List[Sample]] = {}
+    for s in samples:
+        by_route.setdefault(s[0], []).append(s)
+    by_route["TOTAL"] = samples
+    out = {}
+    for route, rows in by_route.items():
+        ms = sorted(r[2] for r in rows)
+        if not ms:
+            continue
+        statuses: Dict[str, int] = {}
+        for r in rows:
+            statuses[str(r[1])] = statuses.get(str(r[1]), 0) + 1
+        out[route] = {
+            "requests": len(rows),
+            "errors": sum(1 for r in rows if not 200 <= r[1] < 400),
+            "rps": round(len(rows) / seconds, 1),
+            "p50_ms": round(_pct(ms, 0.50), 2),
+            "p95_ms": round(_pct(ms, 0.95), 2),
+            "p99_ms": round(_pct(ms, 0.99), 2),
+            "max_ms": round(ms[-1], 2),
+            "statuses": statuses,
+        }
+    return out
+
+
+async def run(target: str, token: str, mix: Dict[str, int], concurrency: int, duration: float,
+              warmup: float, rps: Optional[float]) -> Tuple[List[Sample], float]:
+    names, weights = list(mix), list(mix.values())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=30, limits=limits) as client:
+        samples: List[Sample] = []
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        measure_from = start + warmup
+        stop = measure_from + duration
+        next_slot = [start]
+
+        async def worker() -> None:
+            while loop.time() < stop:
+                if rps:
+                    # open loop: each worker claims the next send slot
+                    slot = next_slot[0] = max(next_slot[0] + 1 / rps, loop.time())
+                    await asyncio.sleep(max(0.0, slot - loop.time()))
+                    if slot >= stop:
+                        return
+                began = loop.time()
+                f = Flow(client, token)
+                await FLOWS[random.choices(names, weights)[0]](f)
+                if began >= measure_from:
+                    samples.extend(f.samples)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return samples, max(loop.time() - measure_from, 1e-9)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{url} exited with {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} not ready after {timeout}s")
+
+
+def start_stack(args: argparse.Namespace) -> Tuple[str, List[subprocess.Popen]]:
+    """Mocks + app as child processes; returns the app URL."""
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL not set (or pass --target)")
+    app_port, mock_port = _free_port(), _free_port()
+    app_url, mock_url = f"http://127.0.0.1:{app_port}", f"http://127.0.0.1:{mock_port}"
+    mocks = subprocess.Popen([sys.executable, "-m", "bench.mock_upstreams", "--port", str(mock_port),
+                              "--app-url", app_url, "--token", args.token,
+                              "--latency-ms", str(args.upstream_latency_ms),
+                              "--error-rate", str(args.upstream_error_rate)])
+    env = dict(os.environ,
+               FMCSA_BASE_URL=mock_url, FMCSA_API_KEY="bench",
+               WEBHOOK_URL=f"{mock_url}/happyrobot", NEGOTIATION_WEBHOOK_URL=f"{mock_url}/negotiation",
+               HTTP2_ENABLED="false", TRACE_SLOW_MS="0")
+    app = subprocess.Popen([sys.executable, "-m", "uvicorn", "src.webhook_api:app",
+                            "--host", "127.0.0.1", "--port", str(app_port),
+                            "--log-level", "warning", "--no-access-log", *args.uvicorn_arg], env=env)
+    procs = [app, mocks]
+    try:
+        _wait_ready(f"{mock_url}/stats", mocks)
+        _wait_ready(f"{app_url}/health", app)
+    except BaseException:
+        stop_stack(procs)
+        raise
+    return app_url, procs
+
+
+def stop_stack(procs: List[subprocess.Popen]) -> None:
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        try:
+            p.wait(15)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def server_stats(target: str) -> Dict[str, Any]:
+    out = {}
+    for path in ("/health/db", "/metrics/dispatch", "/metrics/carriers"):
+        try:
+            out[path] = httpx.get(target + path, timeout=5).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+    return out
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(routes: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'route':42} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route in sorted(routes, key=lambda r: (r == "TOTAL", r)):
+        s = routes[route]
+        print(f"{route:42} {s['requests']:7d} {s['errors']:5d} {s['rps']:8.1f} {s['p50_ms']:8.1f} "
+              f"{s['p95_ms']:8.1f} {s['p99_ms']:8.1f} {s['max_ms']:8.1f}")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Routes whose p95 rose, or rps fell, by more than `threshold` percent."""
+    problems = []
+    print(f"\nvs {baseline['meta'].get('saved_as', 'baseline')} ({baseline['meta'].get('git_rev')})")
+    print(f"{'route':42} {'rps':>16} {'p95 ms':>18}")
+    for route, cur in sorted(current["routes"].items(), key=lambda kv: (kv[0] == "TOTAL", kv[0])):
+        base = baseline["routes"].get(route)
+        if base is None:
+            continue
+        d_rps = (cur["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        d_p95 = (cur["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        flag = ""
+        if d_p95 > threshold or d_rps < -threshold:
+            flag = "  REGRESSION"
+            problems.append(route)
+        print(f"{route:42} {base['rps']:7.1f} {d_rps:+7.1f}% {base['p95_ms']:8.1f} {d_p95:+7.1f}%{flag}")
+    return problems
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", help="URL of a running app; default: start mocks + app locally")
+    ap.add_argument("--mix", default="default", choices=sorted(MIXES))
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20, help="measured seconds")
+    ap.add_argument("--warmup", type=float, default=3, help="seconds of traffic before measuring")
+    ap.add_argument("--rps", type=float, help="cap on total flows started per second")
+    ap.add_argument("--token", default=os.getenv("INCOMING_TOKEN", "shared_Secret_key"))
+    ap.add_argument("--seed-loads", type=int, default=0, help="insert this many BENCH-* loads first")
+    ap.add_argument("--upstream-latency-ms", type=float, default=50)
+    ap.add_argument("--upstream-error-rate", type=float, default=0.0)
+    ap.add_argument("--uvicorn-arg", action="append", default=[],
+                    help="extra uvicorn flag for the local app, e.g. --uvicorn-arg=--workers=4")
+    ap.add_argument("--save", help="results file (default bench/results/<mix>-<time>.json)")
+    ap.add_argument("--compare", help="earlier results file to compare against")
+    ap.add_argument("--threshold", type=float, default=10, help="percent change flagged by --compare")
+    args = ap.parse_args()
+
+    if args.seed_loads:
+        import psycopg
+        from bench.search_loads_bench import seed
+        with psycopg.connect(os.environ["DATABASE_URL"]) as conn:
+            seed(conn, args.seed_loads)
+
+    procs: List[subprocess.Popen] = []
+    target = args.target
+    if not target:
+        target, procs = start_stack(args)
+    try:
+        print(f"{args.mix} mix against {target}: {args.concurrency} workers, "
+              f"{f'{args.rps:g} rps, ' if args.rps else ''}{args.warmup:g}s warmup + {args.duration:g}s")
+        samples, seconds = asyncio.run(run(target, args.token, MIXES[args.mix], args.concurrency,
+                                           args.duration, args.warmup, args.rps))
+        stats = server_stats(target)
+    finally:
+        stop_stack(procs)
+
+    routes = summarize(samples, seconds)
+    print_table(routes)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    path = Path(args.save) if args.save else RESULTS_DIR / f"{args.mix}-{now:%Y%m%d-%H%M%S}.json"
+    result = {
+        "meta": {
+            "mix": args.mix, "weights": MIXES[args.mix], "concurrency": args.concurrency,
+            "rps_cap": args.rps, "duration_s": round(seconds, 2), "target": args.target or "local",
+            "upstream_latency_ms": args.upstream_latency_ms, "started_at": now.isoformat(),
+            "git_rev": _git_rev(), "saved_as": str(path),
+        },
+        "routes": routes,
+        "server": stats,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2))
+    print(f"\nsaved {path}")
+
+    if args.compare:
+        problems = compare(result, json.loads(Path(args.compare).read_text()), args.threshold)
+        if problems:
+            print(f"\n{len(problems)} route(s) regressed by more than {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
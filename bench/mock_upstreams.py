@@ -0,0 +1,135 @@
+"""
+Local stand-ins for the app's upstreams, used by bench.load_test.
+
+    uv run python -m bench.mock_upstreams --port 8910 --app-url http://127.0.0.1:8000
+
+Point the app at it with
+    FMCSA_BASE_URL=http://127.0.0.1:8910
+    WEBHOOK_URL=http://127.0.0.1:8910/happyrobot
+    NEGOTIATION_WEBHOOK_URL=http://127.0.0.1:8910/negotiation
+
+  GET  /qc/services/carriers/{mc}  FMCSA QC API: every 10th MC is unknown, every 7th
+                                   is not allowed to operate, the rest are active
+  POST /happyrobot                 answers 200 at once, then (like the voice agent)
+                                   posts a structured search for the job to /webhook
+  POST /negotiation                answers 200 at once, then posts a counter offer
+                                   for the session to /negotiate/result
+  GET  /stats                      calls received / callbacks sent / failed
+
+Every endpoint waits --latency-ms (+/- --jitter-ms). --error-rate makes that share
+of /happyrobot and /negotiation calls answer 503, so the dispatcher retries.
+"""
+import argparse
+import asyncio
+import collections
+import random
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Set
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CITIES = ["Dallas, TX", "Chicago, IL", "Atlanta, GA", "Denver, CO", "Phoenix, AZ",
+          "Seattle, WA", "Miami, FL", "Newark, NJ", "San Jose, CA", "Houston, TX"]
+
+
+def create_app(app_url: str, token: str, latency_ms: float = 50, jitter_ms: float = 20,
+               callback_ms: float = 200, error_rate: float = 0.0) -> FastAPI:
+    counts: Dict[str, int] = collections.Counter()
+    tasks: Set[asyncio.Task] = set()
+    client = httpx.AsyncClient(base_url=app_url, timeout=30,
+                               headers={"Authorization": f"Bearer {token}"})
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    app = FastAPI(title="Mock upstreams", lifespan=lifespan)
+
+    async def _delay(ms: float) -> None:
+        await asyncio.sleep(max(0.0, ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+    def _later(name: str, path: str, body: Dict[str, Any]) -> None:
+        async def run() -> None:
+            await _delay(callback_ms)
+            try:
+                r = await client.post(path, json=body)
+                counts[f"{name}_callbacks" if r.is_success else f"{name}_callback_errors"] += 1
+            except httpx.HTTPError:
+                counts[f"{name}_callback_errors"] += 1
+        task = asyncio.create_task(run())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    @app.get("/qc/services/carriers/{mc}")
+    async def fmcsa(mc: str):
+        counts["fmcsa"] += 1
+        await _delay(latency_ms)
+        n = int(mc) if mc.isdigit() else 0
+        if n % 10 == 0:
+            return {"content": None}
+        return {"content": {"carrier": {
+            "legalName": f"Bench Carrier {mc} LLC", "dbaName": None,
+            "statusCode": "A", "allowedToOperate": "N" if n % 7 == 0 else "Y",
+            "phyCity": "DALLAS", "phyState": "TX",
+        }}}
+
+    @app.post("/happyrobot")
+    async def happyrobot(request: Request):
+        counts["happyrobot"] += 1
+        body = await request.json()
+        await _delay(latency_ms)
+        if random.random() < error_rate:
+            return JSONResponse({"error": "mock overload"}, 503)
+        _later("happyrobot", "/webhook", {
+            "job_id": body.get("job_id"),
+            "origin": random.choice(CITIES), "destination": random.choice(CITIES),
+            "limit": 5, "echo": {"text": body.get("text")},
+        })
+        return {"ok": True}
+
+    @app.post("/negotiation")
+    async def negotiation(request: Request):
+        counts["negotiation"] += 1
+        body = await request.json()
+        await _delay(latency_ms)
+        if random.random() < error_rate:
+            return JSONResponse({"error": "mock overload"}, 503)
+        rate = (body.get("load") or {}).get("loadboard_rate") or 1500
+        _later("negotiation", "/negotiate/result", {
+            "session_id": body.get("session_id"),
+            "ai_negotiated_price": round(float(rate) * random.uniform(1.0, 1.1), 2),
+            "ai_negotiation_reason": "mock counter offer",
+        })
+        return {"ok": True}
+
+    @app.get("/stats")
+    async def stats():
+        return {**counts, "pending_callbacks": len(tasks)}
+
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8910)
+    ap.add_argument("--app-url", default="http://127.0.0.1:8000", help="where callbacks are posted")
+    ap.add_argument("--token", default="shared_Secret_key", help="Bearer token for the callbacks")
+    ap.add_argument("--latency-ms", type=float, default=50)
+    ap.add_argument("--jitter-ms", type=float, default=20)
+    ap.add_argument("--callback-ms", type=float, default=200, help="delay before the callback")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    app = create_app(args.app_url, args.token, args.latency_ms, args.jitter_ms,
+                     args.callback_ms, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Time ranked recommendations (src.recommend) on the SQL path and on the NumPy
+catalog path, and check that both return the same top k.
+
+    DATABASE_URL=... uv run python -m bench.recommend_bench --candidates 100000
+    DATABASE_URL=... uv run python -m bench.recommend_bench --rows 1000000 --candidates 250000
+
+The catalog side is a snapshot of the `--candidates` loads the SQL side would score
+(latest pickups, or the soonest after RECOMMEND_PICKUP_GRACE_HOURS when set), and
+the SQL side is capped at the same number (RECOMMEND_MAX_CANDIDATES), so queries
+without a rate filter score the same candidate set on both paths. With a rate
+filter the SQL path caps after filtering and reaches further out, so those queries
+are timed but not compared. `--rows` seeds BENCH-* loads first (see
+bench.search_loads_bench; `--cleanup` there removes them).
+"""
+import argparse
+import os
+import statistics
+import time
+
+import psycopg
+
+QUERIES = [
+    {},
+    {"origin": "Dallas, TX"},
+    {"origin": "San Jose, CA", "destination": "Seattle, WA", "equipment_type": "Reefer"},
+    {"origin": "Dallas", "destination": "Chicago, IL", "weight_kg": 5000, "miles": 800},
+    {"destination": "Miami", "rate_min": 1000, "rate_max": 2000, "equipment_type": "Van"},
+]
+
+
+def _timed(fn, repeat: int) -> tuple:
+    samples, rows = [], []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))], rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=0, help="synthetic loads to seed first (0 = reuse)")
+    ap.add_argument("--candidates", type=int, default=100_000, help="loads scored per query")
+    ap.add_argument("--limit", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--sql-repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL not set")
+    # read at import by src.recommend / src.load_catalog
+    os.environ["RECOMMEND_MAX_CANDIDATES"] = str(args.candidates)
+    os.environ.setdefault("RECOMMEND_TIMEOUT_MS", "10000")
+
+    from src.db_client import set_hot_catalog
+    from src.load_catalog import CATALOG_SQL, LoadCatalog, _Snapshot
+    from src.recommend import Query, candidate_order, recommend_loads
+
+    since = Query().since
+    where, params = ("WHERE pickup_datetime >= %s", [since]) if since is not None else ("", [])
+    with psycopg.connect(db_url) as conn:
+        if args.rows:
+            from bench.search_loads_bench import seed
+            seed(conn, args.rows)
+        total = conn.execute("SELECT count(*) FROM loads").fetchone()[0]
+        t0 = time.perf_counter()
+        rows = conn.execute(f"{CATALOG_SQL} {where} ORDER BY pickup_datetime {candidate_order(Query())} LIMIT %s",
+                            params + [args.candidates]).fetchall()
+    catalog = LoadCatalog()
+    catalog._snap = _Snapshot(rows)
+    print(f"loads table: {total} rows; {len(rows)} candidates, snapshot built in {time.perf_counter() - t0:.1f}s")
+
+    print(f"\n{'query':90} {'sql p50':>8} {'p95':>8} {'numpy p50':>10} {'p95':>8}  same")
+    for q in QUERIES:
+        set_hot_catalog(None)
+        sql_p50, sql_p95, expected = _timed(lambda: recommend_loads(**q, limit=args.limit), args.sql_repeat)
+        set_hot_catalog(catalog)
+        np_p50, np_p95, got = _timed(lambda: recommend_loads(**q, limit=args.limit), args.repeat)
+        set_hot_catalog(None)
+        if "rate_min" in q or "rate_max" in q:
+            same = "-"
+        else:
+            same = "yes" if [r["load_id"] for r in expected] == [r["load_id"] for r in got] else "NO"
+        print(f"{str(q):90} {sql_p50:8.1f} {sql_p95:8.1f} {np_p50:10.1f} {np_p95:8.1f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
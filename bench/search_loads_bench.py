@@ -0,0 +1,121 @@
+"""
+Seed synthetic loads and measure search_loads / EXPLAIN plans.
+
+    DATABASE_URL=... uv run python -m bench.search_loads_bench --rows 1000000
+    DATABASE_URL=... uv run python -m bench.search_loads_bench --cleanup
+
+Synthetic rows use load_id 'BENCH-<n>' so they can be removed afterwards.
+Run against a scratch database, not production.
+"""
+import argparse
+import os
+import statistics
+import time
+
+import psycopg
+
+from src.db_client import _build_search_sql, search_loads
+
+CITIES = [
+    "San Jose, CA", "Oakland, CA", "Fremont, CA", "Los Angeles, CA", "Sacramento, CA",
+    "Portland, OR", "Seattle, WA", "Reno, NV", "Las Vegas, NV", "Phoenix, AZ",
+    "Salt Lake City, UT", "Denver, CO", "Boise, ID", "Dallas, TX", "Houston, TX",
+    "Austin, TX", "Chicago, IL", "Atlanta, GA", "Miami, FL", "Newark, NJ",
+]
+# city list is cycled with a numeric suffix so the table has many distinct cities
+DISTINCT_SUFFIXES = 500
+
+SEED_SQL = """
+    INSERT INTO loads (load_id, origin, destination, pickup_datetime, delivery_datetime,
+                       equipment_type, loadboard_rate, weight, miles, commodity_type, num_of_pieces)
+    SELECT 'BENCH-' || g,
+           (%(cities)s::text[])[1 + floor(random() * %(ncities)s)::int],
+           (%(cities)s::text[])[1 + floor(random() * %(ncities)s)::int],
+           t, t + INTERVAL '10 hours',
+           (ARRAY['Van','Reefer','Flatbed'])[1 + g %% 3],
+           round((200 + random() * 4000)::numeric, 2),
+           100 + floor(random() * 20000)::int,
+           5 + floor(random() * 1500)::int,
+           'bench', 1 + g %% 30
+    FROM generate_series(%(start)s::int, %(stop)s::int) AS g,
+         -- referencing g makes the subquery run per row instead of once per batch
+         LATERAL (SELECT NOW() + random() * INTERVAL '30 days' + g * INTERVAL '0 seconds' AS t) p
+    ON CONFLICT (load_id) DO NOTHING
+"""
+
+QUERIES = [
+    {"origin": "San Jose, CA"},
+    {"origin": "San"},
+    {"origin": "Dallas", "destination": "Chicago"},
+    {"origin": "Seattle, WA", "weight_kg": 5000},
+    {"destination": "Miami", "rate_min": 1000, "rate_max": 2000},
+    {"origin": "Dallas, TX", "origin_radius_miles": 150},
+    {"origin": "Oakland, CA", "origin_radius_miles": 100, "destination": "Denver, CO", "destination_radius_miles": 250},
+]
+
+
+def seed(conn: psycopg.Connection, rows: int, batch: int = 100_000) -> None:
+    cities = [f"{c.split(',')[0]} {i}, {c.split(',')[1].strip()}" if i else c
+              for i in range(DISTINCT_SUFFIXES) for c in CITIES]
+    t0 = time.perf_counter()
+    for start in range(1, rows + 1, batch):
+        stop = min(rows, start + batch - 1)
+        conn.execute(SEED_SQL, {"cities": cities, "ncities": len(cities),
+                                "start": start, "stop": stop})
+        conn.commit()
+    conn.execute("ANALYZE loads")
+    conn.commit()
+    print(f"seeded {rows} rows in {time.perf_counter() - t0:.1f}s")
+
+
+def explain(conn: psycopg.Connection, q: dict) -> None:
+    sql, params = _build_search_sql(**q)
+    plan = conn.execute("EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) " + sql, params).fetchall()
+    print(f"\n-- {q}")
+    for (line,) in plan:
+        print("   ", line)
+
+
+def time_queries(repeat: int) -> None:
+    print(f"\n{'query':60} {'p50 ms':>8} {'p95 ms':>8} {'rows':>5}")
+    for q in QUERIES:
+        samples = []
+        rows: list = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            rows = search_loads(**q)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{str(q):60} {statistics.median(samples):8.2f} {p95:8.2f} {len(rows):5}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=0, help="synthetic loads to seed first (0 = reuse)")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--no-explain", action="store_true")
+    ap.add_argument("--cleanup", action="store_true", help="delete BENCH- rows and exit")
+    args = ap.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL not set")
+
+    with psycopg.connect(db_url) as conn:
+        if args.cleanup:
+            n = conn.execute("DELETE FROM loads WHERE load_id LIKE 'BENCH-%'").rowcount
+            print(f"deleted {n} rows")
+            return
+        if args.rows:
+            seed(conn, args.rows)
+        total = conn.execute("SELECT count(*) FROM loads").fetchone()[0]
+        print(f"loads table: {total} rows")
+        if not args.no_explain:
+            for q in QUERIES:
+                explain(conn, q)
+    time_queries(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 ALTER TABLE negotiations
-    ADD COLUMN miles INT,
-    ADD COLUMN loadboard_rate NUMERIC,
-    ADD COLUMN history TEXT NOT NULL;
\ No newline at end of file
+    ADD COLUMN IF NOT EXISTS miles INT,
+    ADD COLUMN IF NOT EXISTS loadboard_rate NUMERIC,
+    ADD COLUMN IF NOT EXISTS history TEXT NOT NULL;
@@ -0,0 +1,10 @@
+-- db/init/009_carrier_cache.sql
+-- second-tier cache for FMCSA carrier lookups (see src/carriers.py)
+CREATE TABLE IF NOT EXISTS carrier_cache (
+  mc          TEXT PRIMARY KEY,              -- MC number as sent to /mc_key
+  result      JSONB NOT NULL,                -- parsed eligibility response
+  fetched_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  expires_at  TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_carrier_cache_expires ON carrier_cache (expires_at);
@@ -0,0 +1,12 @@
+-- db/init/010_app_state.sql
+-- shared job / negotiation-session state for STATE_BACKEND=postgres (see src/state_store.py)
+-- UNLOGGED: no WAL, fast writes; contents are transient and may be lost on crash
+CREATE UNLOGGED TABLE IF NOT EXISTS app_state (
+  namespace   TEXT NOT NULL,                 -- 'jobs', 'sessions'
+  key         TEXT NOT NULL,                 -- job_id / session_id
+  value       JSONB NOT NULL,
+  expires_at  TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (namespace, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_app_state_expires ON app_state (expires_at);
@@ -0,0 +1,20 @@
+-- db/init/011_loads_normalized_city.sql
+-- normalized "City, ST" parts for indexed lane lookups (see db_client._place_filter)
+-- generated columns: existing INSERTs keep working unchanged
+ALTER TABLE loads
+  ADD COLUMN IF NOT EXISTS origin_city TEXT
+    GENERATED ALWAYS AS (lower(btrim(split_part(origin, ',', 1)))) STORED,
+  ADD COLUMN IF NOT EXISTS origin_state TEXT
+    GENERATED ALWAYS AS (NULLIF(upper(btrim(split_part(origin, ',', 2))), '')) STORED,
+  ADD COLUMN IF NOT EXISTS destination_city TEXT
+    GENERATED ALWAYS AS (lower(btrim(split_part(destination, ',', 1)))) STORED,
+  ADD COLUMN IF NOT EXISTS destination_state TEXT
+    GENERATED ALWAYS AS (NULLIF(upper(btrim(split_part(destination, ',', 2))), '')) STORED;
+
+-- text_pattern_ops serves both "= 'san jose'" and "LIKE 'san%'"
+CREATE INDEX IF NOT EXISTS idx_loads_origin_city
+  ON loads (origin_city text_pattern_ops, origin_state);
+CREATE INDEX IF NOT EXISTS idx_loads_destination_city
+  ON loads (destination_city text_pattern_ops, destination_state);
+CREATE INDEX IF NOT EXISTS idx_loads_lane_city
+  ON loads (origin_city, destination_city, pickup_datetime);
@@ -0,0 +1,10 @@
+-- db/init/012_loads_trgm.sql
+-- migrate: optional
+-- trigram indexes for fuzzy city matching (search_loads(..., fuzzy=True))
+-- kept separate from 011 so a missing pg_trgm extension doesn't block the btree indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_loads_origin_city_trgm
+  ON loads USING gin (origin_city gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_loads_destination_city_trgm
+  ON loads USING gin (destination_city gin_trgm_ops);
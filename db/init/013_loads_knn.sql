@@ -0,0 +1,8 @@
+-- db/init/013_loads_knn.sql
+-- btree indexes for nearest-neighbour matching (see db_client.find_closest_by_weight /
+-- find_nearest_loads). Single-attribute searches walk one index outward from the target
+-- in both directions; weight+miles+rate boxes range-scan idx_loads_knn on weight and
+-- check miles/rate inside the index before touching the heap.
+CREATE INDEX IF NOT EXISTS idx_loads_knn ON loads (weight, miles, loadboard_rate);
+CREATE INDEX IF NOT EXISTS idx_loads_miles ON loads (miles);
+CREATE INDEX IF NOT EXISTS idx_loads_rate ON loads (loadboard_rate);
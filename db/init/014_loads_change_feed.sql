@@ -0,0 +1,31 @@
+-- db/init/014_loads_change_feed.sql
+-- change feed for the in-process load catalog (src/load_catalog.py):
+-- updated_at is the incremental-refresh watermark, loads_changed wakes the refresher
+ALTER TABLE loads ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX IF NOT EXISTS idx_loads_updated_at ON loads (updated_at);
+
+CREATE OR REPLACE FUNCTION loads_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_loads_touch_updated_at ON loads;
+CREATE TRIGGER trg_loads_touch_updated_at
+  BEFORE UPDATE ON loads
+  FOR EACH ROW EXECUTE FUNCTION loads_touch_updated_at();
+
+-- one notification per statement (payload = INSERT/UPDATE/DELETE/TRUNCATE), so bulk loads
+-- don't flood the queue; deletes can't be seen through the watermark and trigger a reload
+CREATE OR REPLACE FUNCTION loads_notify_changed() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('loads_changed', TG_OP);
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_loads_notify_changed ON loads;
+CREATE TRIGGER trg_loads_notify_changed
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON loads
+  FOR EACH STATEMENT EXECUTE FUNCTION loads_notify_changed();
@@ -0,0 +1,6 @@
+-- db/init/015_keyset_indexes.sql
+-- unique sort keys for keyset pagination / streaming (db_client.keyset_sql):
+-- WHERE (ts, id) < (...) ORDER BY ts DESC, id DESC walks these backwards
+CREATE INDEX IF NOT EXISTS idx_loads_pickup_load_id ON loads (pickup_datetime, load_id COLLATE "C");
+CREATE INDEX IF NOT EXISTS idx_events_ts_id ON events (ts, id);
+CREATE INDEX IF NOT EXISTS idx_negotiations_ts_id ON negotiations (ts, id);
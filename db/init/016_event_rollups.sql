@@ -0,0 +1,156 @@
+-- db/init/016_event_rollups.sql
+-- per-minute / per-hour aggregates of events by (source, name, route), kept up to
+-- date by a statement-level trigger: each COPY batch from the event buffer becomes
+-- one GROUP BY over its transition table and a handful of upserts.
+-- Durations go into fixed histogram buckets so percentiles can be estimated by
+-- summing buckets across any set of rows (see src/rollups.py).
+
+-- upper bounds (exclusive, ms) of the duration buckets; hist[i] counts
+-- bounds[i-1] <= duration_ms < bounds[i], the last slot is everything >= 30s
+CREATE OR REPLACE FUNCTION event_duration_bounds() RETURNS INTEGER[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT '{5,10,25,50,100,250,500,1000,2500,5000,10000,30000}'::INTEGER[]
+$$;
+
+CREATE OR REPLACE FUNCTION event_duration_hist(durations INTEGER[]) RETURNS BIGINT[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT array_agg(coalesce(c.n, 0) ORDER BY b.i)
+  FROM generate_series(0, array_length(event_duration_bounds(), 1)) AS b(i)
+  LEFT JOIN (SELECT width_bucket(d, event_duration_bounds()) AS i, count(*) AS n
+             FROM unnest(durations) AS d
+             WHERE d IS NOT NULL
+             GROUP BY 1) c USING (i)
+$$;
+
+CREATE OR REPLACE FUNCTION event_hist_add(a BIGINT[], b BIGINT[]) RETURNS BIGINT[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT CASE WHEN a IS NULL THEN b
+              WHEN b IS NULL THEN a
+              ELSE ARRAY(SELECT coalesce(x, 0) + coalesce(y, 0) FROM unnest(a, b) AS t(x, y))
+         END
+$$;
+
+CREATE OR REPLACE AGGREGATE event_hist_sum(BIGINT[]) (
+  SFUNC = event_hist_add,
+  STYPE = BIGINT[]
+);
+
+-- q-quantile of a bucket histogram, interpolating linearly inside the bucket;
+-- max_ms caps the open-ended last bucket (and any bucket above the observed max)
+CREATE OR REPLACE FUNCTION event_hist_quantile(hist BIGINT[], q DOUBLE PRECISION, max_ms INTEGER)
+RETURNS DOUBLE PRECISION LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+DECLARE
+  bounds INTEGER[] := event_duration_bounds();
+  total BIGINT;
+  seen BIGINT := 0;
+  target DOUBLE PRECISION;
+  lo DOUBLE PRECISION;
+  hi DOUBLE PRECISION;
+BEGIN
+  SELECT sum(x) INTO total FROM unnest(hist) AS x;
+  IF total IS NULL OR total = 0 THEN
+    RETURN NULL;
+  END IF;
+  target := q * total;
+  FOR i IN 1 .. array_length(hist, 1) LOOP
+    IF hist[i] > 0 AND seen + hist[i] >= target THEN
+      lo := CASE WHEN i = 1 THEN 0 ELSE bounds[i - 1] END;
+      hi := CASE WHEN i > array_length(bounds, 1) THEN coalesce(max_ms, lo) ELSE bounds[i] END;
+      IF max_ms IS NOT NULL THEN
+        hi := greatest(lo, least(hi, max_ms));
+      END IF;
+      RETURN lo + (hi - lo) * (target - seen) / hist[i];
+    END IF;
+    seen := seen + hist[i];
+  END LOOP;
+  RETURN max_ms;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS event_rollups_minute (
+  bucket        TIMESTAMPTZ NOT NULL,
+  source        TEXT NOT NULL,
+  name          TEXT NOT NULL,
+  route         TEXT NOT NULL DEFAULT '',     -- '' when the event had no route
+  events        BIGINT NOT NULL,
+  errors        BIGINT NOT NULL,              -- status IS DISTINCT FROM 'ok'
+  timed         BIGINT NOT NULL,              -- events with a duration_ms
+  duration_sum  BIGINT NOT NULL,
+  duration_max  INTEGER,
+  hist          BIGINT[] NOT NULL,
+  PRIMARY KEY (bucket, source, name, route)
+);
+
+CREATE TABLE IF NOT EXISTS event_rollups_hour (LIKE event_rollups_minute INCLUDING ALL);
+
+CREATE OR REPLACE FUNCTION event_rollups_apply() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO event_rollups_minute AS r
+  SELECT date_trunc('minute', ts), source, name, coalesce(route, ''),
+         count(*), count(*) FILTER (WHERE status IS DISTINCT FROM 'ok'),
+         count(duration_ms), coalesce(sum(duration_ms), 0), max(duration_ms),
+         event_duration_hist(array_agg(duration_ms))
+  FROM new_events
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4    -- stable lock order between concurrent batches
+  ON CONFLICT (bucket, source, name, route) DO UPDATE
+  SET events = r.events + EXCLUDED.events,
+      errors = r.errors + EXCLUDED.errors,
+      timed = r.timed + EXCLUDED.timed,
+      duration_sum = r.duration_sum + EXCLUDED.duration_sum,
+      duration_max = greatest(r.duration_max, EXCLUDED.duration_max),
+      hist = event_hist_add(r.hist, EXCLUDED.hist);
+
+  INSERT INTO event_rollups_hour AS r
+  SELECT date_trunc('hour', ts), source, name, coalesce(route, ''),
+         count(*), count(*) FILTER (WHERE status IS DISTINCT FROM 'ok'),
+         count(duration_ms), coalesce(sum(duration_ms), 0), max(duration_ms),
+         event_duration_hist(array_agg(duration_ms))
+  FROM new_events
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (bucket, source, name, route) DO UPDATE
+  SET events = r.events + EXCLUDED.events,
+      errors = r.errors + EXCLUDED.errors,
+      timed = r.timed + EXCLUDED.timed,
+      duration_sum = r.duration_sum + EXCLUDED.duration_sum,
+      duration_max = greatest(r.duration_max, EXCLUDED.duration_max),
+      hist = event_hist_add(r.hist, EXCLUDED.hist);
+  RETURN NULL;
+END
+$$;
+
+-- no concurrent inserts between the one-off backfill and creating the trigger
+LOCK TABLE events IN SHARE ROW EXCLUSIVE MODE;
+
+-- first run only (no trigger yet): fold in the events that predate it
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger
+                 WHERE tgname = 'events_rollup' AND tgrelid = 'events'::regclass) THEN
+    INSERT INTO event_rollups_minute
+    SELECT date_trunc('minute', ts), source, name, coalesce(route, ''),
+           count(*), count(*) FILTER (WHERE status IS DISTINCT FROM 'ok'),
+           count(duration_ms), coalesce(sum(duration_ms), 0), max(duration_ms),
+           event_duration_hist(array_agg(duration_ms))
+    FROM events
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO event_rollups_hour
+    SELECT date_trunc('hour', ts), source, name, coalesce(route, ''),
+           count(*), count(*) FILTER (WHERE status IS DISTINCT FROM 'ok'),
+           count(duration_ms), coalesce(sum(duration_ms), 0), max(duration_ms),
+           event_duration_hist(array_agg(duration_ms))
+    FROM events
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT DO NOTHING;
+  END IF;
+END
+$$;
+
+CREATE OR REPLACE TRIGGER events_rollup
+  AFTER INSERT ON events
+  REFERENCING NEW TABLE AS new_events
+  FOR EACH STATEMENT EXECUTE FUNCTION event_rollups_apply();
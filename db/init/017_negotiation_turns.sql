@@ -0,0 +1,15 @@
+-- db/init/017_negotiation_turns.sql
+-- append-only log of negotiation turns, one row per carrier message or AI answer
+-- (see src/negotiation_turns.py); replaces re-storing the whole text transcript
+CREATE TABLE IF NOT EXISTS negotiation_turns (
+  session_id  TEXT NOT NULL,
+  seq         INTEGER NOT NULL,            -- 1, 2, ... per session
+  role        TEXT NOT NULL,               -- 'user' | 'ai'
+  ts          TIMESTAMPTZ NOT NULL,
+  message     TEXT,
+  price       NUMERIC,                     -- requested (user) or offered (ai) price
+  cur_round   INTEGER,
+  PRIMARY KEY (session_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_negotiation_turns_ts ON negotiation_turns (ts);
@@ -0,0 +1,18 @@
+-- db/init/018_dispatch_dead_letters.sql
+-- outbound webhook calls that ran out of retries (see src/dispatch.py)
+CREATE TABLE IF NOT EXISTS dispatch_dead_letters (
+  id           BIGSERIAL PRIMARY KEY,
+  upstream     TEXT NOT NULL,                -- http_clients upstream name
+  method       TEXT NOT NULL,
+  url          TEXT NOT NULL,
+  ref          TEXT,                         -- job_id / session_id the call was for
+  body         JSONB,
+  attempts     INTEGER NOT NULL,
+  last_status  INTEGER,                      -- HTTP status of the last attempt, NULL on transport errors
+  last_error   TEXT,
+  enqueued_at  TIMESTAMPTZ NOT NULL,
+  failed_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_dispatch_dead_letters_failed ON dispatch_dead_letters (failed_at);
+CREATE INDEX IF NOT EXISTS idx_dispatch_dead_letters_ref ON dispatch_dead_letters (ref);
@@ -0,0 +1,7 @@
+-- db/init/019_loads_recommend.sql
+-- covering index for recommend.recommend_loads: the soonest upcoming pickups are read
+-- in pickup order with every scored column inside the index (index-only scan), and
+-- only the top k rows are fetched from the heap
+CREATE INDEX IF NOT EXISTS idx_loads_recommend ON loads (pickup_datetime)
+    INCLUDE (load_id, origin_city, origin_state, destination_city, destination_state,
+             weight, miles, loadboard_rate, equipment_type);
@@ -0,0 +1,83 @@
+-- db/init/020_loads_geo.sql
+-- city gazetteer + geocoded loads for radius / deadhead search (search_loads(origin_radius_miles=...)).
+-- loads are geocoded at ingest by trg_loads_geocode against `cities` (data in 021_city_gazetteer.sql).
+-- The spatial index is a grid of 0.5 degree cells (about 35 x 25-30 miles in the lower 48) on
+-- plain btrees, so it needs no extension: a radius query looks up the cells covering its
+-- bounding box, then checks the exact great-circle distance on lat/lon carried in the index.
+CREATE TABLE IF NOT EXISTS cities (
+  city        TEXT NOT NULL,            -- normalized like loads.origin_city; "st. " for Saint / St
+  state       TEXT NOT NULL,            -- two-letter code
+  lat         DOUBLE PRECISION NOT NULL,
+  lon         DOUBLE PRECISION NOT NULL,
+  population  INTEGER,                  -- picks the city when a place has no state
+  PRIMARY KEY (city, state)
+);
+
+ALTER TABLE loads
+  ADD COLUMN IF NOT EXISTS origin_lat DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS origin_lon DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS origin_cell INTEGER,
+  ADD COLUMN IF NOT EXISTS destination_lat DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS destination_lon DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS destination_cell INTEGER;
+
+-- cell of a point; changing the 0.5 means re-geocoding every load
+CREATE OR REPLACE FUNCTION geo_cell(lat DOUBLE PRECISION, lon DOUBLE PRECISION) RETURNS INTEGER AS $$
+  SELECT (floor(lat / 0.5)::int + 180) * 1000 + (floor(lon / 0.5)::int + 360)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- every cell touching the box around `center` (point(lon, lat)) that holds the circle of `miles`,
+-- clamped to the grid (latitude cells -180..180, longitude cells -360..359) so a huge radius
+-- or one near a pole, where the longitude span blows up, can't list cells off the map
+CREATE OR REPLACE FUNCTION geo_cells(center POINT, miles DOUBLE PRECISION) RETURNS INTEGER[] AS $$
+  SELECT array_agg((i + 180) * 1000 + (j + 360))
+  FROM (SELECT center[1] AS lat, center[0] AS lon, miles / 68.7 AS dlat) c,
+       LATERAL (SELECT miles / (69.17 * greatest(cos(radians(least(abs(c.lat) + c.dlat, 89.0))), 0.01)) AS dlon) d,
+       generate_series(greatest(floor((c.lat - c.dlat) / 0.5)::int, -180), least(floor((c.lat + c.dlat) / 0.5)::int, 180)) i,
+       generate_series(greatest(floor((c.lon - d.dlon) / 0.5)::int, -360), least(floor((c.lon + d.dlon) / 0.5)::int, 359)) j
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- great-circle (haversine) miles from (lat, lon) to `center`
+CREATE OR REPLACE FUNCTION geo_miles(lat DOUBLE PRECISION, lon DOUBLE PRECISION, center POINT)
+RETURNS DOUBLE PRECISION AS $$
+  SELECT 2 * 3958.8 * asin(least(1.0, sqrt(
+           sin(radians(lat - center[1]) / 2) ^ 2
+           + cos(radians(lat)) * cos(radians(center[1])) * sin(radians(lon - center[0]) / 2) ^ 2)))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- "Dallas, TX" / "dallas, tx 75201" / "Dallas" (most populous match) -> point(lon, lat), or NULL
+CREATE OR REPLACE FUNCTION geocode(place TEXT) RETURNS POINT AS $$
+  SELECT point(c.lon, c.lat)
+  FROM cities c,
+       LATERAL (SELECT regexp_replace(lower(btrim(split_part(place, ',', 1))), '^(saint|st\.?)\s+', 'st. ') AS city,
+                       NULLIF(left(upper(btrim(split_part(place, ',', 2))), 2), '') AS state) p
+  WHERE c.city = p.city AND (p.state IS NULL OR c.state = p.state)
+  ORDER BY c.population DESC NULLS LAST
+  LIMIT 1
+$$ LANGUAGE sql STABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION loads_geocode() RETURNS trigger AS $$
+DECLARE
+  o POINT := geocode(NEW.origin);
+  d POINT := geocode(NEW.destination);
+BEGIN
+  NEW.origin_lat := o[1];
+  NEW.origin_lon := o[0];
+  NEW.origin_cell := geo_cell(o[1], o[0]);
+  NEW.destination_lat := d[1];
+  NEW.destination_lon := d[0];
+  NEW.destination_cell := geo_cell(d[1], d[0]);
+  RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_loads_geocode ON loads;
+CREATE TRIGGER trg_loads_geocode
+  BEFORE INSERT OR UPDATE OF origin, destination ON loads
+  FOR EACH ROW EXECUTE FUNCTION loads_geocode();
+
+-- lat/lon ride along so the distance check runs inside the index
+CREATE INDEX IF NOT EXISTS idx_loads_origin_cell
+  ON loads (origin_cell) INCLUDE (origin_lat, origin_lon);
+CREATE INDEX IF NOT EXISTS idx_loads_destination_cell
+  ON loads (destination_cell) INCLUDE (destination_lat, destination_lon);
@@ -0,0 +1,405 @@
+-- db/init/021_city_gazetteer.sql
+-- bundled gazetteer for 020_loads_geo.sql: the larger US cities plus freight hubs and every
+-- city in the seed data. Coordinates are city centres; population is approximate and only
+-- breaks ties for places given without a state. Add cities with a new file that upserts
+-- the same way; its last statement geocodes loads that did not match before.
+INSERT INTO cities (city, state, lat, lon, population) VALUES
+  ('birmingham',          'AL',  33.5186,  -86.8104,  200733),
+  ('montgomery',          'AL',  32.3668,  -86.3000,  200603),
+  ('mobile',              'AL',  30.6954,  -88.0399,  187041),
+  ('huntsville',          'AL',  34.7304,  -86.5861,  215006),
+  ('dothan',              'AL',  31.2232,  -85.3905,   71072),
+  ('anchorage',           'AK',  61.2181, -149.9003,  291247),
+  ('fairbanks',           'AK',  64.8378, -147.7164,   32515),
+  ('phoenix',             'AZ',  33.4484, -112.0740, 1608139),
+  ('tucson',              'AZ',  32.2226, -110.9747,  542629),
+  ('mesa',                'AZ',  33.4152, -111.8315,  504258),
+  ('chandler',            'AZ',  33.3062, -111.8413,  275987),
+  ('scottsdale',          'AZ',  33.4942, -111.9261,  241361),
+  ('glendale',            'AZ',  33.5387, -112.1860,  248325),
+  ('tempe',               'AZ',  33.4255, -111.9400,  180587),
+  ('flagstaff',           'AZ',  35.1983, -111.6513,   76831),
+  ('yuma',                'AZ',  32.6927, -114.6277,   95548),
+  ('nogales',             'AZ',  31.3404, -110.9343,   19770),
+  ('kingman',             'AZ',  35.1894, -114.0530,   32689),
+  ('little rock',         'AR',  34.7465,  -92.2896,  202591),
+  ('fort smith',          'AR',  35.3859,  -94.3985,   89142),
+  ('fayetteville',        'AR',  36.0626,  -94.1574,   93949),
+  ('springdale',          'AR',  36.1867,  -94.1288,   84161),
+  ('lowell',              'AR',  36.2553,  -94.1308,    9839),
+  ('bentonville',         'AR',  36.3729,  -94.2088,   54164),
+  ('jonesboro',           'AR',  35.8423,  -90.7043,   78576),
+  ('west memphis',        'AR',  35.1465,  -90.1845,   24520),
+  ('los angeles',         'CA',  34.0522, -118.2437, 3898747),
+  ('san diego',           'CA',  32.7157, -117.1611, 1386932),
+  ('san jose',            'CA',  37.3382, -121.8863, 1013240),
+  ('san francisco',       'CA',  37.7749, -122.4194,  873965),
+  ('fresno',              'CA',  36.7378, -119.7871,  542107),
+  ('sacramento',          'CA',  38.5816, -121.4944,  524943),
+  ('long beach',          'CA',  33.7701, -118.1937,  466742),
+  ('oakland',             'CA',  37.8044, -122.2712,  440646),
+  ('bakersfield',         'CA',  35.3733, -119.0187,  403455),
+  ('anaheim',             'CA',  33.8366, -117.9143,  346824),
+  ('santa ana',           'CA',  33.7455, -117.8677,  310227),
+  ('riverside',           'CA',  33.9806, -117.3755,  314998),
+  ('stockton',            'CA',  37.9577, -121.2908,  320804),
+  ('irvine',              'CA',  33.6846, -117.8265,  307670),
+  ('fremont',             'CA',  37.5485, -121.9886,  230504),
+  ('san bernardino',      'CA',  34.1083, -117.2898,  222101),
+  ('modesto',             'CA',  37.6391, -120.9969,  218464),
+  ('fontana',             'CA',  34.0922, -117.4350,  208393),
+  ('ontario',             'CA',  34.0633, -117.6509,  175265),
+  ('oxnard',              'CA',  34.1975, -119.1771,  202063),
+  ('moreno valley',       'CA',  33.9425, -117.2297,  208634),
+  ('santa rosa',          'CA',  38.4405, -122.7144,  178127),
+  ('salinas',             'CA',  36.6777, -121.6555,  163542),
+  ('hayward',             'CA',  37.6688, -122.0808,  162954),
+  ('sunnyvale',           'CA',  37.3688, -122.0363,  155805),
+  ('visalia',             'CA',  36.3302, -119.2921,  141384),
+  ('santa clara',         'CA',  37.3541, -121.9552,  127647),
+  ('vallejo',             'CA',  38.1041, -122.2566,  126090),
+  ('concord',             'CA',  37.9780, -122.0311,  125410),
+  ('berkeley',            'CA',  37.8715, -122.2730,  124321),
+  ('victorville',         'CA',  34.5362, -117.2928,  134810),
+  ('san mateo',           'CA',  37.5630, -122.3255,  105661),
+  ('daly city',           'CA',  37.6879, -122.4702,  104901),
+  ('chico',               'CA',  39.7285, -121.8375,  101475),
+  ('compton',             'CA',  33.8958, -118.2201,   95740),
+  ('carson',              'CA',  33.8317, -118.2820,   95558),
+  ('tracy',               'CA',  37.7397, -121.4252,   93000),
+  ('redding',             'CA',  40.5865, -122.3917,   93611),
+  ('san leandro',         'CA',  37.7249, -122.1561,   91008),
+  ('livermore',           'CA',  37.6819, -121.7680,   87955),
+  ('redwood city',        'CA',  37.4852, -122.2364,   84292),
+  ('mountain view',       'CA',  37.3861, -122.0839,   82376),
+  ('pleasanton',          'CA',  37.6624, -121.8747,   79871),
+  ('union city',          'CA',  37.5934, -122.0438,   70143),
+  ('walnut creek',        'CA',  37.9101, -122.0652,   70127),
+  ('palo alto',           'CA',  37.4419, -122.1430,   68572),
+  ('cupertino',           'CA',  37.3230, -122.0322,   60381),
+  ('merced',              'CA',  37.3022, -120.4830,   86333),
+  ('palm springs',        'CA',  33.8303, -116.5453,   44575),
+  ('el centro',           'CA',  32.7920, -115.5631,   44322),
+  ('calexico',            'CA',  32.6789, -115.4989,   38633),
+  ('barstow',             'CA',  34.8958, -117.0173,   25415),
+  ('eureka',              'CA',  40.8021, -124.1637,   26512),
+  ('denver',              'CO',  39.7392, -104.9903,  715522),
+  ('colorado springs',    'CO',  38.8339, -104.8214,  478961),
+  ('aurora',              'CO',  39.7294, -104.8319,  386261),
+  ('fort collins',        'CO',  40.5853, -105.0844,  169810),
+  ('greeley',             'CO',  40.4233, -104.7091,  108795),
+  ('pueblo',              'CO',  38.2544, -104.6091,  111876),
+  ('grand junction',      'CO',  39.0639, -108.5506,   65560),
+  ('bridgeport',          'CT',  41.1865,  -73.1952,  148654),
+  ('stamford',            'CT',  41.0534,  -73.5387,  135470),
+  ('new haven',           'CT',  41.3083,  -72.9279,  134023),
+  ('hartford',            'CT',  41.7658,  -72.6734,  121054),
+  ('wilmington',          'DE',  39.7391,  -75.5398,   70898),
+  ('dover',               'DE',  39.1582,  -75.5244,   39403),
+  ('washington',          'DC',  38.9072,  -77.0369,  689545),
+  ('jacksonville',        'FL',  30.3322,  -81.6557,  949611),
+  ('miami',               'FL',  25.7617,  -80.1918,  442241),
+  ('tampa',               'FL',  27.9506,  -82.4572,  384959),
+  ('orlando',             'FL',  28.5383,  -81.3792,  307573),
+  ('st. petersburg',      'FL',  27.7676,  -82.6403,  258308),
+  ('hialeah',             'FL',  25.8576,  -80.2781,  223109),
+  ('tallahassee',         'FL',  30.4383,  -84.2807,  196169),
+  ('fort lauderdale',     'FL',  26.1224,  -80.1373,  182760),
+  ('gainesville',         'FL',  29.6516,  -82.3248,  141085),
+  ('west palm beach',     'FL',  26.7153,  -80.0534,  117415),
+  ('lakeland',            'FL',  28.0395,  -81.9498,  112641),
+  ('fort myers',          'FL',  26.6406,  -81.8723,   86395),
+  ('doral',               'FL',  25.8195,  -80.3553,   75874),
+  ('daytona beach',       'FL',  29.2108,  -81.0228,   72647),
+  ('ocala',               'FL',  29.1872,  -82.1401,   63591),
+  ('pensacola',           'FL',  30.4213,  -87.2169,   54312),
+  ('atlanta',             'GA',  33.7490,  -84.3880,  498715),
+  ('columbus',            'GA',  32.4610,  -84.9877,  206922),
+  ('augusta',             'GA',  33.4735,  -82.0105,  202081),
+  ('macon',               'GA',  32.8407,  -83.6324,  157346),
+  ('savannah',            'GA',  32.0809,  -81.0912,  147780),
+  ('athens',              'GA',  33.9519,  -83.3576,  127315),
+  ('valdosta',            'GA',  30.8327,  -83.2785,   55378),
+  ('dalton',              'GA',  34.7698,  -84.9702,   34417),
+  ('albany',              'GA',  31.5785,  -84.1557,   69647),
+  ('honolulu',            'HI',  21.3069, -157.8583,  350964),
+  ('boise',               'ID',  43.6150, -116.2023,  235684),
+  ('nampa',               'ID',  43.5407, -116.5635,  100200),
+  ('idaho falls',         'ID',  43.4917, -112.0339,   64818),
+  ('pocatello',           'ID',  42.8713, -112.4455,   56320),
+  ('twin falls',          'ID',  42.5629, -114.4609,   51807),
+  ('coeur d''alene',      'ID',  47.6777, -116.7805,   54628),
+  ('chicago',             'IL',  41.8781,  -87.6298, 2746388),
+  ('aurora',              'IL',  41.7606,  -88.3201,  180542),
+  ('joliet',              'IL',  41.5250,  -88.0817,  150362),
+  ('naperville',          'IL',  41.7508,  -88.1535,  149540),
+  ('rockford',            'IL',  42.2711,  -89.0940,  148655),
+  ('elgin',               'IL',  42.0354,  -88.2826,  114797),
+  ('springfield',         'IL',  39.7817,  -89.6501,  114394),
+  ('peoria',              'IL',  40.6936,  -89.5890,  113150),
+  ('champaign',           'IL',  40.1164,  -88.2434,   88302),
+  ('bloomington',         'IL',  40.4842,  -88.9937,   78680),
+  ('elk grove village',   'IL',  42.0039,  -87.9703,   32812),
+  ('effingham',           'IL',  39.1200,  -88.5434,   12252),
+  ('rochelle',            'IL',  41.9239,  -89.0687,    9446),
+  ('indianapolis',        'IN',  39.7684,  -86.1581,  887642),
+  ('fort wayne',          'IN',  41.0793,  -85.1394,  263886),
+  ('evansville',          'IN',  37.9716,  -87.5711,  117298),
+  ('south bend',          'IN',  41.6764,  -86.2520,  103453),
+  ('lafayette',           'IN',  40.4167,  -86.8753,   70783),
+  ('gary',                'IN',  41.5934,  -87.3464,   69093),
+  ('plainfield',          'IN',  39.7042,  -86.3994,   34625),
+  ('des moines',          'IA',  41.5868,  -93.6250,  214133),
+  ('cedar rapids',        'IA',  41.9779,  -91.6656,  137710),
+  ('davenport',           'IA',  41.5236,  -90.5776,  101724),
+  ('sioux city',          'IA',  42.4963,  -96.4049,   85797),
+  ('iowa city',           'IA',  41.6611,  -91.5302,   74828),
+  ('waterloo',            'IA',  42.4928,  -92.3426,   67314),
+  ('council bluffs',      'IA',  41.2619,  -95.8608,   62799),
+  ('wichita',             'KS',  37.6872,  -97.3301,  397532),
+  ('overland park',       'KS',  38.9822,  -94.6708,  197238),
+  ('kansas city',         'KS',  39.1141,  -94.6275,  156607),
+  ('topeka',              'KS',  39.0473,  -95.6752,  126587),
+  ('salina',              'KS',  38.8403,  -97.6114,   46889),
+  ('garden city',         'KS',  37.9717, -100.8727,   28151),
+  ('dodge city',          'KS',  37.7528, -100.0171,   27788),
+  ('liberal',             'KS',  37.0431, -100.9210,   19825),
+  ('louisville',          'KY',  38.2527,  -85.7585,  633045),
+  ('lexington',           'KY',  38.0406,  -84.5037,  322570),
+  ('bowling green',       'KY',  36.9685,  -86.4808,   72294),
+  ('owensboro',           'KY',  37.7719,  -87.1112,   60183),
+  ('florence',            'KY',  38.9989,  -84.6266,   31946),
+  ('new orleans',         'LA',  29.9511,  -90.0715,  383997),
+  ('baton rouge',         'LA',  30.4515,  -91.1871,  227470),
+  ('shreveport',          'LA',  32.5252,  -93.7502,  187593),
+  ('lafayette',           'LA',  30.2241,  -92.0198,  121374),
+  ('lake charles',        'LA',  30.2266,  -93.2174,   84872),
+  ('monroe',              'LA',  32.5093,  -92.1193,   47702),
+  ('portland',            'ME',  43.6591,  -70.2568,   68408),
+  ('bangor',              'ME',  44.8012,  -68.7778,   31753),
+  ('baltimore',           'MD',  39.2904,  -76.6122,  585708),
+  ('frederick',           'MD',  39.4143,  -77.4105,   78171),
+  ('hagerstown',          'MD',  39.6418,  -77.7200,   43527),
+  ('boston',              'MA',  42.3601,  -71.0589,  675647),
+  ('worcester',           'MA',  42.2626,  -71.8023,  206518),
+  ('springfield',         'MA',  42.1015,  -72.5898,  155929),
+  ('lowell',              'MA',  42.6334,  -71.3162,  115554),
+  ('detroit',             'MI',  42.3314,  -83.0458,  639111),
+  ('grand rapids',        'MI',  42.9634,  -85.6681,  198917),
+  ('ann arbor',           'MI',  42.2808,  -83.7430,  123851),
+  ('lansing',             'MI',  42.7325,  -84.5555,  112644),
+  ('flint',               'MI',  43.0125,  -83.6875,   81252),
+  ('kalamazoo',           'MI',  42.2917,  -85.5872,   73598),
+  ('saginaw',             'MI',  43.4195,  -83.9508,   44202),
+  ('traverse city',       'MI',  44.7631,  -85.6206,   15678),
+  ('minneapolis',         'MN',  44.9778,  -93.2650,  429954),
+  ('st. paul',            'MN',  44.9537,  -93.0900,  311527),
+  ('rochester',           'MN',  44.0121,  -92.4802,  121395),
+  ('duluth',              'MN',  46.7867,  -92.1005,   86697),
+  ('st. cloud',           'MN',  45.5579,  -94.1632,   68881),
+  ('jackson',             'MS',  32.2988,  -90.1848,  153701),
+  ('gulfport',            'MS',  30.3674,  -89.0928,   72926),
+  ('southaven',           'MS',  34.9890,  -90.0126,   54648),
+  ('hattiesburg',         'MS',  31.3271,  -89.2903,   48730),
+  ('tupelo',              'MS',  34.2576,  -88.7034,   37923),
+  ('meridian',            'MS',  32.3643,  -88.7037,   35052),
+  ('kansas city',         'MO',  39.0997,  -94.5786,  508090),
+  ('st. louis',           'MO',  38.6270,  -90.1994,  301578),
+  ('springfield',         'MO',  37.2090,  -93.2923,  169176),
+  ('columbia',            'MO',  38.9517,  -92.3341,  126254),
+  ('st. joseph',          'MO',  39.7675,  -94.8467,   72473),
+  ('joplin',              'MO',  37.0842,  -94.5133,   51762),
+  ('cape girardeau',      'MO',  37.3059,  -89.5181,   39540),
+  ('billings',            'MT',  45.7833, -108.5007,  117116),
+  ('missoula',            'MT',  46.8721, -113.9940,   73489),
+  ('great falls',         'MT',  47.5053, -111.3008,   60442),
+  ('bozeman',             'MT',  45.6770, -111.0429,   53293),
+  ('butte',               'MT',  46.0038, -112.5348,   34494),
+  ('helena',              'MT',  46.5891, -112.0391,   32091),
+  ('omaha',               'NE',  41.2565,  -95.9345,  486051),
+  ('lincoln',             'NE',  40.8136,  -96.7026,  291082),
+  ('grand island',        'NE',  40.9264,  -98.3420,   53131),
+  ('kearney',             'NE',  40.6993,  -99.0832,   33790),
+  ('north platte',        'NE',  41.1403, -100.7601,   23390),
+  ('las vegas',           'NV',  36.1699, -115.1398,  641903),
+  ('henderson',           'NV',  36.0395, -114.9817,  317610),
+  ('reno',                'NV',  39.5296, -119.8138,  264165),
+  ('north las vegas',     'NV',  36.1989, -115.1175,  262527),
+  ('sparks',              'NV',  39.5349, -119.7527,  108445),
+  ('elko',                'NV',  40.8324, -115.7631,   20564),
+  ('manchester',          'NH',  42.9956,  -71.4548,  115644),
+  ('nashua',              'NH',  42.7654,  -71.4676,   91322),
+  ('newark',              'NJ',  40.7357,  -74.1724,  311549),
+  ('jersey city',         'NJ',  40.7178,  -74.0431,  292449),
+  ('paterson',            'NJ',  40.9168,  -74.1718,  159732),
+  ('elizabeth',           'NJ',  40.6640,  -74.2107,  137298),
+  ('edison',              'NJ',  40.5187,  -74.4121,  107588),
+  ('trenton',             'NJ',  40.2171,  -74.7429,   90871),
+  ('camden',              'NJ',  39.9259,  -75.1196,   71791),
+  ('secaucus',            'NJ',  40.7895,  -74.0565,   22181),
+  ('albuquerque',         'NM',  35.0844, -106.6504,  564559),
+  ('las cruces',          'NM',  32.3199, -106.7637,  111385),
+  ('santa fe',            'NM',  35.6870, -105.9378,   87505),
+  ('gallup',              'NM',  35.5281, -108.7426,   21899),
+  ('new york',            'NY',  40.7128,  -74.0060, 8804190),
+  ('brooklyn',            'NY',  40.6782,  -73.9442, 2736074),
+  ('bronx',               'NY',  40.8448,  -73.8648, 1472654),
+  ('buffalo',             'NY',  42.8864,  -78.8784,  278349),
+  ('yonkers',             'NY',  40.9312,  -73.8988,  211569),
+  ('rochester',           'NY',  43.1566,  -77.6088,  211328),
+  ('syracuse',            'NY',  43.0481,  -76.1474,  148620),
+  ('albany',              'NY',  42.6526,  -73.7562,   99224),
+  ('utica',               'NY',  43.1009,  -75.2327,   65283),
+  ('binghamton',          'NY',  42.0987,  -75.9180,   47969),
+  ('charlotte',           'NC',  35.2271,  -80.8431,  874579),
+  ('raleigh',             'NC',  35.7796,  -78.6382,  467665),
+  ('greensboro',          'NC',  36.0726,  -79.7920,  299035),
+  ('durham',              'NC',  35.9940,  -78.8986,  283506),
+  ('winston-salem',       'NC',  36.0999,  -80.2442,  249545),
+  ('fayetteville',        'NC',  35.0527,  -78.8784,  208501),
+  ('wilmington',          'NC',  34.2257,  -77.9447,  115451),
+  ('asheville',           'NC',  35.5951,  -82.5515,   94589),
+  ('hickory',             'NC',  35.7332,  -81.3412,   43490),
+  ('fargo',               'ND',  46.8772,  -96.7898,  125990),
+  ('bismarck',            'ND',  46.8083, -100.7837,   73622),
+  ('grand forks',         'ND',  47.9253,  -97.0329,   59166),
+  ('minot',               'ND',  48.2330, -101.2923,   48377),
+  ('williston',           'ND',  48.1470, -103.6180,   29160),
+  ('columbus',            'OH',  39.9612,  -82.9988,  905748),
+  ('cleveland',           'OH',  41.4993,  -81.6944,  372624),
+  ('cincinnati',          'OH',  39.1031,  -84.5120,  309317),
+  ('toledo',              'OH',  41.6528,  -83.5379,  270871),
+  ('akron',               'OH',  41.0814,  -81.5190,  190469),
+  ('dayton',              'OH',  39.7589,  -84.1916,  137644),
+  ('canton',              'OH',  40.7989,  -81.3784,   70872),
+  ('youngstown',          'OH',  41.0998,  -80.6495,   60068),
+  ('lima',                'OH',  40.7426,  -84.1052,   35579),
+  ('oklahoma city',       'OK',  35.4676,  -97.5164,  681054),
+  ('tulsa',               'OK',  36.1540,  -95.9928,  413066),
+  ('norman',              'OK',  35.2226,  -97.4395,  128026),
+  ('lawton',              'OK',  34.6036,  -98.3959,   90381),
+  ('enid',                'OK',  36.3956,  -97.8784,   51308),
+  ('portland',            'OR',  45.5152, -122.6784,  652503),
+  ('eugene',              'OR',  44.0521, -123.0868,  176654),
+  ('salem',               'OR',  44.9429, -123.0351,  175535),
+  ('bend',                'OR',  44.0582, -121.3153,   99178),
+  ('medford',             'OR',  42.3265, -122.8756,   85824),
+  ('klamath falls',       'OR',  42.2249, -121.7817,   21813),
+  ('hermiston',           'OR',  45.8404, -119.2895,   19354),
+  ('pendleton',           'OR',  45.6721, -118.7886,   17107),
+  ('philadelphia',        'PA',  39.9526,  -75.1652, 1603797),
+  ('pittsburgh',          'PA',  40.4406,  -79.9959,  302971),
+  ('allentown',           'PA',  40.6084,  -75.4902,  125845),
+  ('reading',             'PA',  40.3356,  -75.9269,   95112),
+  ('erie',                'PA',  42.1292,  -80.0851,   94831),
+  ('scranton',            'PA',  41.4090,  -75.6624,   76328),
+  ('bethlehem',           'PA',  40.6259,  -75.3705,   75781),
+  ('lancaster',           'PA',  40.0379,  -76.3055,   58039),
+  ('harrisburg',          'PA',  40.2732,  -76.8867,   50099),
+  ('york',                'PA',  39.9626,  -76.7277,   44800),
+  ('wilkes-barre',        'PA',  41.2459,  -75.8813,   44328),
+  ('chambersburg',        'PA',  39.9376,  -77.6611,   21903),
+  ('carlisle',            'PA',  40.2015,  -77.1889,   20118),
+  ('providence',          'RI',  41.8240,  -71.4128,  190934),
+  ('charleston',          'SC',  32.7765,  -79.9311,  150227),
+  ('columbia',            'SC',  34.0007,  -81.0348,  136632),
+  ('greenville',          'SC',  34.8526,  -82.3940,   70720),
+  ('florence',            'SC',  34.1954,  -79.7626,   39899),
+  ('spartanburg',         'SC',  34.9496,  -81.9320,   38732),
+  ('myrtle beach',        'SC',  33.6891,  -78.8867,   35682),
+  ('sioux falls',         'SD',  43.5446,  -96.7311,  192517),
+  ('rapid city',          'SD',  44.0805, -103.2310,   74703),
+  ('aberdeen',            'SD',  45.4647,  -98.4865,   28495),
+  ('nashville',           'TN',  36.1627,  -86.7816,  689447),
+  ('memphis',             'TN',  35.1495,  -90.0490,  633104),
+  ('knoxville',           'TN',  35.9606,  -83.9207,  190740),
+  ('chattanooga',         'TN',  35.0456,  -85.3097,  181099),
+  ('clarksville',         'TN',  36.5298,  -87.3595,  166722),
+  ('murfreesboro',        'TN',  35.8456,  -86.3903,  152769),
+  ('jackson',             'TN',  35.6145,  -88.8139,   68205),
+  ('kingsport',           'TN',  36.5484,  -82.5618,   55442),
+  ('houston',             'TX',  29.7604,  -95.3698, 2304580),
+  ('san antonio',         'TX',  29.4241,  -98.4936, 1434625),
+  ('dallas',              'TX',  32.7767,  -96.7970, 1304379),
+  ('austin',              'TX',  30.2672,  -97.7431,  961855),
+  ('fort worth',          'TX',  32.7555,  -97.3308,  918915),
+  ('el paso',             'TX',  31.7619, -106.4850,  678815),
+  ('arlington',           'TX',  32.7357,  -97.1081,  394266),
+  ('corpus christi',      'TX',  27.8006,  -97.3964,  317863),
+  ('plano',               'TX',  33.0198,  -96.6989,  285494),
+  ('lubbock',             'TX',  33.5779, -101.8552,  257141),
+  ('irving',              'TX',  32.8140,  -96.9489,  256684),
+  ('laredo',              'TX',  27.5306,  -99.4803,  255205),
+  ('garland',             'TX',  32.9126,  -96.6389,  246018),
+  ('amarillo',            'TX',  35.2220, -101.8313,  200393),
+  ('brownsville',         'TX',  25.9017,  -97.4975,  186738),
+  ('killeen',             'TX',  31.1171,  -97.7278,  153095),
+  ('pasadena',            'TX',  29.6911,  -95.2091,  151950),
+  ('mcallen',             'TX',  26.2034,  -98.2300,  142210),
+  ('denton',              'TX',  33.2148,  -97.1331,  139869),
+  ('waco',                'TX',  31.5493,  -97.1467,  138486),
+  ('midland',             'TX',  31.9973, -102.0779,  132524),
+  ('abilene',             'TX',  32.4487,  -99.7331,  125182),
+  ('college station',     'TX',  30.6280,  -96.3344,  120511),
+  ('beaumont',            'TX',  30.0802,  -94.1266,  115282),
+  ('odessa',              'TX',  31.8457, -102.3676,  114428),
+  ('tyler',               'TX',  32.3513,  -95.3011,  105995),
+  ('wichita falls',       'TX',  33.9137,  -98.4934,  102316),
+  ('san angelo',          'TX',  31.4638, -100.4370,   99893),
+  ('conroe',              'TX',  30.3119,  -95.4560,   89956),
+  ('baytown',             'TX',  29.7355,  -94.9774,   83701),
+  ('temple',              'TX',  31.0982,  -97.3428,   82073),
+  ('longview',            'TX',  32.5007,  -94.7405,   81638),
+  ('pharr',               'TX',  26.1948,  -98.1836,   79715),
+  ('victoria',            'TX',  28.8053,  -97.0036,   65534),
+  ('texarkana',           'TX',  33.4251,  -94.0477,   36193),
+  ('eagle pass',          'TX',  28.7091, -100.4995,   28130),
+  ('salt lake city',      'UT',  40.7608, -111.8910,  199723),
+  ('west valley city',    'UT',  40.6916, -112.0011,  140230),
+  ('provo',               'UT',  40.2338, -111.6585,  115162),
+  ('st. george',          'UT',  37.0965, -113.5684,   95342),
+  ('ogden',               'UT',  41.2230, -111.9738,   87321),
+  ('logan',               'UT',  41.7370, -111.8338,   52778),
+  ('burlington',          'VT',  44.4759,  -73.2121,   44743),
+  ('virginia beach',      'VA',  36.8529,  -75.9780,  459470),
+  ('chesapeake',          'VA',  36.7682,  -76.2875,  249422),
+  ('norfolk',             'VA',  36.8508,  -76.2859,  238005),
+  ('richmond',            'VA',  37.5407,  -77.4360,  226610),
+  ('newport news',        'VA',  37.0871,  -76.4730,  186247),
+  ('roanoke',             'VA',  37.2710,  -79.9414,  100011),
+  ('lynchburg',           'VA',  37.4138,  -79.1422,   79009),
+  ('harrisonburg',        'VA',  38.4496,  -78.8689,   51814),
+  ('winchester',          'VA',  39.1857,  -78.1633,   28120),
+  ('seattle',             'WA',  47.6062, -122.3321,  737015),
+  ('spokane',             'WA',  47.6588, -117.4260,  228989),
+  ('tacoma',              'WA',  47.2529, -122.4443,  219346),
+  ('vancouver',           'WA',  45.6387, -122.6615,  190915),
+  ('bellevue',            'WA',  47.6101, -122.2015,  151854),
+  ('kent',                'WA',  47.3809, -122.2348,  136588),
+  ('everett',             'WA',  47.9790, -122.2021,  110629),
+  ('yakima',              'WA',  46.6021, -120.5059,   96968),
+  ('bellingham',          'WA',  48.7519, -122.4787,   91482),
+  ('kennewick',           'WA',  46.2112, -119.1372,   83921),
+  ('pasco',               'WA',  46.2396, -119.1006,   77108),
+  ('wenatchee',           'WA',  47.4235, -120.3103,   35508),
+  ('charleston',          'WV',  38.3498,  -81.6326,   48864),
+  ('huntington',          'WV',  38.4192,  -82.4452,   46842),
+  ('morgantown',          'WV',  39.6295,  -79.9559,   30347),
+  ('milwaukee',           'WI',  43.0389,  -87.9065,  577222),
+  ('madison',             'WI',  43.0731,  -89.4012,  269840),
+  ('green bay',           'WI',  44.5133,  -88.0133,  107395),
+  ('kenosha',             'WI',  42.5847,  -87.8212,   99986),
+  ('appleton',            'WI',  44.2619,  -88.4154,   75644),
+  ('eau claire',          'WI',  44.8113,  -91.4985,   69421),
+  ('la crosse',           'WI',  43.8014,  -91.2396,   52680),
+  ('wausau',              'WI',  44.9591,  -89.6301,   39994),
+  ('cheyenne',            'WY',  41.1400, -104.8202,   65132),
+  ('casper',              'WY',  42.8666, -106.3131,   59038),
+  ('laramie',             'WY',  41.3114, -105.5911,   31407),
+  ('rock springs',        'WY',  41.5875, -109.2029,   23526)
+ON CONFLICT (city, state) DO UPDATE
+  SET lat = EXCLUDED.lat, lon = EXCLUDED.lon, population = EXCLUDED.population;
+-- loads that existed before the gazetteer (or named a city it lacked); the UPDATE OF
+-- origin, destination fires trg_loads_geocode
+UPDATE loads SET origin = origin, destination = destination
+WHERE origin_lat IS NULL OR destination_lat IS NULL;
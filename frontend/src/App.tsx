@@ -51,10 +51,10 @@ export default function App() {
   const [resp, setResp] = useState<WebhookResponse>(seedResp);
   const [verifyResp, setVerifyResp] = useState<VerifyResponse | null>(null);
 
-  // polling control
+  // result push (SSE) control
   const [_jobId, setJobId] = useState<string | null>(null);
   const [loadingLoads, setLoadingLoads] = useState(false);
-  const pollRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const streamRef = useRef<EventSource | null>(null);
 
 
   // refs for scroll
@@ -88,42 +88,68 @@ export default function App() {
   };
 
   const stopPolling = () => {
-    if (pollRef.current) {
-      clearInterval(pollRef.current);
-      pollRef.current = null;
+    if (streamRef.current) {
+      streamRef.current.close();
+      streamRef.current = null;
     }
   };
 
-  const pollResult = (id: string) => {
-    stopPolling(); // clear any previous pollers
-    pollRef.current = setInterval(async () => {
-      try {
-        const r = await fetch(`/result/${id}`, {
+  const handleResult = (data: ResultResponse) => {
+    if (data.status === "done") {
+      stopPolling();
+      setResp({
+        ok: true,
+        echo: data.echo,
+        suggested_loads: data.suggested_loads ?? [],
+      });
+      setLoadingLoads(false);
+      return true;
+    }
+
+    if (data.status === "error") {
+      stopPolling();
+      setLoadingLoads(false);
+      alert("Error processing request");
+      return true;
+    }
+    return false;
+  };
+
+  // fallback when EventSource isn't available: long-poll, the server holds each request until the job finishes
+  const longPollResult = async (id: string) => {
+    try {
+      for (;;) {
+        const r = await fetch(`/result/${id}/wait?timeout=25`, {
           headers: { Authorization: `Bearer ${token}` },
         });
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
         const data: ResultResponse = await r.json();
+        if (handleResult(data)) return;
+      }
+    } catch (e) {
+      setLoadingLoads(false);
+      alert("Polling error");
+    }
+  };
 
-        if (data.status === "done") {
-          stopPolling();
-          setResp({
-            ok: true,
-            echo: data.echo,
-            suggested_loads: data.suggested_loads ?? [],
-          });
-          setLoadingLoads(false);
-        }
-
-        if (data.status === "error") {
-          stopPolling();
-          setLoadingLoads(false);
-          alert("Error processing request");
-        }
-      } catch (e) {
+  const pollResult = (id: string) => {
+    stopPolling(); // close any previous stream
+    if (typeof EventSource === "undefined") {
+      longPollResult(id);
+      return;
+    }
+    const es = new EventSource(`/result/${id}/stream?token=${encodeURIComponent(token)}`);
+    streamRef.current = es;
+    es.onmessage = (ev) => {
+      handleResult(JSON.parse(ev.data) as ResultResponse);
+    };
+    es.onerror = () => {
+      // stream dropped before a result arrived: switch to long-poll
+      if (streamRef.current === es) {
         stopPolling();
-        setLoadingLoads(false);
-        alert("Polling error");
+        longPollResult(id);
       }
-    }, 2000); // poll every 2 seconds
+    };
   };
 
   const send = async () => {
@@ -154,7 +180,7 @@ export default function App() {
         setStep(3);
         setTimeout(() => scrollTo(loadsRef), 300);
 
-        // begin polling
+        // wait for the pushed result
         pollResult(data.job_id);
       } else {
         setLoadingLoads(false);
@@ -80,7 +80,6 @@ export default function NegotiationChat({
   // Kick off negotiation
   const send = async () => {
     setSending(true);
-    setPollForNegotiationResult(true);
     setRound(curRound + 1);
 
     // append user message locally
@@ -117,6 +116,8 @@ export default function NegotiationChat({
       console.log("data" + JSON.stringify(data));
       if (data.session_id) {
         setSessionId(data.session_id);
+        // open the result stream only once the round is registered as pending
+        setPollForNegotiationResult(true);
       } else {
         setHistory((h) => [...h, { role: "assistant", text: "No session_id returned." }]);
       }
@@ -130,44 +131,37 @@ export default function NegotiationChat({
     }
   };
 
-  // Poll for result
+  // Wait for the pushed result (SSE) instead of polling
   useEffect(() => {
-    if (!sessionId) return;
+    if (!sessionId || !pollForNegotiationResult) return;
 
-    const interval = setInterval(async () => {
-      try {
-        const r = await fetch(`/negotiate/result/${sessionId}`);
-        const data = await r.json();
-
-        console.log("result is " + JSON.stringify(data, null, 2));
-        if (pollForNegotiationResult) {
-          if (data.ok && data.status === "complete") {
-            if (data.result) {
-              const result: NegotiateResponse = data.result;
-              setLastResp(result);
-              setHistory((h) => [
-                ...h,
-                {
-                  role: "assistant",
-                  text: `AI offers $${result.ai_negotiated_price}. Reason: ${result.ai_negotiation_reason}`,
-                },
-              ]);
-            }
-
-            if (data.status !== "pending") {
-              setPollForNegotiationResult(false);
-              clearInterval(interval); // stop polling if complete
-            }
-          }
+    const es = new EventSource(`/negotiate/result/${sessionId}/stream`);
+    es.onmessage = (ev) => {
+      const data = JSON.parse(ev.data);
+      console.log("result is " + JSON.stringify(data, null, 2));
+      if (data.ok && data.status === "complete") {
+        if (data.result) {
+          const result: NegotiateResponse = data.result;
+          setLastResp(result);
+          setHistory((h) => [
+            ...h,
+            {
+              role: "assistant",
+              text: `AI offers $${result.ai_negotiated_price}. Reason: ${result.ai_negotiation_reason}`,
+            },
+          ]);
         }
-
-      } catch (err) {
-        console.error("Polling error:", err);
+        setPollForNegotiationResult(false);
+        es.close();
       }
-    }, 3000);
+    };
+    es.onerror = (err) => {
+      // EventSource reconnects on its own; just log
+      console.error("Result stream error:", err);
+    };
 
-    return () => clearInterval(interval);
-  }, [pollForNegotiationResult]);
+    return () => es.close();
+  }, [sessionId, pollForNegotiationResult]);
 
   const field = (label: string, node: JSX.Element) => (
     <label style={{ display: "grid", gap: 6, fontSize: 13 }}>
@@ -20,6 +20,7 @@ export default defineConfig({
       "/api": "http://localhost:8000",
       "/dashboard": "http://localhost:8000",
       "/negotiations_dashboard": "http://localhost:8000",
+      "/ws": { target: "ws://localhost:8000", ws: true },
     },
   },
 });
\ No newline at end of file
@@ -0,0 +1,44 @@
+# gunicorn.conf.py -- multi-process serving profile (pip extra "serve")
+#
+#     uv run gunicorn src.webhook_api:app
+#
+# One uvicorn worker per core the process may run on (WEB_CONCURRENCY overrides).
+# The app is imported once in the master and forked; pools, HTTP clients, caches
+# and background tasks are opened per worker by the FastAPI lifespan, and each
+# worker reports ready on GET /health only after its warmup ran (src.warmup).
+import os
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0")) or len(os.sched_getaffinity(0))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = WEB_CONCURRENCY
+worker_class = "uvicorn_worker.UvicornWorker"
+# preload imports the app (numpy, codecs, SQL builders) once; workers share those pages
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))                    # warmup must fit in it
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))  # drain dispatcher / buffers
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+
+# Sessions, jobs and pub/sub live in process memory with STATE_BACKEND=memory, so a
+# job started on one worker would be invisible to a poll landing on another. More
+# than one worker needs the shared Postgres backend; it is read at import, hence here.
+if workers > 1:
+    if os.getenv("STATE_BACKEND", "postgres") != "postgres" or os.getenv("PUBSUB_BACKEND", "postgres") != "postgres":
+        raise SystemExit("[gunicorn] STATE_BACKEND/PUBSUB_BACKEND=memory needs WEB_CONCURRENCY=1")
+    os.environ.setdefault("STATE_BACKEND", "postgres")
+
+
+def when_ready(server):
+    print(f"[gunicorn] {workers} x {worker_class} on {bind} (preload={preload_app})")
+
+
+def post_worker_init(worker):
+    print(f"[gunicorn] worker pid={worker.pid} booted")
+
+
+def worker_exit(server, worker):
+    print(f"[gunicorn] worker pid={worker.pid} exited")
@@ -1,40 +1,171 @@
 import json
-import os, time, psycopg
-from typing import Any, Dict, Optional
+import os
+from typing import Any, Dict, List, Optional
+
+from .batch_writer import BatchWriter
+from .db_pool import pooled_aconn, pooled_conn
+from .rollups import query_rollups
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+EVENT_COLS = ("source", "name", "status", "duration_ms", "route", "user_id", "agent", "payload")
+
+# buffered event pipeline (see start_event_buffer / stop_event_buffer)
+EVENTS_BUFFER_MAX = int(os.getenv("EVENTS_BUFFER_MAX", "10000"))
+EVENTS_BATCH_SIZE = int(os.getenv("EVENTS_BATCH_SIZE", "500"))
+EVENTS_FLUSH_INTERVAL = float(os.getenv("EVENTS_FLUSH_INTERVAL", "1.0"))
+EVENTS_DROP_POLICY = os.getenv("EVENTS_DROP_POLICY", "drop_oldest")
+
+
+async def _copy_events(rows: List[tuple]) -> None:
+    async with pooled_aconn() as conn, conn.cursor() as cur:
+        async with cur.copy(f"COPY events ({', '.join(EVENT_COLS)}) FROM STDIN") as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+EVENT_BUFFER = BatchWriter(
+    "analytics",
+    _copy_events,
+    max_size=EVENTS_BUFFER_MAX,
+    batch_size=EVENTS_BATCH_SIZE,
+    flush_interval=EVENTS_FLUSH_INTERVAL,
+    policy=EVENTS_DROP_POLICY,
+)
+
+
+async def start_event_buffer() -> None:
+    if DATABASE_URL:
+        await EVENT_BUFFER.start()
+
+
+async def stop_event_buffer() -> None:
+    await EVENT_BUFFER.stop()
+
+
+def _event_row(source, name, status, duration_ms, route, user_id, agent, payload) -> tuple:
+    return (
+        source,
+        name,
+        status,
+        int(duration_ms) if duration_ms is not None else None,  # force integer or NULL
+        route,
+        user_id,
+        agent,
+        json.dumps(payload) if payload is not None else None
+    )
+
+
 def log_event(*, source: str, name: str, status: Optional[str] = None,
               duration_ms: Optional[int] = None, route: Optional[str] = None,
               user_id: Optional[str] = None, agent: Optional[str] = None,
               payload: Optional[Dict[str, Any]] = None) -> None:
-    print(f"Logging events wow")
     if not DATABASE_URL:
         return
+    row = _event_row(source, name, status, duration_ms, route, user_id, agent, payload)
+    if EVENT_BUFFER.running:
+        # request path only pays for an append; the buffer task does the COPY
+        EVENT_BUFFER.put(row)
+        return
+    # no running app (scripts, migrations): write straight through
     try:
-        with psycopg.connect(DATABASE_URL) as conn:
+        with pooled_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO events (source, name, status, duration_ms, route, user_id, agent, payload)
+                cur.execute(f"""
+                    INSERT INTO events ({', '.join(EVENT_COLS)})
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    source,
-                    name,
-                    status,
-                    int(duration_ms) if duration_ms is not None else None,  # force integer or NULL
-                    route,
-                    user_id,
-                    agent,
-                    json.dumps(payload) if payload is not None else None
-                ))
+                """, row)
             conn.commit()
     except Exception as e:
         # don't crash the request path if analytics fails
         print("[analytics] log_event error:", e)
 
-class Timer:
-    def __enter__(self):
-        self.t0 = time.perf_counter()
-        return self
-    def __exit__(self, exc_type, exc, tb):
-        self.ms = int((time.perf_counter() - self.t0) * 1000)
+
+async def alog_event(*, source: str, name: str, status: Optional[str] = None,
+                     duration_ms: Optional[int] = None, route: Optional[str] = None,
+                     user_id: Optional[str] = None, agent: Optional[str] = None,
+                     payload: Optional[Dict[str, Any]] = None) -> None:
+    """Async log_event; honours EVENTS_DROP_POLICY=block by waiting for a flush when full."""
+    if not DATABASE_URL:
+        return
+    row = _event_row(source, name, status, duration_ms, route, user_id, agent, payload)
+    if EVENT_BUFFER.running:
+        await EVENT_BUFFER.aput(row)
+    else:
+        log_event(source=source, name=name, status=status, duration_ms=duration_ms,
+                  route=route, user_id=user_id, agent=agent, payload=payload)
+
+
+# ---- dashboard aggregates (GROUP BY in Postgres; only the summary rows come back) ----
+
+# every minute in the window, including empty ones; read from the trigger-maintained
+# rollups so the cost doesn't grow with event volume
+EVENTS_PER_MINUTE_SQL = """
+    SELECT m.minute,
+           coalesce(r.events, 0) AS events,
+           coalesce(r.errors, 0) AS errors
+    FROM generate_series(date_trunc('minute', NOW()) - make_interval(mins => %s - 1),
+                         date_trunc('minute', NOW()), INTERVAL '1 minute') AS m(minute)
+    LEFT JOIN (
+        SELECT bucket, sum(events)::bigint AS events, sum(errors)::bigint AS errors
+        FROM event_rollups_minute
+        WHERE bucket >= date_trunc('minute', NOW()) - make_interval(mins => %s - 1)
+        GROUP BY bucket
+    ) r ON r.bucket = m.minute
+    ORDER BY m.minute DESC
+"""
+
+# outcome of each session from its latest turn: closed = the carrier accepted or the AI
+# settled on a price, lost = out of rounds without a price, open = still negotiating.
+# The ROLLUP row (day IS NULL) is the total over the window.
+NEGOTIATION_CLOSE_RATES_SQL = r"""
+    WITH last_turn AS (
+        SELECT DISTINCT ON (session_id)
+               session_id, ts, cur_round, max_rounds, user_requested_price, ai_negotiated_price
+        FROM negotiations
+        WHERE ts >= NOW() - make_interval(hours => %s)
+        ORDER BY session_id, ts DESC, id DESC
+    ), outcome AS (
+        SELECT date_trunc('day', ts) AS day, cur_round,
+               CASE
+                   WHEN upper(coalesce(user_requested_price, '')) = 'ACCEPTED' THEN 'closed'
+                   WHEN CASE WHEN ai_negotiated_price ~ '^\s*[0-9]+(\.[0-9]+)?\s*$'
+                             THEN ai_negotiated_price::numeric > 0 ELSE false END THEN 'closed'
+                   WHEN coalesce(cur_round, 0) >= coalesce(max_rounds, 3) THEN 'lost'
+                   ELSE 'open'
+               END AS outcome
+        FROM last_turn
+    )
+    SELECT day,
+           count(*) AS sessions,
+           count(*) FILTER (WHERE outcome = 'closed') AS closed,
+           count(*) FILTER (WHERE outcome = 'lost') AS lost,
+           count(*) FILTER (WHERE outcome = 'open') AS open,
+           avg(cur_round) FILTER (WHERE outcome = 'closed') AS avg_rounds_to_close
+    FROM outcome
+    GROUP BY ROLLUP (day)
+    ORDER BY day DESC NULLS FIRST
+"""
+
+
+async def _aggregate(sql: str, params: tuple) -> List[Dict[str, Any]]:
+    async with pooled_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in await cur.fetchall()]
+
+
+async def latency_by_route(hours: int = 24, limit: int = 50) -> List[Dict[str, Any]]:
+    """p50/p95 duration_ms (histogram estimates), event and error counts per (route, name)."""
+    return await query_rollups(hours, by=("route", "name"), limit=limit)
+
+
+async def events_per_minute(minutes: int = 60) -> List[Dict[str, Any]]:
+    """Event and error counts for each of the last `minutes` minutes, newest first."""
+    return await _aggregate(EVENTS_PER_MINUTE_SQL, (minutes, minutes))
+
+
+async def negotiation_close_rates(hours: int = 24 * 7) -> List[Dict[str, Any]]:
+    """Per-day session outcomes (closed / lost / open), total row first."""
+    return await _aggregate(NEGOTIATION_CLOSE_RATES_SQL, (hours,))
+
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+DROP_OLDEST = "drop_oldest"    # evict the oldest queued row to make room
+DROP_NEWEST = "drop_newest"    # reject the incoming row
+BLOCK = "block"                # async callers wait for a flush (sync callers fall back to drop_newest)
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class BatchWriter:
+    """
+    Bounded in-process buffer drained by a background task.
+
+    Rows are flushed through `flush_fn(rows)` whenever `batch_size` rows are queued
+    or every `flush_interval` seconds, whichever comes first. `put()` never touches
+    the DB, so request handlers only pay for a deque append.
+
+    With `requeue_failed=True` a batch whose flush raised goes back to the front of
+    the queue and is retried on the next tick instead of being dropped, so
+    `flush_fn` must be safe to repeat.
+    """
+
+    def __init__(self, name: str, flush_fn: Callable[[List[Any]], Awaitable[None]], *,
+                 max_size: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, policy: str = DROP_OLDEST,
+                 requeue_failed: bool = False):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown drop policy {policy!r}, expected one of {POLICIES}")
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.requeue_failed = requeue_failed
+
+        self._q: Deque[Any] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.requeued = 0
+        self.direct = 0
+        self.last_flush_ms: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _offer(self, row: Any) -> bool:
+        if len(self._q) >= self.max_size:
+            if self.policy != DROP_OLDEST:
+                return False
+            self._q.popleft()
+            self.dropped += 1
+        self._q.append(row)
+        self.enqueued += 1
+        if len(self._q) >= self.batch_size:
+            self._signal()
+        return True
+
+    def put(self, row: Any) -> bool:
+        """Queue a row without blocking. Returns False if the row was dropped."""
+        if self._offer(row):
+            return True
+        self.dropped += 1
+        return False
+
+    async def _wait_for_room(self) -> None:
+        if self.policy == BLOCK and len(self._q) >= self.max_size and self.running:
+            await self.flush()
+
+    async def aput(self, row: Any) -> bool:
+        """Like put(), but with the BLOCK policy waits for a flush instead of dropping."""
+        await self._wait_for_room()
+        return self.put(row)
+
+    async def awrite(self, row: Any) -> None:
+        """
+        Like aput(), but a row the queue still can't take (full, and the flush it
+        waited for failed and was requeued) is written inline through flush_fn.
+        Raises if that write fails too, so a caller never acknowledges a lost row.
+        """
+        await self._wait_for_room()
+        if self._offer(row):
+            return
+        try:
+            await self.flush_fn([row])
+        except Exception:
+            self.dropped += 1
+            raise
+        self.direct += 1
+
+    def _signal(self) -> None:
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            # called from a threadpool endpoint
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run(), name=f"batch-writer:{self.name}")
+
+    async def stop(self, retries: int = 3) -> None:
+        """
+        Stop the background task and flush whatever is still queued. With
+        requeue_failed, a failing final flush is retried `retries` more times.
+        """
+        if self._task is not None:
+            # let an in-flight flush finish instead of cancelling it halfway
+            assert self._flush_lock is not None
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        for attempt in range(1, retries + 1 if self.requeue_failed else 1):
+            if not self._q:
+                break
+            await asyncio.sleep(0.5 * attempt)
+            await self.flush()
+        if self._q:
+            print(f"[{self.name}] {len(self._q)} rows still queued at shutdown")
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._q:
+                n = min(self.batch_size, len(self._q))
+                batch = [self._q.popleft() for _ in range(n)]
+                t0 = time.perf_counter()
+                try:
+                    await self.flush_fn(batch)
+                except Exception as e:
+                    if self.requeue_failed:
+                        # keep order; the next tick tries again
+                        self._q.extendleft(reversed(batch))
+                        self.requeued += len(batch)
+                        print(f"[{self.name}] flush of {len(batch)} rows failed, will retry:", e)
+                        return
+                    # never let the writer die; the batch is counted and dropped
+                    self.failed += len(batch)
+                    print(f"[{self.name}] flush of {len(batch)} rows failed:", e)
+                else:
+                    self.flushed += len(batch)
+                finally:
+                    self.last_flush_ms = int((time.perf_counter() - t0) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": len(self._q),
+            "max_size": self.max_size,
+            "policy": self.policy,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "direct": self.direct,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,147 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from .cache import MISSING, SingleFlight, TTLCache
+from .db_pool import pooled_aconn
+from .http_clients import FMCSA, request as http_request
+
+FMCSA_API_KEY = os.environ.get("FMCSA_API_KEY")
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+CARRIER_CACHE_TTL = float(os.getenv("CARRIER_CACHE_TTL", "3600"))              # seconds, found carriers
+CARRIER_CACHE_NEGATIVE_TTL = float(os.getenv("CARRIER_CACHE_NEGATIVE_TTL", "300"))  # unknown MC numbers
+CARRIER_CACHE_MAX = int(os.getenv("CARRIER_CACHE_MAX", "5000"))
+# second tier in Postgres (db/init/009_carrier_cache.sql), shared across machines and restarts
+CARRIER_CACHE_PG = os.getenv("CARRIER_CACHE_PG", "false").lower() in ("1", "true", "yes")
+
+_cache = TTLCache(max_size=CARRIER_CACHE_MAX, ttl=CARRIER_CACHE_TTL)
+_flight = SingleFlight()
+COUNTERS: Dict[str, int] = {
+    "hits": 0,
+    "negative_hits": 0,
+    "pg_hits": 0,
+    "misses": 0,
+    "upstream_calls": 0,
+    "pg_errors": 0,
+}
+
+
+def _parse_carrier(mc_key: str, raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    content = (raw or {}).get("content") or {}
+    carrier = content.get("carrier") or {}
+
+    status_code = (carrier.get("statusCode") or "").upper()
+    allowed = str(carrier.get("allowedToOperate") or "").upper() == "Y"
+    eligible = status_code == "A" and allowed
+
+    return {
+        "mc": mc_key,
+        "legal_name": carrier.get("legalName"),
+        "dba_name": carrier.get("dbaName"),
+        "status": status_code,
+        "eligible": eligible,
+        "city": carrier.get("phyCity"),
+        "state": carrier.get("phyState"),
+    }
+
+
+def _is_negative(result: Dict[str, Any]) -> bool:
+    # FMCSA had no carrier record for this MC
+    return not result.get("legal_name") and not result.get("status")
+
+
+async def _pg_get(mc_key: str) -> Optional[Dict[str, Any]]:
+    try:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.execute(
+                "SELECT result FROM carrier_cache WHERE mc = %s AND expires_at > NOW()",
+                (mc_key,),
+            )
+            row = await cur.fetchone()
+        return row[0] if row else None
+    except Exception as e:
+        COUNTERS["pg_errors"] += 1
+        print("[carriers] cache read error:", e)
+        return None
+
+
+async def _pg_put(mc_key: str, result: Dict[str, Any], ttl: float) -> None:
+    try:
+        async with pooled_aconn() as conn:
+            await conn.execute("""
+                INSERT INTO carrier_cache (mc, result, expires_at)
+                VALUES (%s, %s, NOW() + make_interval(secs => %s))
+                ON CONFLICT (mc) DO UPDATE
+                SET result = EXCLUDED.result, expires_at = EXCLUDED.expires_at
+            """, (mc_key, json.dumps(result), ttl))
+    except Exception as e:
+        COUNTERS["pg_errors"] += 1
+        print("[carriers] cache write error:", e)
+
+
+async def _load(mc_key: str) -> Dict[str, Any]:
+    use_pg = CARRIER_CACHE_PG and bool(DATABASE_URL)
+    if use_pg:
+        cached = await _pg_get(mc_key)
+        if cached is not None:
+            COUNTERS["pg_hits"] += 1
+            ttl = CARRIER_CACHE_NEGATIVE_TTL if _is_negative(cached) else CARRIER_CACHE_TTL
+            _cache.set(mc_key, cached, ttl)
+            return cached
+
+    COUNTERS["upstream_calls"] += 1
+    r = await http_request(FMCSA, "GET", f"/qc/services/carriers/{mc_key}",
+                           params={"webKey": FMCSA_API_KEY})
+    r.raise_for_status()  # upstream errors are never cached
+    result = _parse_carrier(mc_key, r.json())
+
+    ttl = CARRIER_CACHE_NEGATIVE_TTL if _is_negative(result) else CARRIER_CACHE_TTL
+    _cache.set(mc_key, result, ttl)
+    if use_pg:
+        await _pg_put(mc_key, result, ttl)
+    return result
+
+
+async def lookup_carrier(mc_key: str) -> Dict[str, Any]:
+    """
+    FMCSA carrier eligibility for an MC number: in-process LRU/TTL cache, then the
+    optional Postgres tier, then the QC API. Concurrent misses for the same MC share
+    a single upstream call.
+    """
+    mc_key = mc_key.strip()
+    cached = _cache.get(mc_key)
+    if cached is not MISSING:
+        COUNTERS["negative_hits" if _is_negative(cached) else "hits"] += 1
+        return cached
+    COUNTERS["misses"] += 1
+    return await _flight.do(mc_key, lambda: _load(mc_key))
+
+
+async def warm_cache(limit: int = CARRIER_CACHE_MAX) -> int:
+    """Fill the in-process cache from the unexpired Postgres tier (startup warmup)."""
+    if not (CARRIER_CACHE_PG and DATABASE_URL):
+        return 0
+    async with pooled_aconn() as conn, conn.cursor() as cur:
+        await cur.execute("""
+            SELECT mc, result, EXTRACT(EPOCH FROM expires_at - NOW())::float8
+            FROM carrier_cache WHERE expires_at > NOW()
+            ORDER BY expires_at DESC LIMIT %s
+        """, (limit,))
+        rows = await cur.fetchall()
+    for mc_key, result, ttl in reversed(rows):    # soonest-expiring first, so the LRU keeps the rest
+        _cache.set(mc_key, result, ttl)
+    return len(rows)
+
+
+def cache_stats() -> Dict[str, Any]:
+    lookups = COUNTERS["hits"] + COUNTERS["negative_hits"] + COUNTERS["misses"]
+    return {
+        **COUNTERS,
+        "coalesced": _flight.coalesced,
+        "size": len(_cache),
+        "max_size": CARRIER_CACHE_MAX,
+        "evictions": _cache.evictions,
+        "hit_rate": round((COUNTERS["hits"] + COUNTERS["negative_hits"]) / lookups, 4) if lookups else None,
+        "pg_tier": CARRIER_CACHE_PG,
+    }
@@ -1,67 +1,426 @@
-from contextlib import contextmanager
+import asyncio
+import base64
+from collections import deque
+from contextlib import aclosing, asynccontextmanager, contextmanager
+import datetime
+from decimal import Decimal
 import json
+import math
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
 import psycopg
 
+from .batch_writer import BLOCK, BatchWriter
+from .db_pool import pooled_aconn, pooled_conn
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# in-memory copy of loads (load_catalog.LoadCatalog), registered once it is warm;
+# the read helpers below answer from it instead of Postgres when set
+_hot_catalog: Optional[Any] = None
+
+def set_hot_catalog(catalog: Optional[Any]) -> None:
+    global _hot_catalog
+    _hot_catalog = catalog
+
+def get_hot_catalog() -> Optional[Any]:
+    return _hot_catalog
+
 @contextmanager
 def get_conn():
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL not set")
-    with psycopg.connect(DATABASE_URL) as conn:
+    with pooled_conn() as conn:
         yield conn
 
-def fetch_recent_loads(limit: int = 10) -> list[dict[str, Any]]:
-    sql = """
+@asynccontextmanager
+async def get_aconn():
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL not set")
+    async with pooled_aconn() as conn:
+        yield conn
+
+RECENT_LOADS_SQL = """
         SELECT load_id, origin, destination, pickup_datetime, delivery_datetime,
              equipment_type, loadboard_rate, notes, weight, commodity_type,
              num_of_pieces, miles, dimensions
       FROM loads
-      ORDER BY pickup_datetime DESC
+      ORDER BY pickup_datetime DESC, load_id COLLATE "C" DESC
       LIMIT %s
 """
-    cols = ["load_id","origin","destination","pickup_datetime","delivery_datetime",
-            "equipment_type","loadboard_rate","notes","weight","commodity_type",
-            "num_of_pieces","miles","dimensions"]
-    
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql, (limit,))
-        rows = cur.fetchall()
+RECENT_LOADS_COLS = ["load_id","origin","destination","pickup_datetime","delivery_datetime",
+                     "equipment_type","loadboard_rate","notes","weight","commodity_type",
+                     "num_of_pieces","miles","dimensions"]
+
+def _recent_rows_to_dicts(rows: Sequence[Sequence[Any]]) -> list[dict[str, Any]]:
     out = []
     for r in rows:
-        item = {c: v for c, v in zip(cols, r)}
+        item = {c: v for c, v in zip(RECENT_LOADS_COLS, r)}
         if item["pickup_datetime"] : item["pickup_datetime"]   = item["pickup_datetime"].isoformat()
         if item["delivery_datetime"]: item["delivery_datetime"] = item["delivery_datetime"].isoformat()
         out.append(item)
     return out
 
-def find_closest_by_weight(target_kg: int, limit: int = 5) -> list[dict[str, Any]]:
-    sql = """
+def fetch_recent_loads(limit: int = 10) -> list[dict[str, Any]]:
+    if _hot_catalog is not None:
+        return _hot_catalog.fetch_recent_loads(limit)
+    with get_conn() as conn, conn.cursor() as cur:
+        cur.execute(RECENT_LOADS_SQL, (limit,))
+        rows = cur.fetchall()
+    return _recent_rows_to_dicts(rows)
+
+async def afetch_recent_loads(limit: int = 10) -> list[dict[str, Any]]:
+    if _hot_catalog is not None:
+        return _hot_catalog.fetch_recent_loads(limit)
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(RECENT_LOADS_SQL, (limit,))
+        rows = await cur.fetchall()
+    return _recent_rows_to_dicts(rows)
+
+LOAD_BY_ID_SQL = f"SELECT {', '.join(RECENT_LOADS_COLS)} FROM loads WHERE load_id = %s"
+
+async def afetch_load(load_id: str) -> Optional[dict[str, Any]]:
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(LOAD_BY_ID_SQL, (load_id,))
+        rows = await cur.fetchall()
+    return _recent_rows_to_dicts(rows)[0] if rows else None
+
+# ---- keyset pagination / streaming ----
+# newest first on a unique (timestamp, id) key, served by the indexes in
+# 015_keyset_indexes.sql; load_id compares bytewise so the in-memory catalog
+# (load_catalog) breaks pickup ties the same way Postgres does
+LOADS_KEY = ["pickup_datetime", 'load_id COLLATE "C"']
+EVENTS_KEY = ["ts", "id"]
+NEGOTIATIONS_KEY = ["ts", "id"]
+STREAM_ITERSIZE = int(os.getenv("STREAM_ITERSIZE", "500"))   # rows per server-side cursor fetch
+
+def encode_cursor(ts: Any, key: Any) -> str:
+    """Opaque page token for the row a page ended on."""
+    if isinstance(ts, (datetime.datetime, datetime.date)):
+        ts = ts.isoformat()
+    raw = json.dumps([ts, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str) -> tuple[datetime.datetime, Any]:
+    """Inverse of encode_cursor; raises ValueError for anything malformed."""
+    try:
+        ts, key = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if isinstance(key, bool) or not isinstance(key, (str, int)):
+            raise TypeError(f"cursor key must be a string or an integer, got {key!r}")
+        return datetime.datetime.fromisoformat(ts), key
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {token!r}") from e
+
+def keyset_sql(select_sql: str, key: Sequence[str], after: Optional[Sequence[Any]] = None,
+               limit: Optional[int] = None) -> tuple[str, List[Any]]:
+    """`select_sql` (no WHERE/ORDER BY) as a newest-first page starting after the `after` key."""
+    params: List[Any] = []
+    sql = select_sql
+    if after is not None:
+        sql += f" WHERE ({', '.join(key)}) < ({', '.join(['%s'] * len(key))})"
+        params += list(after)
+    sql += " ORDER BY " + ", ".join(f"{k} DESC" for k in key)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+async def astream_rows(sql: str, params: Sequence[Any] = (), itersize: int = STREAM_ITERSIZE) -> AsyncIterator[tuple]:
+    """
+    Yield rows through a server-side cursor, `itersize` at a time, so memory stays
+    flat however many rows match. The pooled connection is held until the consumer
+    finishes or closes the generator.
+    """
+    async with get_aconn() as conn, conn.cursor(name="stream_rows") as cur:
+        cur.itersize = itersize
+        await cur.execute(sql, params)
+        async for row in cur:
+            yield row
+
+LOADS_PAGE_SELECT = f"SELECT {', '.join(RECENT_LOADS_COLS)} FROM loads"
+
+def _loads_page(rows: List[Dict[str, Any]], limit: int) -> tuple[List[Dict[str, Any]], Optional[str]]:
+    # rows were fetched with limit + 1: the extra one only says whether there's a next page
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["pickup_datetime"], rows[-1]["load_id"])
+
+async def afetch_loads_page(limit: int = 10, cursor: Optional[str] = None) -> tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of loads, newest pickup first, plus the token for the next page (None at the end).
+    The first page goes through fetch_recent_loads (and so the hot catalog when enabled).
+    """
+    if cursor is None:
+        return _loads_page(await afetch_recent_loads(limit + 1), limit)
+    sql, params = keyset_sql(LOADS_PAGE_SELECT, LOADS_KEY, decode_cursor(cursor), limit + 1)
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(sql, params)
+        rows = await cur.fetchall()
+    return _loads_page(_recent_rows_to_dicts(rows), limit)
+
+async def astream_loads(cursor: Optional[str] = None, limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Every load (or `limit` of them) after `cursor`, newest first, streamed from a server-side cursor."""
+    sql, params = keyset_sql(LOADS_PAGE_SELECT, LOADS_KEY, decode_cursor(cursor) if cursor else None, limit)
+    async with aclosing(astream_rows(sql, params)) as rows:
+        async for row in rows:
+            yield _recent_rows_to_dicts([row])[0]
+
+# two-sided probe on idx_loads_weight (013_loads_knn.sql): k rows at or above the
+# target plus k rows below it, so the final sort only ever sees 2k candidates; equal
+# distances go by load_id bytewise on both sides, the order load_catalog answers in
+CLOSEST_BY_WEIGHT_SQL = """
       SELECT load_id, origin, destination, weight, equipment_type, loadboard_rate
-      FROM loads
-      WHERE weight IS NOT NULL
-      ORDER BY ABS(weight - %s)
-      LIMIT %s
+      FROM (
+        (SELECT load_id, origin, destination, weight, equipment_type, loadboard_rate
+         FROM loads WHERE weight >= %(x)s ORDER BY weight ASC, load_id COLLATE "C" LIMIT %(k)s)
+        UNION ALL
+        (SELECT load_id, origin, destination, weight, equipment_type, loadboard_rate
+         FROM loads WHERE weight < %(x)s ORDER BY weight DESC, load_id COLLATE "C" LIMIT %(k)s)
+      ) c
+      ORDER BY ABS(weight - %(x)s), load_id COLLATE "C"
+      LIMIT %(k)s
     """
-    cols = ["load_id","origin","destination","weight","equipment_type","loadboard_rate"]
+CLOSEST_BY_WEIGHT_COLS = ["load_id","origin","destination","weight","equipment_type","loadboard_rate"]
+
+def find_closest_by_weight(target_kg: int, limit: int = 5) -> list[dict[str, Any]]:
+    if _hot_catalog is not None:
+        return _hot_catalog.find_closest_by_weight(target_kg, limit)
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql, (target_kg, limit))
+        cur.execute(CLOSEST_BY_WEIGHT_SQL, {"x": target_kg, "k": limit})
         rows = cur.fetchall()
-    return [{c: v for c, v in zip(cols, r)} for r in rows]
+    return [{c: v for c, v in zip(CLOSEST_BY_WEIGHT_COLS, r)} for r in rows]
 
+async def afind_closest_by_weight(target_kg: int, limit: int = 5) -> list[dict[str, Any]]:
+    if _hot_catalog is not None:
+        return _hot_catalog.find_closest_by_weight(target_kg, limit)
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(CLOSEST_BY_WEIGHT_SQL, {"x": target_kg, "k": limit})
+        rows = await cur.fetchall()
+    return [{c: v for c, v in zip(CLOSEST_BY_WEIGHT_COLS, r)} for r in rows]
 
-def _connect():
-    if not DATABASE_URL:
-        raise RuntimeError("DATABASE_URL not set")
-    return psycopg.connect(DATABASE_URL)  # your IPv4 fix can stay here if needed
+# multi-attribute nearness: attribute -> loads column
+NEAREST_COLUMNS = {"weight": "weight", "miles": "miles", "rate": "loadboard_rate"}
+
+def _parse_knn_env(name: str, default: str) -> Dict[str, float]:
+    # "weight=1,miles=0.5,rate=2"
+    out = {}
+    for part in os.getenv(name, default).split(","):
+        key, _, val = part.partition("=")
+        if key.strip() in NEAREST_COLUMNS and val.strip():
+            out[key.strip()] = float(val)
+    return out
+
+# how much each attribute counts, and what difference counts as "1 unit" of distance
+NEAREST_WEIGHTS = _parse_knn_env("NEAREST_WEIGHTS", "weight=1,miles=1,rate=1")
+NEAREST_SCALES = _parse_knn_env("NEAREST_SCALES", "weight=1000,miles=100,rate=250")
+NEAREST_START_RADIUS = float(os.getenv("NEAREST_START_RADIUS", "0.25"))
+NEAREST_MAX_ROUNDS = int(os.getenv("NEAREST_MAX_ROUNDS", "8"))
+NEAREST_SELECT = ("load_id, origin, destination, pickup_datetime, equipment_type, "
+                  "loadboard_rate, weight, miles")
+
+def _nearest_terms(target: Dict[str, Optional[float]],
+                   weights: Optional[Dict[str, float]]) -> List[tuple]:
+    """[(column, value, weight, scale)] for the attributes that were given and count."""
+    weights = {**NEAREST_WEIGHTS, **(weights or {})}
+    terms = []
+    for attr, col in NEAREST_COLUMNS.items():
+        value, w = target.get(attr), weights.get(attr, 0.0)
+        if value is not None and w > 0:
+            terms.append((col, float(value), w, NEAREST_SCALES.get(attr, 1.0)))
+    return terms
+
+def _col_bound(col: str, value: float, rnd) -> Any:
+    # bind in the column's own type; a float param casts the column and hides the index
+    if col == "loadboard_rate":
+        return Decimal(rnd(value * 100)) / 100
+    return rnd(value)
+
+def _build_nearest_sql(terms: List[tuple], radius: Optional[float], limit: int) -> tuple[str, List[Any]]:
+    """
+    Weighted L1 distance sum(w * |col - v| / scale). With a radius, only rows inside the
+    box |col - v| <= radius * scale / w are ranked: a range scan on idx_loads_knn with the
+    other columns checked inside the index.
+    """
+    dist, where = [], []
+    dist_params: List[Any] = []
+    where_params: List[Any] = []
+    for col, value, w, scale in terms:
+        dist.append(f"%s * ABS({col} - %s) / %s")
+        dist_params += [w, value, scale]
+        if radius is None:
+            where.append(f"{col} IS NOT NULL")
+        else:
+            span = radius * scale / w
+            where.append(f"{col} BETWEEN %s AND %s")
+            where_params += [_col_bound(col, value - span, math.ceil),
+                             _col_bound(col, value + span, math.floor)]
+    sql = f"""
+        SELECT
+            {NEAREST_SELECT}, ({" + ".join(dist)})::float8 AS distance
+        FROM loads
+        WHERE {" AND ".join(where)}
+        ORDER BY distance, load_id
+        LIMIT %s
+    """
+    return sql, dist_params + where_params + [limit]
+
+def _build_probe_sql(term: tuple, limit: int) -> tuple[str, List[Any]]:
+    """Single attribute: the same two-sided btree probe as find_closest_by_weight."""
+    col, value, w, scale = term
+    sql = f"""
+        SELECT *, (%s * ABS({col} - %s) / %s)::float8 AS distance
+        FROM (
+          (SELECT {NEAREST_SELECT} FROM loads WHERE {col} >= %s ORDER BY {col} ASC LIMIT %s)
+          UNION ALL
+          (SELECT {NEAREST_SELECT} FROM loads WHERE {col} < %s ORDER BY {col} DESC LIMIT %s)
+        ) c
+        ORDER BY distance, load_id
+        LIMIT %s
+    """
+    pivot = _col_bound(col, value, math.ceil)   # ">= pivot" and "< pivot" split the column exactly
+    return sql, [w, value, scale, pivot, limit, pivot, limit, limit]
+
+def _nearest_rounds(terms: List[tuple], limit: int):
+    if len(terms) == 1:
+        yield None, _build_probe_sql(terms[0], limit)
+        return
+    # radius doubles each round; the last round drops the box so k rows always come back
+    radius = NEAREST_START_RADIUS
+    for _ in range(NEAREST_MAX_ROUNDS):
+        yield radius, _build_nearest_sql(terms, radius, limit)
+        radius *= 2
+    yield None, _build_nearest_sql(terms, None, limit)
+
+def _nearest_done(rows: List[Dict[str, Any]], radius: Optional[float], limit: int) -> bool:
+    # anything outside the box is > radius away, so k rows within radius are exact
+    return radius is None or (len(rows) >= limit and rows[-1]["distance"] <= radius)
+
+def find_nearest_loads(
+    weight_kg: Optional[int] = None,
+    miles: Optional[int] = None,
+    rate: Optional[float] = None,
+    limit: int = 5,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    k nearest loads by weighted weight/miles/rate distance (NEAREST_WEIGHTS / NEAREST_SCALES,
+    overridable per call via `weights`). Searches a growing box around the target so each
+    round is an index range scan rather than a full sort of loads; a single attribute is
+    a two-sided btree probe. Rows carry `distance`.
+    """
+    terms = _nearest_terms({"weight": weight_kg, "miles": miles, "rate": rate}, weights)
+    if not terms:
+        return []
+    rows: List[Dict[str, Any]] = []
+    with get_conn() as conn, conn.cursor() as cur:
+        for radius, (sql, params) in _nearest_rounds(terms, limit):
+            cur.execute(sql, params)
+            rows = _rows_to_dicts(cur)
+            if _nearest_done(rows, radius, limit):
+                break
+    return rows
+
+async def afind_nearest_loads(
+    weight_kg: Optional[int] = None,
+    miles: Optional[int] = None,
+    rate: Optional[float] = None,
+    limit: int = 5,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of find_nearest_loads.
+    """
+    terms = _nearest_terms({"weight": weight_kg, "miles": miles, "rate": rate}, weights)
+    if not terms:
+        return []
+    rows: List[Dict[str, Any]] = []
+    async with get_aconn() as conn, conn.cursor() as cur:
+        for radius, (sql, params) in _nearest_rounds(terms, limit):
+            await cur.execute(sql, params)
+            rows = await _arows_to_dicts(cur)
+            if _nearest_done(rows, radius, limit):
+                break
+    return rows
 
 def _rows_to_dicts(cur) -> List[Dict[str, Any]]:
     cols = [d[0] for d in cur.description]
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
-def search_loads(
+async def _arows_to_dicts(cur) -> List[Dict[str, Any]]:
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, row)) for row in await cur.fetchall()]
+
+def normalize_place(place: str) -> tuple[str, Optional[str]]:
+    """
+    "San Jose, CA" -> ("san jose", "CA"); "oakland" -> ("oakland", None).
+    Mirrors the generated origin_city/origin_state columns (011_loads_normalized_city.sql).
+    """
+    city, _, state = place.partition(",")
+    return city.strip().lower(), (state.strip().upper() or None)
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _place_filter(prefix: str, place: str, fuzzy: bool = False) -> tuple[str, List[Any]]:
+    """
+    WHERE fragment on the normalized {prefix}_city/{prefix}_state columns.
+    "City, ST" matches the city exactly (state by prefix); a bare "City" matches by prefix.
+    Both are served by the text_pattern_ops btree; fuzzy=True adds trigram similarity (pg_trgm).
+    """
+    city, state = normalize_place(place)
+    if state:
+        sql = f"({prefix}_city = %s AND {prefix}_state LIKE %s)"
+        params: List[Any] = [city, _like_escape(state) + "%"]
+    else:
+        sql = f"{prefix}_city LIKE %s"
+        params = [_like_escape(city) + "%"]
+    if fuzzy:
+        sql = f"({sql} OR {prefix}_city %% %s)"
+        params.append(city)
+    return sql, params
+
+# radius searches scan every grid cell of their bounding box, ~radius^2 / 600 cells
+MAX_RADIUS_MILES = float(os.getenv("MAX_RADIUS_MILES", "500"))
+
+def check_radius(value: Any) -> Optional[float]:
+    """A request's *_radius_miles as a float (None when absent or 0); ValueError outside [0, MAX_RADIUS_MILES]."""
+    if value in (None, "", 0):
+        return None
+    try:
+        radius = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"radius must be a number of miles, got {value!r}")
+    if not 0 <= radius <= MAX_RADIUS_MILES:
+        raise ValueError(f"radius must be between 0 and {MAX_RADIUS_MILES:g} miles, got {value!r}")
+    return radius or None
+
+def _radius_filter(prefix: str, place: str, radius_miles: float) -> tuple[str, List[Any], str, List[Any]]:
+    """
+    WHERE fragment for loads whose {prefix} lies within `radius_miles` of the place
+    (geocoded through the cities gazetteer, 020_loads_geo.sql), and the SELECT
+    expression for that distance ({prefix}_deadhead_miles). The cell list comes from
+    idx_loads_{prefix}_cell; the exact distance is checked on the lat/lon it carries.
+    A place missing from the gazetteer matches nothing. The radius is capped at
+    MAX_RADIUS_MILES.
+    """
+    radius_miles = min(float(radius_miles), MAX_RADIUS_MILES)
+    center = "(SELECT geocode(%s))"
+    dist = f"geo_miles({prefix}_lat, {prefix}_lon, {center})"
+    where = f"{prefix}_cell = ANY(geo_cells({center}, %s)) AND {dist} <= %s"
+    select = f"round({dist}::numeric, 1) AS {prefix}_deadhead_miles"
+    return where, [place, radius_miles, place, radius_miles], select, [place]
+
+SEARCH_LOADS_COLS = ["load_id","origin","destination","pickup_datetime","delivery_datetime",
+                     "equipment_type","loadboard_rate","weight","commodity_type","num_of_pieces",
+                     "miles","dimensions"]
+MILES_TOLERANCE = 100
+
+def weight_tolerance(weight_kg: Optional[int]) -> int:
+    return max(100, int((weight_kg or 0) * 0.10))
+
+def _build_search_sql(
     origin: Optional[str] = None,
     destination: Optional[str] = None,
     weight_kg: Optional[int] = None,
@@ -69,26 +428,32 @@ def search_loads(
     rate_min: Optional[float] = None,
     rate_max: Optional[float] = None,
     limit: int = 10,
-):
-    """
-    Finds loads by exact/prefix origin/destination, weight/miles tolerance, and rate bounds.
-    Uses your existing columns. Returns at most `limit` rows ordered by soonest pickup, then best rate.
-    """
+    fuzzy: bool = False,
+    origin_radius_miles: Optional[float] = None,
+    destination_radius_miles: Optional[float] = None,
+) -> tuple[str, List[Any]]:
     # tolerances (tune as you like)
-    weight_tol = max(100, int((weight_kg or 0) * 0.10))
-    miles_tol  = 100 
+    weight_tol = weight_tolerance(weight_kg)
+    miles_tol  = MILES_TOLERANCE
 
     where = []
     params: List[Any] = []
+    cols = list(SEARCH_LOADS_COLS)
+    col_params: List[Any] = []
 
-    if origin:
-        # prefer exact match if user gives a full city, else allow prefix
-        where.append("(lower(origin) = lower(%s) OR origin ILIKE %s || '%%')")
-        params += [origin, origin]
-
-    if destination:
-        where.append("(lower(destination) = lower(%s) OR destination ILIKE %s || '%%')")
-        params += [destination, destination]
+    for prefix, place, radius in (("origin", origin, origin_radius_miles),
+                                  ("destination", destination, destination_radius_miles)):
+        if not place:
+            continue
+        if radius:
+            frag, frag_params, col, col_param = _radius_filter(prefix, place, float(radius))
+            cols.append(col)
+            col_params += col_param
+        else:
+            # exact city if user gives "City, ST", else prefix on the city
+            frag, frag_params = _place_filter(prefix, place, fuzzy)
+        where.append(frag)
+        params += frag_params
 
     if weight_kg:
         where.append("weight BETWEEN %s AND %s")
@@ -109,26 +474,75 @@ def search_loads(
     where_sql = " AND ".join(where) if where else "TRUE"
 
     sql = f"""
-        SELECT
-            load_id, origin, destination, pickup_datetime, delivery_datetime,
-            equipment_type, loadboard_rate, weight, commodity_type, num_of_pieces, miles, dimensions
+        SELECT {", ".join(cols)}
         FROM loads
         WHERE {where_sql}
         ORDER BY pickup_datetime ASC NULLS LAST, loadboard_rate DESC NULLS LAST
         LIMIT %s
     """
     params.append(limit)
+    return sql, col_params + params
 
+def search_loads(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    weight_kg: Optional[int] = None,
+    miles: Optional[int] = None,
+    rate_min: Optional[float] = None,
+    rate_max: Optional[float] = None,
+    limit: int = 10,
+    fuzzy: bool = False,
+    origin_radius_miles: Optional[float] = None,
+    destination_radius_miles: Optional[float] = None,
+):
+    """
+    Finds loads by exact/prefix origin/destination, weight/miles tolerance, and rate bounds.
+    City matching runs on the indexed normalized columns; fuzzy=True also accepts
+    trigram near-misses ("San Jos" / "Sna Jose"). origin_radius_miles /
+    destination_radius_miles instead match any load within that many miles of the
+    city and add origin_deadhead_miles / destination_deadhead_miles to each row.
+    Returns at most `limit` rows ordered by soonest pickup, then best rate.
+    """
+    if _hot_catalog is not None and not fuzzy and not origin_radius_miles and not destination_radius_miles:
+        return _hot_catalog.search_loads(origin, destination, weight_kg, miles, rate_min, rate_max, limit)
+    sql, params = _build_search_sql(origin, destination, weight_kg, miles, rate_min, rate_max, limit, fuzzy,
+                                    origin_radius_miles, destination_radius_miles)
     try:
-        with _connect() as conn, conn.cursor() as cur:
+        with get_conn() as conn, conn.cursor() as cur:
             cur.execute(sql, params)
             return _rows_to_dicts(cur)
     except Exception:
         # fail-soft so your webhook still responds
         return []
-    
-def insert_negotiation(entry: Dict[str, Any]) -> int:
-    sql = """
+
+async def asearch_loads(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    weight_kg: Optional[int] = None,
+    miles: Optional[int] = None,
+    rate_min: Optional[float] = None,
+    rate_max: Optional[float] = None,
+    limit: int = 10,
+    fuzzy: bool = False,
+    origin_radius_miles: Optional[float] = None,
+    destination_radius_miles: Optional[float] = None,
+):
+    """
+    Async variant of search_loads for the async handlers.
+    """
+    if _hot_catalog is not None and not fuzzy and not origin_radius_miles and not destination_radius_miles:
+        return _hot_catalog.search_loads(origin, destination, weight_kg, miles, rate_min, rate_max, limit)
+    sql, params = _build_search_sql(origin, destination, weight_kg, miles, rate_min, rate_max, limit, fuzzy,
+                                    origin_radius_miles, destination_radius_miles)
+    try:
+        async with get_aconn() as conn, conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return await _arows_to_dicts(cur)
+    except Exception:
+        # fail-soft so your webhook still responds
+        return []
+
+INSERT_NEGOTIATION_SQL = """
         INSERT INTO negotiations
         (session_id, load_id, miles, loadboard_rate,
          price, user_message, user_requested_price,
@@ -137,7 +551,9 @@ def insert_negotiation(entry: Dict[str, Any]) -> int:
         VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s, NOW(), %s)
         RETURNING id
     """
-    params = (
+
+def _negotiation_params(entry: Dict[str, Any]) -> tuple:
+    return (
         entry.get("session_id"),
         entry.get("load", {}).get("load_id"),
         entry.get("load", {}).get("miles"),
@@ -152,22 +568,120 @@ def insert_negotiation(entry: Dict[str, Any]) -> int:
         entry.get("history"),
         entry.get("sentiment"),
     )
+
+def insert_negotiation(entry: Dict[str, Any]) -> int:
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql, params)
+        cur.execute(INSERT_NEGOTIATION_SQL, _negotiation_params(entry))
         row = cur.fetchone()
-        while row is not None:
-            row_id = row[0]
-            return row_id
-    return -1  # should not reach here
-
-    
+    return row[0] if row is not None else -1
 
+# ---- write-behind negotiation log ----
+# ainsert_negotiation hands out an id from a block reserved on negotiations_id_seq and
+# queues the row; NEGOTIATION_BUFFER writes everything queued in one transaction per
+# flush window. A failed flush is retried (the insert is idempotent on (id, ts)), and
+# the lifespan drains the queue before the pool closes.
+NEGOTIATIONS_BUFFER_MAX = int(os.getenv("NEGOTIATIONS_BUFFER_MAX", "5000"))
+NEGOTIATIONS_BATCH_SIZE = int(os.getenv("NEGOTIATIONS_BATCH_SIZE", "200"))
+NEGOTIATIONS_FLUSH_INTERVAL = float(os.getenv("NEGOTIATIONS_FLUSH_INTERVAL", "0.2"))
+NEGOTIATION_ID_BLOCK = int(os.getenv("NEGOTIATION_ID_BLOCK", "100"))   # ids reserved per sequence round trip
 
-def fetch_negotiations_by_session(session_id: str) -> List[Dict[str, Any]]:
-    """
-    Fetch all negotiations for a given session_id.
+QUEUED_NEGOTIATION_SQL = """
+        INSERT INTO negotiations
+        (id, session_id, load_id, miles, loadboard_rate,
+         price, user_message, user_requested_price,
+         cur_round, max_rounds,
+         ai_negotiated_price, ai_negotiated_reason, history, sentiment, ts)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s, %s::timestamptz)
+        ON CONFLICT DO NOTHING
     """
-    sql = """
+
+_negotiation_ids: deque = deque()
+_negotiation_ids_lock: Optional[asyncio.Lock] = None
+
+async def _next_negotiation_id() -> int:
+    global _negotiation_ids_lock
+    if not _negotiation_ids:
+        if _negotiation_ids_lock is None:
+            _negotiation_ids_lock = asyncio.Lock()
+        async with _negotiation_ids_lock:
+            if not _negotiation_ids:
+                async with get_aconn() as conn:
+                    cur = await conn.execute(
+                        "SELECT nextval(pg_get_serial_sequence('negotiations', 'id')) "
+                        "FROM generate_series(1, %s)", (NEGOTIATION_ID_BLOCK,))
+                    _negotiation_ids.extend(r[0] for r in await cur.fetchall())
+    return _negotiation_ids.popleft()
+
+async def _write_negotiations(rows: List[tuple]) -> None:
+    try:
+        async with get_aconn() as conn, conn.cursor() as cur:
+            await cur.executemany(QUEUED_NEGOTIATION_SQL, rows)
+    except psycopg.OperationalError:
+        raise   # connection trouble: BatchWriter requeues the batch
+    except psycopg.Error as e:
+        # a bad row fails the whole batch; write the rest one by one
+        print(f"[negotiations] batch of {len(rows)} failed ({e}), retrying row by row")
+        for row in rows:
+            try:
+                async with get_aconn() as conn:
+                    await conn.execute(QUEUED_NEGOTIATION_SQL, row)
+            except psycopg.OperationalError:
+                raise
+            except psycopg.Error as e:
+                print(f"[negotiations] dropped row id={row[0]} session={row[1]}:", e)
+
+NEGOTIATION_BUFFER = BatchWriter(
+    "negotiations",
+    _write_negotiations,
+    max_size=NEGOTIATIONS_BUFFER_MAX,
+    batch_size=NEGOTIATIONS_BATCH_SIZE,
+    flush_interval=NEGOTIATIONS_FLUSH_INTERVAL,
+    policy=BLOCK,
+    requeue_failed=True,
+)
+
+async def start_negotiation_buffer() -> None:
+    if DATABASE_URL:
+        await NEGOTIATION_BUFFER.start()
+
+async def stop_negotiation_buffer() -> None:
+    await NEGOTIATION_BUFFER.stop()
+
+# columns of _negotiation_params() the table would reject; checked up front because
+# a queued row can no longer fail the request that produced it
+_NEGOTIATION_REQUIRED = {0: "session_id", 1: "load_id", 11: "history"}
+_NEGOTIATION_INTS = {2: "miles", 7: "cur_round", 8: "max_rounds"}
+
+def _check_negotiation(params: tuple) -> None:
+    for i, col in _NEGOTIATION_REQUIRED.items():
+        if params[i] is None:
+            raise ValueError(f"{col} is required")
+    for i, col in _NEGOTIATION_INTS.items():
+        v = params[i]
+        if v is not None and (isinstance(v, bool) or not isinstance(v, int) and not str(v).lstrip("-").isdigit()):
+            raise ValueError(f"{col} must be an integer, got {v!r}")
+    if params[3] is not None:
+        try:
+            Decimal(str(params[3]))
+        except ArithmeticError:
+            raise ValueError(f"loadboard_rate must be a number, got {params[3]!r}")
+
+async def ainsert_negotiation(entry: Dict[str, Any]) -> int:
+    if NEGOTIATION_BUFFER.running:
+        params = _negotiation_params(entry)
+        _check_negotiation(params)
+        row_id = await _next_negotiation_id()
+        ts = datetime.datetime.now(datetime.timezone.utc)
+        # raises instead of dropping the row when neither the queue nor the DB takes it
+        await NEGOTIATION_BUFFER.awrite((row_id, *params, ts))
+        return row_id
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(INSERT_NEGOTIATION_SQL, _negotiation_params(entry))
+        row = await cur.fetchone()
+    return row[0] if row is not None else -1
+
+
+NEGOTIATIONS_BY_SESSION_SQL = """
         SELECT id, session_id, load_id, price, miles, user_message,
                user_requested_price, cur_round, max_rounds,
                ai_negotiated_price, ai_negotiated_reason, ts
@@ -175,6 +689,18 @@ def fetch_negotiations_by_session(session_id: str) -> List[Dict[str, Any]]:
         WHERE session_id = %s
         ORDER BY ts ASC
     """
+
+def fetch_negotiations_by_session(session_id: str) -> List[Dict[str, Any]]:
+    """
+    Fetch all negotiations for a given session_id.
+    """
     with get_conn() as conn, conn.cursor() as cur:
-        cur.execute(sql, (session_id,))
+        cur.execute(NEGOTIATIONS_BY_SESSION_SQL, (session_id,))
         return _rows_to_dicts(cur)
+
+async def afetch_negotiations_by_session(session_id: str) -> List[Dict[str, Any]]:
+    if NEGOTIATION_BUFFER.running:
+        await NEGOTIATION_BUFFER.flush()   # read your own queued writes
+    async with get_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(NEGOTIATIONS_BY_SESSION_SQL, (session_id,))
+        return await _arows_to_dicts(cur)
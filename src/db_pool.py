@@ -0,0 +1,168 @@
+import asyncio
+import os
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+from psycopg import AsyncCursor, Cursor
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from .tracing import span, sql_label
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# pool sizing (per process), tune through env on Fly
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))          # seconds to wait for a free conn
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))       # close conns idle longer than this
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+
+_pool: Optional[ConnectionPool] = None
+_apool: Optional[AsyncConnectionPool] = None
+
+
+# every statement run through a pooled connection is a `db` span named after the
+# statement ("SELECT loads", "INSERT negotiations"); see src/tracing.py
+class TracedCursor(Cursor):
+    def execute(self, query, params=None, **kwargs):
+        with span("db", sql_label(query, self)) as s:
+            super().execute(query, params, **kwargs)
+            s.set(rows=self.rowcount)
+        return self
+
+    def executemany(self, query, params_seq, **kwargs):
+        with span("db", sql_label(query, self), many=True):
+            super().executemany(query, params_seq, **kwargs)
+
+
+class TracedAsyncCursor(AsyncCursor):
+    async def execute(self, query, params=None, **kwargs):
+        with span("db", sql_label(query, self)) as s:
+            await super().execute(query, params, **kwargs)
+            s.set(rows=self.rowcount)
+        return self
+
+    async def executemany(self, query, params_seq, **kwargs):
+        with span("db", sql_label(query, self), many=True):
+            await super().executemany(query, params_seq, **kwargs)
+
+
+def _pool_kwargs() -> Dict[str, Any]:
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL not set")
+    return {
+        "conninfo": DATABASE_URL,
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": max(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        "timeout": DB_POOL_TIMEOUT,
+        "max_idle": DB_POOL_MAX_IDLE,
+        "max_lifetime": DB_POOL_MAX_LIFETIME,
+        "open": False,
+    }
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Sync pool used by the threadpool endpoints and scripts.
+    Opened by the app lifespan; opened lazily if used outside the app.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(name="sync", check=ConnectionPool.check_connection,
+                               kwargs={"cursor_factory": TracedCursor}, **_pool_kwargs())
+        _pool.open()
+    return _pool
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Async pool used by the async handlers so queries don't block the event loop.
+    """
+    global _apool
+    if _apool is None:
+        _apool = AsyncConnectionPool(name="async", check=AsyncConnectionPool.check_connection,
+                                     kwargs={"cursor_factory": TracedAsyncCursor}, **_pool_kwargs())
+        await _apool.open()
+    return _apool
+
+
+@contextmanager
+def pooled_conn():
+    with ExitStack() as stack:
+        # the span covers the checkout only: time spent waiting for a free connection
+        with span("db", "pool checkout", pool="sync"):
+            conn = stack.enter_context(get_pool().connection())
+        yield conn
+
+
+@asynccontextmanager
+async def pooled_aconn():
+    pool = await get_async_pool()
+    async with AsyncExitStack() as stack:
+        with span("db", "pool checkout", pool="async"):
+            conn = await stack.enter_async_context(pool.connection())
+        yield conn
+
+
+def _forget_pools() -> None:
+    # a forked worker must neither use nor close the parent's sockets (closing would
+    # end the parent's sessions too): drop the references, the worker opens its own
+    global _pool, _apool
+    _pool = _apool = None
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+async def wait_pools(timeout: float) -> None:
+    """Block until each open pool holds DB_POOL_MIN_SIZE connections (startup warmup)."""
+    if _pool is not None:
+        await asyncio.to_thread(_pool.wait, timeout)
+    if _apool is not None:
+        await _apool.wait(timeout)
+
+
+async def open_pools() -> None:
+    """Called from the FastAPI lifespan on startup."""
+    if not DATABASE_URL:
+        print("[db_pool] DATABASE_URL not set, pools disabled")
+        return
+    get_pool()
+    await get_async_pool()
+    print(f"[db_pool] pools open (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})")
+
+
+async def close_pools() -> None:
+    """Called from the FastAPI lifespan on shutdown."""
+    global _pool, _apool
+    if _apool is not None:
+        await _apool.close()
+        _apool = None
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Snapshot of psycopg_pool counters (pool_size, pool_available, requests_waiting,
+    requests_num, connections_errors, ...) for each open pool.
+    """
+    out: Dict[str, Dict[str, int]] = {}
+    if _pool is not None:
+        out["sync"] = _pool.get_stats()
+    if _apool is not None:
+        out["async"] = _apool.get_stats()
+    return out
+
+
+async def check_health() -> Dict[str, Any]:
+    """Round trip through the async pool; used by /health/db."""
+    if not DATABASE_URL:
+        return {"ok": False, "error": "DATABASE_URL not set"}
+    try:
+        async with pooled_aconn() as conn:
+            await conn.execute("SELECT 1")
+        return {"ok": True, "pools": pool_stats()}
+    except Exception as e:
+        return {"ok": False, "error": str(e), "pools": pool_stats()}
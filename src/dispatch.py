@@ -0,0 +1,245 @@
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .db_pool import pooled_aconn
+from .http_clients import HAPPYROBOT, NEGOTIATION, RETRY_STATUS, request as http_request
+from .metrics import histograms, observe
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Outbound webhook calls (HappyRobot, negotiation workflow) go through a per-upstream
+# queue drained by DISPATCH_CONCURRENCY workers, so request handlers only enqueue.
+# Failed calls are retried with backoff; after DISPATCH_MAX_ATTEMPTS the call is
+# written to dispatch_dead_letters (db/init/018_dispatch_dead_letters.sql).
+def _parse_limits(name: str, default: str) -> Dict[str, int]:
+    # "happyrobot=8,negotiation=8"
+    out = {}
+    for part in os.getenv(name, default).split(","):
+        key, _, val = part.partition("=")
+        if key.strip() and val.strip():
+            out[key.strip()] = int(val)
+    return out
+
+DISPATCH_CONCURRENCY = _parse_limits("DISPATCH_CONCURRENCY", f"{HAPPYROBOT}=8,{NEGOTIATION}=8")
+DISPATCH_QUEUE_MAX = int(os.getenv("DISPATCH_QUEUE_MAX", "1000"))        # per upstream, incl. waiting retries
+DISPATCH_MAX_ATTEMPTS = int(os.getenv("DISPATCH_MAX_ATTEMPTS", "5"))
+DISPATCH_BACKOFF_BASE = float(os.getenv("DISPATCH_BACKOFF_BASE", "0.5"))  # seconds
+DISPATCH_BACKOFF_MAX = float(os.getenv("DISPATCH_BACKOFF_MAX", "30"))
+DISPATCH_DRAIN_TIMEOUT = float(os.getenv("DISPATCH_DRAIN_TIMEOUT", "10"))  # seconds at shutdown
+
+DEAD_LETTER_SQL = """
+    INSERT INTO dispatch_dead_letters
+    (upstream, method, url, ref, body, attempts, last_status, last_error, enqueued_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class QueueFull(Exception):
+    """The upstream's queue is at DISPATCH_QUEUE_MAX; the caller should back off."""
+
+
+@dataclass
+class Job:
+    id: int
+    upstream: str
+    method: str
+    url: str
+    body: Any
+    headers: Dict[str, str]
+    ref: Optional[str]
+    on_dead: Optional[Callable[["Job"], Awaitable[None]]]
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    last_status: Optional[int] = None
+    last_error: Optional[str] = None
+
+
+class _Upstream:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        self.waiting_retry: Dict[int, asyncio.TimerHandle] = {}
+        self.retry_jobs: Dict[int, Job] = {}
+        self.active: Dict[int, Job] = {}      # mid-_attempt; dead-lettered if cancelled at shutdown
+        self.in_flight = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() + len(self.waiting_retry)
+
+
+class Dispatcher:
+    """
+    Fire-and-forget HTTP calls with bounded concurrency per upstream.
+
+    submit() enqueues and returns at once (QueueFull when the upstream is backed
+    up). A worker sends the call; 429 / 5xx / transport errors are retried after
+    a jittered exponential delay without holding the worker, and the last failure
+    goes to dispatch_dead_letters and the job's `on_dead` callback.
+    """
+
+    def __init__(self, concurrency: Dict[str, int] = DISPATCH_CONCURRENCY):
+        self.concurrency = concurrency
+        self._ups: Dict[str, _Upstream] = {}
+        self._ids = itertools.count(1)
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        for name, n in self.concurrency.items():
+            up = self._ups[name] = _Upstream(name, n)
+            up.workers = [asyncio.create_task(self._worker(up), name=f"dispatch:{name}:{i}")
+                          for i in range(n)]
+        self._running = True
+
+    async def stop(self, timeout: float = DISPATCH_DRAIN_TIMEOUT) -> None:
+        """Let queued calls go out for up to `timeout` seconds, dead-letter the rest."""
+        if not self._running:
+            return
+        self._running = False
+        ups = list(self._ups.values())
+        for up in ups:
+            # retries not due yet are tried once more now instead of waiting
+            for job_id, handle in list(up.waiting_retry.items()):
+                handle.cancel()
+                up.queue.put_nowait(up.retry_jobs.pop(job_id))
+            up.waiting_retry.clear()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(up.queue.join() for up in ups)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for up in ups:
+            for t in up.workers:
+                t.cancel()
+            await asyncio.gather(*up.workers, return_exceptions=True)
+            up.workers = []
+            leftover = list(up.active.values()) + list(up.retry_jobs.values())
+            up.active.clear()
+            while not up.queue.empty():
+                leftover.append(up.queue.get_nowait())
+            for job in leftover:
+                job.last_error = job.last_error or "not sent before shutdown"
+                await self._dead_letter(up, job)
+        self._ups.clear()
+
+    def submit(self, upstream: str, method: str, url: str, *, json_body: Any = None,
+               headers: Optional[Dict[str, str]] = None, ref: Optional[str] = None,
+               on_dead: Optional[Callable[[Job], Awaitable[None]]] = None) -> Job:
+        up = self._ups.get(upstream)
+        if up is None:
+            raise RuntimeError(f"dispatcher not running for upstream {upstream!r}")
+        if up.depth >= DISPATCH_QUEUE_MAX:
+            up.rejected += 1
+            raise QueueFull(f"{upstream} dispatch queue full ({up.depth})")
+        job = Job(next(self._ids), upstream, method.upper(), url, json_body,
+                  headers or {}, ref, on_dead)
+        up.queue.put_nowait(job)
+        return job
+
+    async def _worker(self, up: _Upstream) -> None:
+        while True:
+            job = await up.queue.get()
+            try:
+                observe("dispatch_wait_ms", (time.time() - job.enqueued_at) * 1000, upstream=up.name)
+                await self._attempt(up, job)
+            except Exception as e:
+                print(f"[dispatch] {up.name} job {job.id} crashed:", e)
+            finally:
+                up.queue.task_done()
+
+    async def _attempt(self, up: _Upstream, job: Job) -> None:
+        job.attempts += 1
+        up.in_flight += 1
+        up.active[job.id] = job
+        try:
+            resp = await http_request(up.name, job.method, job.url, retries=0,
+                                      json=job.body, headers=job.headers)
+            job.last_status = resp.status_code
+            job.last_error = None if resp.is_success else resp.text[:500]
+            retry = resp.status_code in RETRY_STATUS or resp.status_code >= 500
+            ok = resp.is_success
+        except httpx.HTTPError as e:
+            job.last_status, job.last_error = None, f"{type(e).__name__}: {e}"
+            retry, ok = True, False
+        finally:
+            up.in_flight -= 1
+        # not reached when the worker is cancelled mid-call: stop() dead-letters the job
+        up.active.pop(job.id, None)
+        if ok:
+            up.sent += 1
+        elif retry and job.attempts < DISPATCH_MAX_ATTEMPTS and self._running:
+            up.retried += 1
+            delay = random.uniform(0, min(DISPATCH_BACKOFF_MAX, DISPATCH_BACKOFF_BASE * 2 ** job.attempts))
+            up.retry_jobs[job.id] = job
+            up.waiting_retry[job.id] = asyncio.get_running_loop().call_later(delay, self._requeue, up, job)
+        else:
+            await self._dead_letter(up, job)
+
+    def _requeue(self, up: _Upstream, job: Job) -> None:
+        up.waiting_retry.pop(job.id, None)
+        up.retry_jobs.pop(job.id, None)
+        up.queue.put_nowait(job)
+
+    async def _dead_letter(self, up: _Upstream, job: Job) -> None:
+        up.dead += 1
+        print(f"[dispatch] dead letter {up.name} {job.method} {job.url} ref={job.ref} "
+              f"after {job.attempts} attempts: {job.last_status or job.last_error}")
+        if DATABASE_URL:
+            try:
+                async with pooled_aconn() as conn:
+                    await conn.execute(DEAD_LETTER_SQL, (
+                        up.name, job.method, job.url, job.ref,
+                        json.dumps(job.body) if job.body is not None else None,
+                        job.attempts, job.last_status, job.last_error,
+                        datetime.datetime.fromtimestamp(job.enqueued_at, datetime.timezone.utc),
+                    ))
+            except Exception as e:
+                print("[dispatch] dead letter write failed:", e)
+        if job.on_dead is not None:
+            try:
+                await job.on_dead(job)
+            except Exception as e:
+                print("[dispatch] on_dead callback failed:", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queue_max": DISPATCH_QUEUE_MAX,
+            "upstreams": {
+                name: {
+                    "concurrency": up.concurrency,
+                    "queued": up.queue.qsize(),
+                    "waiting_retry": len(up.waiting_retry),
+                    "in_flight": up.in_flight,
+                    "sent": up.sent,
+                    "retried": up.retried,
+                    "dead_lettered": up.dead,
+                    "rejected": up.rejected,
+                }
+                for name, up in self._ups.items()
+            },
+            "dispatch_wait_ms": histograms("dispatch_wait_ms"),
+        }
+
+
+DISPATCHER = Dispatcher()
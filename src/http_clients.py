@@ -0,0 +1,137 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .metrics import histograms, observe
+from .tracing import span
+
+# one shared client per upstream, opened/closed by the app lifespan
+FMCSA = "fmcsa"
+HAPPYROBOT = "happyrobot"
+NEGOTIATION = "negotiation"
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes")
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))          # per upstream (host)
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.2"))            # seconds
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "2.0"))
+
+FMCSA_BASE_URL = os.getenv("FMCSA_BASE_URL", "https://mobile.fmcsa.dot.gov")   # bench/mock_upstreams in load tests
+
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    FMCSA: {"base_url": FMCSA_BASE_URL},
+    HAPPYROBOT: {},
+    NEGOTIATION: {},
+}
+
+RETRY_STATUS = {429, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+# clients (and their connections) belong to the process that opened them
+os.register_at_fork(after_in_child=_clients.clear)
+
+
+def _new_client(name: str) -> httpx.AsyncClient:
+    cfg = UPSTREAMS.get(name, {})
+    return httpx.AsyncClient(
+        base_url=cfg.get("base_url", ""),
+        http2=HTTP2_ENABLED,
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _new_client(name)
+    return client
+
+
+async def open_clients() -> None:
+    for name in UPSTREAMS:
+        get_client(name)
+
+
+async def prime_clients(urls: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Open a keep-alive connection to each upstream host (HEAD / on its origin, any
+    status) so the first real call skips DNS, TCP and TLS setup. Nothing is sent to
+    the webhook paths themselves. Returns the status or error per upstream.
+    """
+    async def one(name: str, url: str) -> Any:
+        origin = httpx.URL(url).copy_with(path="/", query=None, fragment=None)
+        try:
+            with span("http", f"{name} warmup"):
+                r = await get_client(name).request("HEAD", origin, timeout=HTTP_CONNECT_TIMEOUT * 2)
+            return r.status_code
+        except httpx.HTTPError as e:
+            return f"{type(e).__name__}: {e}"
+
+    todo = {name: url for name, url in urls.items() if url}
+    results = await asyncio.gather(*(one(n, u) for n, u in todo.items()))
+    return dict(zip(todo, results))
+
+
+async def close_clients() -> None:
+    for name in list(_clients):
+        await _clients.pop(name).aclose()
+
+
+def _backoff(attempt: int) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+async def request(upstream: str, method: str, url: str, *,
+                  retries: Optional[int] = None, **kwargs: Any) -> httpx.Response:
+    """
+    Send through the shared client for `upstream`, retrying with jittered backoff.
+    Non-idempotent calls are only retried when the request never left (connect errors).
+    Every attempt is an `http` span and is recorded in the `http_client_ms` histogram.
+    """
+    method = method.upper()
+    retries = HTTP_RETRIES if retries is None else retries
+    client = get_client(upstream)
+    attempt = 0
+    while True:
+        t0 = time.perf_counter()
+        try:
+            with span("http", f"{upstream} {method}", attempt=attempt) as s:
+                resp = await client.request(method, url, **kwargs)
+                s.set(status=resp.status_code)
+        except httpx.TransportError as e:
+            observe("http_client_ms", (time.perf_counter() - t0) * 1000,
+                    upstream=upstream, method=method, status=type(e).__name__)
+            safe = method in IDEMPOTENT or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+            if attempt >= retries or not safe:
+                raise
+        else:
+            observe("http_client_ms", (time.perf_counter() - t0) * 1000,
+                    upstream=upstream, method=method, status=resp.status_code)
+            if resp.status_code not in RETRY_STATUS or attempt >= retries or method not in IDEMPOTENT:
+                return resp
+            await resp.aclose()
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+def latency_stats() -> Dict[str, Any]:
+    return {
+        "http2": HTTP2_ENABLED,
+        "open_clients": sorted(_clients),
+        "http_client_ms": histograms("http_client_ms"),
+    }
@@ -0,0 +1,95 @@
+import datetime
+import decimal
+import json
+import os
+import uuid
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+# JSON_BACKEND=auto uses orjson (or msgspec) when installed (`uv sync --extra fast`)
+# and falls back to the stdlib. All backends write datetimes as ISO 8601 and Decimal
+# as a JSON number, as jsonable_encoder and the state store do.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+if JSON_BACKEND == "auto":
+    JSON_BACKEND = "orjson" if orjson else "msgspec" if msgspec else "stdlib"
+if JSON_BACKEND == "orjson" and orjson is None or JSON_BACKEND == "msgspec" and msgspec is None:
+    raise RuntimeError(f"JSON_BACKEND={JSON_BACKEND} but the package is not installed")
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if msgspec is not None and isinstance(o, msgspec.Struct):
+        return msgspec.structs.asdict(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if JSON_BACKEND == "orjson":
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTS)
+
+    loads = orjson.loads
+    DecodeError: Any = orjson.JSONDecodeError
+elif JSON_BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder(enc_hook=_default, decimal_format="number")
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    loads = msgspec.json.decode
+    DecodeError = msgspec.DecodeError
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+    loads = json.loads
+    DecodeError = ValueError
+
+
+def decode(raw: bytes, type_: Optional[type] = None) -> Any:
+    """
+    Parse a request body. With msgspec installed and a Struct type (src/schemas.py)
+    the body is decoded and validated straight into it; otherwise a plain dict.
+    Malformed or invalid input raises ValueError.
+    """
+    if type_ is not None and msgspec is not None:
+        try:
+            return msgspec.json.decode(raw, type=type_, strict=False)
+        except msgspec.ValidationError as e:
+            raise ValueError(str(e)) from None
+        except msgspec.DecodeError as e:
+            raise ValueError(f"invalid JSON: {e}") from None
+    try:
+        return loads(raw)
+    except DecodeError as e:
+        raise ValueError(f"invalid JSON: {e}") from None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the selected backend; return it directly to skip jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(JSONResponse):
+    """Body already encoded as JSON bytes (e.g. spliced from request bytes)."""
+
+    def render(self, content: Any) -> bytes:
+        return content
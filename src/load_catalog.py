@@ -0,0 +1,501 @@
+import asyncio
+import datetime
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+import psycopg
+
+from .db_client import (
+    CLOSEST_BY_WEIGHT_COLS,
+    CLOSEST_BY_WEIGHT_SQL,
+    MILES_TOLERANCE,
+    RECENT_LOADS_COLS,
+    RECENT_LOADS_SQL,
+    SEARCH_LOADS_COLS,
+    _arows_to_dicts,
+    _build_search_sql,
+    _recent_rows_to_dicts,
+    normalize_place,
+    set_hot_catalog,
+    weight_tolerance,
+)
+from .db_pool import pooled_aconn
+from .recommend import (
+    RECOMMEND_MAX_CANDIDATES,
+    RECOMMEND_STATE_MATCH,
+    Query,
+    _build_recommend_sql,
+    _sql_rows,
+    attach_scores,
+    candidate_order,
+    score_columns,
+    top_k,
+)
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+LOAD_CATALOG = os.getenv("LOAD_CATALOG", "false").lower() in ("1", "true", "yes")
+LOAD_CATALOG_MAX_ROWS = int(os.getenv("LOAD_CATALOG_MAX_ROWS", "200000"))          # bigger tables stay on SQL
+LOAD_CATALOG_POLL_INTERVAL = float(os.getenv("LOAD_CATALOG_POLL_INTERVAL", "5"))   # watermark poll between NOTIFYs
+LOAD_CATALOG_FULL_RELOAD = float(os.getenv("LOAD_CATALOG_FULL_RELOAD", "600"))
+# re-read this far behind the watermark: updated_at is the writer's transaction start,
+# so a long transaction can commit rows older than ones we've already seen
+LOAD_CATALOG_SLACK = float(os.getenv("LOAD_CATALOG_SLACK", "10"))
+LOADS_CHANNEL = "loads_changed"   # db/init/014_loads_change_feed.sql
+
+# rows keep every column the read helpers can return, then the normalized
+# city/state columns (011_loads_normalized_city.sql) and updated_at
+ROW_COLS = RECENT_LOADS_COLS
+CATALOG_SQL = f"""
+    SELECT {", ".join(ROW_COLS)},
+           origin_city, origin_state, destination_city, destination_state, updated_at
+    FROM loads
+"""
+_I = {c: i for i, c in enumerate(ROW_COLS)}
+_O_CITY, _O_STATE, _D_CITY, _D_STATE, _UPDATED_AT = range(len(ROW_COLS), len(ROW_COLS) + 5)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROS = datetime.timedelta(microseconds=1)
+_STR_MAX = "\U0010ffff"
+
+
+def _num(v: Any) -> float:
+    return np.nan if v is None else float(v)
+
+
+def _numeric_columns(rows: Sequence[tuple]) -> Dict[str, np.ndarray]:
+    return {
+        "pickup": np.array([(r[_I["pickup_datetime"]] - _EPOCH) // _MICROS for r in rows], dtype=np.int64),
+        "rate": np.array([_num(r[_I["loadboard_rate"]]) for r in rows], dtype=np.float64),
+        "weight": np.array([_num(r[_I["weight"]]) for r in rows], dtype=np.float64),
+        "miles": np.array([_num(r[_I["miles"]]) for r in rows], dtype=np.float64),
+    }
+
+
+_NUMERIC = ("pickup", "rate", "weight", "miles")
+_TEXT = {"o_city": _O_CITY, "o_state": _O_STATE, "d_city": _D_CITY, "d_state": _D_STATE,
+         "equip": _I["equipment_type"]}
+
+
+class _Codes:
+    """
+    Dictionary-encoded text column: sorted distinct values plus a code per row.
+    Equality is one code, a prefix is a contiguous code range.
+    """
+
+    def __init__(self, values: Sequence[Optional[str]]):
+        self.null = np.array([v is None for v in values], dtype=bool)
+        self.uniq, self.codes = np.unique(
+            np.array(["" if v is None else v for v in values], dtype=str), return_inverse=True)
+
+    def upsert(self, idx: np.ndarray, values: Sequence[Optional[str]], n: int) -> "_Codes":
+        """Copy with rows `idx` set to `values` (rows past the end are appended)."""
+        new = _Codes.__new__(_Codes)
+        vals = np.array(["" if v is None else v for v in values], dtype=str)
+        new.uniq = np.union1d(self.uniq, vals)
+        new.codes = np.empty(n, dtype=np.intp)
+        new.codes[:len(self.codes)] = np.searchsorted(new.uniq, self.uniq)[self.codes]
+        new.codes[idx] = np.searchsorted(new.uniq, vals)
+        new.null = np.empty(n, dtype=bool)
+        new.null[:len(self.null)] = self.null
+        new.null[idx] = [v is None for v in values]
+        return new
+
+    def equals(self, value: str) -> np.ndarray:
+        i = int(np.searchsorted(self.uniq, value))
+        if i < len(self.uniq) and self.uniq[i] == value:
+            return (self.codes == i) & ~self.null
+        return np.zeros(len(self.codes), dtype=bool)
+
+    def equals_folded(self, value: str) -> np.ndarray:
+        """Case-insensitive equality; `value` is already lower case."""
+        hits = [i for i, u in enumerate(self.uniq) if u.lower() == value]
+        return np.isin(self.codes, hits) & ~self.null
+
+    def startswith(self, prefix: str) -> np.ndarray:
+        lo = np.searchsorted(self.uniq, prefix)
+        hi = np.searchsorted(self.uniq, prefix + _STR_MAX)
+        return (self.codes >= lo) & (self.codes < hi) & ~self.null
+
+
+class _Snapshot:
+    """Immutable columnar view of the catalog; readers hold one while a refresh builds the next."""
+
+    def __init__(self, rows: List[tuple]):
+        self.rows = rows
+        self.pos = {r[0]: i for i, r in enumerate(rows)}
+        for name, arr in _numeric_columns(rows).items():
+            setattr(self, name, arr)
+        for name, j in _TEXT.items():
+            setattr(self, name, _Codes([r[j] for r in rows]))
+        self._index()
+
+    def _index(self) -> None:
+        self.ids = np.array([r[0] for r in self.rows], dtype=str)
+        # precomputed orders: weight ascending (NaN last), ties by load_id, for the two-sided probe
+        self.by_weight = np.lexsort((self.ids, self.weight))
+        self.n_weight = int(np.count_nonzero(~np.isnan(self.weight)))
+        self.weight_sorted = self.weight[self.by_weight[:self.n_weight]]
+        # newest pickup first, ties by load_id bytewise descending (RECENT_LOADS_SQL's COLLATE "C")
+        self.recent = np.lexsort((self.ids, self.pickup))[::-1]
+
+    def upsert(self, changed: Sequence[tuple]) -> "_Snapshot":
+        """
+        New snapshot with `changed` rows replaced or appended by load_id. Columns are
+        patched with array copies rather than rebuilt row by row.
+        """
+        new = _Snapshot.__new__(_Snapshot)
+        new.rows, new.pos = list(self.rows), dict(self.pos)
+        idx = np.empty(len(changed), dtype=np.intp)
+        for k, r in enumerate(changed):
+            i = new.pos.get(r[0])
+            if i is None:
+                i = new.pos[r[0]] = len(new.rows)
+                new.rows.append(r)
+            else:
+                new.rows[i] = r
+            idx[k] = i
+        n = len(new.rows)
+        for name, vals in _numeric_columns(changed).items():
+            old = getattr(self, name)
+            arr = np.empty(n, dtype=old.dtype)
+            arr[:len(old)] = old
+            arr[idx] = vals
+            setattr(new, name, arr)
+        for name, j in _TEXT.items():
+            setattr(new, name, getattr(self, name).upsert(idx, [r[j] for r in changed], n))
+        new._index()
+        return new
+
+    def dicts(self, order: Sequence[int], cols: List[str]) -> List[Dict[str, Any]]:
+        idx = [_I[c] for c in cols]
+        return [{c: self.rows[i][j] for c, j in zip(cols, idx)} for i in order]
+
+    def place(self, city_col: _Codes, state_col: _Codes, place: str) -> np.ndarray:
+        # same semantics as db_client._place_filter (non-fuzzy)
+        city, state = normalize_place(place)
+        if state:
+            return city_col.equals(city) & state_col.startswith(state)
+        return city_col.startswith(city)
+
+    def lane(self, city_col: _Codes, state_col: _Codes, place: Optional[tuple]) -> Optional[np.ndarray]:
+        # lane part of recommend.score_columns: full match 1, same state RECOMMEND_STATE_MATCH
+        if place is None:
+            return None
+        city, state = place
+        full = self.place(city_col, state_col, f"{city}, {state}" if state else city)
+        if not state:
+            return full.astype(np.float64)
+        return np.where(full, 1.0, np.where(state_col.equals(state), RECOMMEND_STATE_MATCH, 0.0))
+
+
+class LoadCatalog:
+    """
+    Optional in-process copy of `loads` (LOAD_CATALOG=true) held as NumPy columns.
+    Once warm it is registered with db_client, and search_loads (non-fuzzy),
+    find_closest_by_weight and fetch_recent_loads answer from memory with the same
+    filters and ordering as their SQL. It is kept current by the loads_changed NOTIFY
+    plus an updated_at watermark poll. Deletes and the periodic safety net do a full
+    reload. Tables larger than LOAD_CATALOG_MAX_ROWS stay on SQL.
+    """
+
+    def __init__(self) -> None:
+        self._snap: Optional[_Snapshot] = None
+        self._since = _EPOCH    # next refresh reads rows with updated_at after this
+        self._last_full = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.oversize = False
+        self.last_refresh_ms: Optional[float] = None
+        self.counters: Dict[str, int] = {
+            "queries": 0,
+            "refreshes": 0,
+            "full_reloads": 0,
+            "rows_applied": 0,
+            "errors": 0,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self._snap is not None
+
+    async def start(self) -> None:
+        if not LOAD_CATALOG or not DATABASE_URL or self._task is not None:
+            return
+        try:
+            await self.reload()
+        except Exception as e:
+            self.counters["errors"] += 1
+            print("[load_catalog] initial load failed, serving from SQL:", e)
+        self._task = asyncio.create_task(self._run(), name="load-catalog")
+
+    async def stop(self) -> None:
+        set_hot_catalog(None)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- refresh ----
+
+    def _disable(self) -> None:
+        self.oversize = True
+        self._snap = None
+        set_hot_catalog(None)
+
+    async def reload(self) -> None:
+        t0 = time.perf_counter()
+        self._last_full = time.monotonic()
+        self.counters["full_reloads"] += 1
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT count(*), NOW() FROM loads")
+            count, now = await cur.fetchone()  # type: ignore[misc]
+            if count > LOAD_CATALOG_MAX_ROWS:
+                if not self.oversize:
+                    print(f"[load_catalog] loads has {count} rows (> {LOAD_CATALOG_MAX_ROWS}), serving from SQL")
+                self._disable()
+                return
+            await cur.execute(CATALOG_SQL)
+            rows = await cur.fetchall()
+        self.oversize = False
+        # building the columns is O(n) Python work; keep it off the event loop
+        self._snap = await asyncio.to_thread(_Snapshot, rows)
+        self._since = now - datetime.timedelta(seconds=LOAD_CATALOG_SLACK)
+        set_hot_catalog(self)
+        self.last_refresh_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    async def refresh(self) -> None:
+        """Apply rows inserted or updated since the watermark."""
+        snap = self._snap
+        if snap is None:
+            return
+        t0 = time.perf_counter()
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            # NOW() is the transaction start, so every statement below sees at least that much
+            await cur.execute("SELECT NOW()")
+            (now,) = await cur.fetchone()  # type: ignore[misc]
+            await cur.execute("SELECT load_id, updated_at FROM loads WHERE updated_at > %s", (self._since,))
+            stale = [load_id for load_id, updated_at in await cur.fetchall()
+                     if load_id not in snap.pos or snap.rows[snap.pos[load_id]][_UPDATED_AT] != updated_at]
+            changed: List[tuple] = []
+            if stale:
+                await cur.execute(CATALOG_SQL + "WHERE load_id = ANY(%s)", (stale,))
+                changed = await cur.fetchall()
+        # the window trails the clock, not the newest row, so quiet periods re-read nothing
+        self._since = now - datetime.timedelta(seconds=LOAD_CATALOG_SLACK)
+        self.counters["refreshes"] += 1
+        if not changed:
+            return
+        if len(snap.rows) + len(changed) > LOAD_CATALOG_MAX_ROWS:
+            await self.reload()
+            return
+        self._snap = await asyncio.to_thread(snap.upsert, changed)
+        self.counters["rows_applied"] += len(changed)
+        self.last_refresh_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+    async def _sync(self, ops: Set[str]) -> None:
+        due = time.monotonic() - self._last_full >= LOAD_CATALOG_FULL_RELOAD
+        if due or (self._snap is None and not self.oversize) or ops & {"DELETE", "TRUNCATE"}:
+            await self.reload()
+        else:
+            await self.refresh()
+
+    async def _run(self) -> None:
+        # dedicated connection: LISTEN holds it for the lifetime of the app
+        assert DATABASE_URL
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {LOADS_CHANNEL}")
+                    await self._sync(set())   # catch up on anything missed while (re)connecting
+                    while True:
+                        ops: Set[str] = set()
+                        async for note in conn.notifies(timeout=LOAD_CATALOG_POLL_INTERVAL, stop_after=1):
+                            ops.add(note.payload)
+                        if ops:
+                            # coalesce the burst a batch of writes produces into one refresh
+                            async for note in conn.notifies(timeout=0.05):
+                                ops.add(note.payload)
+                        await self._sync(ops)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                print("[load_catalog] refresh error, retrying:", e)
+                await asyncio.sleep(1)
+
+    # ---- reads (same contracts as the db_client helpers) ----
+
+    def _snapshot(self) -> _Snapshot:
+        snap = self._snap
+        if snap is None:
+            raise RuntimeError("load catalog is not loaded")
+        self.counters["queries"] += 1
+        return snap
+
+    def search_loads(
+        self,
+        origin: Optional[str] = None,
+        destination: Optional[str] = None,
+        weight_kg: Optional[int] = None,
+        miles: Optional[int] = None,
+        rate_min: Optional[float] = None,
+        rate_max: Optional[float] = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        snap = self._snapshot()
+        mask = np.ones(len(snap.rows), dtype=bool)
+        if origin:
+            mask &= snap.place(snap.o_city, snap.o_state, origin)
+        if destination:
+            mask &= snap.place(snap.d_city, snap.d_state, destination)
+        if weight_kg:
+            tol = weight_tolerance(weight_kg)
+            mask &= (snap.weight >= weight_kg - tol) & (snap.weight <= weight_kg + tol)
+        if miles:
+            mask &= (snap.miles >= miles - MILES_TOLERANCE) & (snap.miles <= miles + MILES_TOLERANCE)
+        if rate_min is not None:
+            mask &= snap.rate >= float(rate_min)
+        if rate_max is not None:
+            mask &= snap.rate <= float(rate_max)
+        idx = np.flatnonzero(mask)
+        # ORDER BY pickup_datetime ASC, loadboard_rate DESC NULLS LAST
+        rate_desc = np.where(np.isnan(snap.rate[idx]), np.inf, -snap.rate[idx])
+        order = idx[np.lexsort((rate_desc, snap.pickup[idx]))][:int(limit)]
+        return snap.dicts(order, SEARCH_LOADS_COLS)
+
+    def find_closest_by_weight(self, target_kg: int, limit: int = 5) -> List[Dict[str, Any]]:
+        snap = self._snapshot()
+        # two-sided probe over the weight-sorted order, like CLOSEST_BY_WEIGHT_SQL
+        pos = int(np.searchsorted(snap.weight_sorted, target_kg))
+        lo = max(0, pos - limit)
+        if lo < pos:
+            # the lower side takes the lowest load_ids of a weight tied at its edge
+            lo = int(np.searchsorted(snap.weight_sorted, snap.weight_sorted[lo]))
+        cand = snap.by_weight[lo:min(snap.n_weight, pos + limit)]
+        diff = np.abs(snap.weight[cand] - target_kg)
+        order = cand[np.lexsort((snap.ids[cand], diff))][:limit]
+        return snap.dicts(order, CLOSEST_BY_WEIGHT_COLS)
+
+    def recommend_loads(self, q: Query) -> List[Dict[str, Any]]:
+        """recommend.recommend_loads over the snapshot: every candidate scored in one vector pass."""
+        snap = self._snapshot()
+        mask = np.ones(len(snap.pickup), dtype=bool)
+        if q.since is not None:
+            mask &= snap.pickup >= (q.since - _EPOCH) // _MICROS
+        if q.rate_min is not None:
+            mask &= snap.rate >= q.rate_min
+        if q.rate_max is not None:
+            mask &= snap.rate <= q.rate_max
+        idx = np.flatnonzero(mask)
+        if len(idx) > RECOMMEND_MAX_CANDIDATES:
+            # like the SQL path's LIMIT on the pickup index (recommend.candidate_order)
+            pickup = snap.pickup[idx] if candidate_order(q) == "ASC" else -snap.pickup[idx]
+            idx = idx[np.lexsort((snap.ids[idx], pickup))[:RECOMMEND_MAX_CANDIDATES]]
+        cols = {
+            "weight": snap.weight[idx], "miles": snap.miles[idx], "rate": snap.rate[idx],
+            "pickup": snap.pickup[idx],
+        }
+        if q.origin:
+            cols["lane_origin"] = snap.lane(snap.o_city, snap.o_state, q.origin)[idx]
+        if q.destination:
+            cols["lane_destination"] = snap.lane(snap.d_city, snap.d_state, q.destination)[idx]
+        if q.equipment:
+            cols["equipment"] = snap.equip.equals_folded(q.equipment)[idx]
+        total, parts = score_columns(q, cols)
+        best = top_k(total, snap.ids[idx], q.limit)
+        rows = snap.dicts(idx[best], SEARCH_LOADS_COLS)
+        return attach_scores(rows, total[best], {p: a[best] for p, a in parts.items()})
+
+    def fetch_recent_loads(self, limit: int = 10) -> List[Dict[str, Any]]:
+        snap = self._snapshot()
+        return _recent_rows_to_dicts([snap.rows[i][:len(ROW_COLS)] for i in snap.recent[:limit]])
+
+    # ---- consistency check ----
+
+    async def verify(self, samples: int = 20, seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run the same queries through the catalog and through SQL and report any
+        disagreement. Queries are built from randomly sampled catalog rows. Run it
+        while loads is quiet, because writes landing mid-check show up as mismatches.
+        """
+        snap = self._snap
+        if snap is None:
+            return {"ready": False}
+        rng = random.Random(seed)
+        picks = rng.sample(snap.rows, min(samples, len(snap.rows)))
+        search_key: Callable[[Dict[str, Any]], Any] = lambda r: (r["pickup_datetime"], r["loadboard_rate"])
+        checks: List[tuple] = [("recent", {"limit": 10}), ("search", {"limit": 10})]
+        for r in picks:
+            origin, destination = r[_I["origin"]], r[_I["destination"]]
+            weight, rate = r[_I["weight"]], r[_I["loadboard_rate"]]
+            checks.append(("search", {"origin": origin, "destination": destination}))
+            checks.append(("search", {"origin": origin.split(",")[0][:3], "weight_kg": weight,
+                                      "rate_max": float(rate) if rate is not None else None}))
+            checks.append(("closest", {"target_kg": weight if weight is not None else 1000}))
+            checks.append(("recommend", {"origin": origin, "destination": destination, "weight_kg": weight,
+                                         "equipment_type": r[_I["equipment_type"]]}))
+
+        mismatches = []
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            for kind, q in checks:
+                if kind == "search":
+                    sql, params = _build_search_sql(**q)
+                    await cur.execute(sql, params)
+                    expected, got, key = await _arows_to_dicts(cur), self.search_loads(**q), search_key
+                elif kind == "recommend":
+                    rq = Query(**q)
+                    sql, params = _build_recommend_sql(rq)
+                    await cur.execute(sql, params)
+                    expected, got = _sql_rows(rq, await _arows_to_dicts(cur)), self.recommend_loads(rq)
+                    key = lambda r: (r["score"], r["load_id"])
+                elif kind == "closest":
+                    await cur.execute(CLOSEST_BY_WEIGHT_SQL, {"x": q["target_kg"], "k": 5})
+                    expected = [dict(zip(CLOSEST_BY_WEIGHT_COLS, row)) for row in await cur.fetchall()]
+                    got = self.find_closest_by_weight(q["target_kg"])
+                    key = lambda r, x=q["target_kg"]: (abs(r["weight"] - x), r["load_id"])
+                else:
+                    await cur.execute(RECENT_LOADS_SQL, (q["limit"],))
+                    expected = _recent_rows_to_dicts(await cur.fetchall())
+                    got, key = self.fetch_recent_loads(q["limit"]), lambda r: (r["pickup_datetime"], r["load_id"])
+                problem = _compare(expected, got, key)
+                if problem:
+                    mismatches.append({"query": kind, "params": q, "problem": problem})
+        return {"ready": True, "checked": len(checks), "mismatches": mismatches}
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snap
+        return {
+            "enabled": LOAD_CATALOG,
+            "ready": snap is not None,
+            "rows": len(snap.rows) if snap is not None else 0,
+            "oversize": self.oversize,
+            "max_rows": LOAD_CATALOG_MAX_ROWS,
+            "watermark": self._since.isoformat() if snap is not None else None,
+            "last_refresh_ms": self.last_refresh_ms,
+            **self.counters,
+        }
+
+
+def _compare(expected: List[Dict[str, Any]], got: List[Dict[str, Any]],
+             key: Callable[[Dict[str, Any]], Any]) -> Optional[str]:
+    if len(expected) != len(got):
+        return f"{len(expected)} rows from SQL, {len(got)} from catalog"
+    if [key(r) for r in expected] != [key(r) for r in got]:
+        return "ordering differs"
+    # rows tied on the sort key at the LIMIT boundary may legitimately differ;
+    # everything before that must be the same rows with the same values
+    last = key(expected[-1]) if expected else None
+    want = {r["load_id"]: r for r in expected if key(r) != last}
+    have = {r["load_id"]: r for r in got if key(r) != last}
+    if want != have:
+        return "row contents differ"
+    return None
+
+
+CATALOG = LoadCatalog()
@@ -0,0 +1,349 @@
+"""
+Bulk load ingestion: CSV or NDJSON -> validation -> COPY into a staging table ->
+one upsert per batch into `loads` keyed on load_id.
+
+    DATABASE_URL=... uv run python -m src.load_ingest loads.csv
+    DATABASE_URL=... uv run python -m src.load_ingest loads.ndjson --batch-size 20000
+    cat loads.csv | uv run python -m src.load_ingest - --format csv
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from .db_pool import pooled_aconn
+
+INGEST_BATCH_ROWS = int(os.getenv("INGEST_BATCH_ROWS", "50000"))   # rows per COPY + upsert transaction
+INGEST_MAX_ERRORS = int(os.getenv("INGEST_MAX_ERRORS", "20"))       # validation errors reported per batch
+FORMATS = ("csv", "ndjson")
+
+# input columns (CSV header / NDJSON keys); anything else is ignored
+REQUIRED = ("load_id", "origin", "destination", "pickup_datetime", "delivery_datetime", "equipment_type")
+LOAD_COLS = REQUIRED + ("loadboard_rate", "notes", "weight", "commodity_type", "num_of_pieces", "miles", "dimensions")
+INT4_MAX = 2**31 - 1
+RATE_MAX = Decimal("99999999.99")   # NUMERIC(10,2)
+
+STAGE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS loads_stage (
+        ord               BIGINT,
+        load_id           TEXT,
+        origin            TEXT,
+        destination       TEXT,
+        pickup_datetime   TIMESTAMPTZ,
+        delivery_datetime TIMESTAMPTZ,
+        equipment_type    TEXT,
+        loadboard_rate    NUMERIC(10,2),
+        notes             TEXT,
+        weight            INTEGER,
+        commodity_type    TEXT,
+        num_of_pieces     INTEGER,
+        miles             INTEGER,
+        dimensions        JSONB
+    ) ON COMMIT DELETE ROWS
+"""
+
+_SET = ", ".join(f"{c} = EXCLUDED.{c}" for c in LOAD_COLS[1:])
+_CHANGED = f"({', '.join('l.' + c for c in LOAD_COLS[1:])}) IS DISTINCT FROM ({', '.join('EXCLUDED.' + c for c in LOAD_COLS[1:])})"
+
+# last occurrence of a load_id in the batch wins; rows identical to what's stored
+# aren't rewritten (so updated_at and the catalog only see real changes)
+UPSERT_SQL = f"""
+    WITH up AS (
+        INSERT INTO loads AS l ({', '.join(LOAD_COLS)})
+        SELECT DISTINCT ON (load_id) {', '.join(LOAD_COLS)}
+        FROM loads_stage
+        ORDER BY load_id, ord DESC
+        ON CONFLICT (load_id) DO UPDATE SET {_SET}
+        WHERE {_CHANGED}
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM up
+"""
+
+
+def _text(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    s = str(v).strip()
+    return s or None
+
+
+def _ts(v: Any) -> Optional[datetime.datetime]:
+    s = _text(v)
+    if s is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(s)
+    except ValueError:
+        raise ValueError(f"not an ISO 8601 timestamp: {s[:40]!r}")
+
+
+def _int(v: Any) -> Optional[int]:
+    s = _text(v)
+    if s is None:
+        return None
+    try:
+        # NDJSON numbers: 40000.0 is fine, 1.5 is not (the CSV path rejects "1.5" too)
+        if isinstance(v, float) and not v.is_integer():
+            raise ValueError
+        n = int(v) if isinstance(v, float) else int(s)
+    except ValueError:
+        raise ValueError(f"not an integer: {s[:40]!r}")
+    if not 0 <= n <= INT4_MAX:
+        raise ValueError(f"out of range: {n}")
+    return n
+
+
+def _rate(v: Any) -> Optional[Decimal]:
+    s = _text(v)
+    if s is None:
+        return None
+    try:
+        d = Decimal(s.lstrip("$").replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"not a number: {s[:40]!r}")
+    if not d.is_finite() or not 0 <= d <= RATE_MAX:
+        raise ValueError(f"out of range: {s[:40]}")
+    return d
+
+
+def _dimensions(v: Any) -> Optional[str]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, str):
+        try:
+            v = json.loads(v)
+        except ValueError:
+            raise ValueError("not valid JSON")
+    if not isinstance(v, dict):
+        raise ValueError("expected a JSON object")
+    return json.dumps(v)
+
+
+# per-column parsers; they raise ValueError with a message fit for the caller
+PARSERS = {
+    "load_id": _text, "origin": _text, "destination": _text,
+    "pickup_datetime": _ts, "delivery_datetime": _ts, "equipment_type": _text,
+    "loadboard_rate": _rate, "notes": _text, "weight": _int, "commodity_type": _text,
+    "num_of_pieces": _int, "miles": _int, "dimensions": _dimensions,
+}
+
+
+def validate(rec: Dict[str, Any]) -> Tuple[Any, ...]:
+    """A staging row (without `ord`) for one input record, or ValueError('<column>: <problem>')."""
+    out = []
+    for col in LOAD_COLS:
+        try:
+            out.append(PARSERS[col](rec.get(col)))
+        except ValueError as e:
+            raise ValueError(f"{col}: {e}")
+    for i, col in enumerate(REQUIRED):
+        if out[i] is None:
+            raise ValueError(f"{col}: required")
+    pickup, delivery = out[3], out[4]
+    if (pickup.tzinfo is None) == (delivery.tzinfo is None) and delivery < pickup:
+        raise ValueError("delivery_datetime: before pickup_datetime")
+    return tuple(out)
+
+
+async def _records(chunks: AsyncIterator[bytes], quoted: bool) -> AsyncIterator[str]:
+    """
+    Split a byte stream into records: one per line, except that with quoted=True
+    (CSV) a newline inside a "quoted field" doesn't end the record.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()   # chunks may split a character
+    pending = ""
+    quotes = 0
+    async for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        record: List[str] = []
+        for line in lines:
+            line = line.rstrip("\r")
+            if quoted:
+                quotes += line.count('"')
+                record.append(line)
+                if quotes % 2:
+                    continue
+                line = "\n".join(record)
+                record.clear()
+                quotes = 0
+            yield line
+        if record:
+            pending = "\n".join(record) + "\n" + pending
+            quotes = 0
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+async def _copy_batch(rows: List[Tuple[Any, ...]], after: Optional["asyncio.Task[None]"]) -> Tuple[int, int]:
+    async with pooled_aconn() as conn:
+        async with conn.transaction(), conn.cursor() as cur:
+            await cur.execute(STAGE_SQL)
+            async with cur.copy(f"COPY loads_stage (ord, {', '.join(LOAD_COLS)}) FROM STDIN") as copy:
+                for row in rows:
+                    await copy.write_row(row)
+            if after is not None:
+                # upserts commit in input order, so a later posting of a load_id wins
+                await asyncio.wait([after])
+            await cur.execute(UPSERT_SQL)
+            inserted, updated = await cur.fetchone()
+    return inserted, updated
+
+
+class IngestReport:
+    def __init__(self) -> None:
+        self.t0 = time.perf_counter()
+        self.rows = 0
+        self.invalid = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.batches: List[Dict[str, Any]] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.t0
+        loaded = self.rows - self.invalid - self.failed
+        return {
+            "rows": self.rows,
+            "invalid": self.invalid,
+            "failed": self.failed,               # valid rows in batches the database rejected
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": loaded - self.inserted - self.updated,   # includes duplicate load_ids in a batch
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.rows / seconds) if seconds > 0 else None,
+            "batches": self.batches,
+        }
+
+
+async def ingest(chunks: AsyncIterator[bytes], fmt: str, batch_size: int = INGEST_BATCH_ROWS) -> Dict[str, Any]:
+    """
+    Stream CSV (with a header row) or NDJSON into `loads`. Each batch of
+    `batch_size` records is validated, COPYed and upserted in its own
+    transaction, so one bad batch doesn't undo the others. The next batch is
+    parsed and COPYed while the previous one's upsert runs.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r} (expected csv or ndjson)")
+    report = IngestReport()
+    header: Optional[List[str]] = None
+    raw: List[str] = []
+    first = 1   # number of raw[0] among the data records (header and blank lines not counted)
+    inflight: Optional["asyncio.Task[None]"] = None
+
+    async def load(rows: List[Tuple[Any, ...]], batch: Dict[str, Any], after: Optional["asyncio.Task[None]"],
+                   t0: float) -> None:
+        try:
+            batch["inserted"], batch["updated"] = await _copy_batch(rows, after)
+            report.inserted += batch["inserted"]
+            report.updated += batch["updated"]
+        except Exception as e:
+            # the whole batch rolled back (e.g. a constraint the validator doesn't know about)
+            batch["error"] = str(e).splitlines()[0]
+            report.failed += len(rows)
+        batch["ms"] = int((time.perf_counter() - t0) * 1000)
+
+    async def flush() -> None:
+        nonlocal raw, first, inflight
+        if not raw:
+            return
+        t0 = time.perf_counter()
+        batch: Dict[str, Any] = {"batch": len(report.batches) + 1, "first_record": first,
+                                 "rows": len(raw), "invalid": 0, "errors": []}
+        if fmt == "csv":
+            parsed: Iterable[Any] = (dict(zip(header or (), r)) for r in csv.reader(raw))
+        else:
+            parsed = raw
+        rows: List[Tuple[Any, ...]] = []
+        for n, rec in enumerate(parsed, first):
+            try:
+                if fmt == "ndjson":
+                    rec = json.loads(rec)
+                    if not isinstance(rec, dict):
+                        raise ValueError("expected a JSON object")
+                rows.append((n,) + validate(rec))
+            except ValueError as e:
+                batch["invalid"] += 1
+                if len(batch["errors"]) < INGEST_MAX_ERRORS:
+                    load_id = rec.get("load_id") if isinstance(rec, dict) else None
+                    batch["errors"].append({"record": n, "load_id": load_id, "error": str(e)})
+        report.rows += len(raw)
+        report.invalid += batch["invalid"]
+        report.batches.append(batch)
+        first += len(raw)
+        raw = []
+        if not rows:
+            batch["ms"] = int((time.perf_counter() - t0) * 1000)
+            return
+        # at most one batch waits behind the running one (two pooled connections)
+        previous = inflight
+        inflight = asyncio.create_task(load(rows, batch, previous, t0))
+        if previous is not None:
+            await previous
+
+    try:
+        async for record in _records(chunks, quoted=fmt == "csv"):
+            if not record.strip():
+                continue
+            if fmt == "csv" and header is None:
+                header = [h.strip().lower() for h in next(csv.reader([record]))]
+                missing = [c for c in REQUIRED if c not in header]
+                if missing:
+                    raise ValueError(f"CSV header is missing required columns: {', '.join(missing)}")
+                continue
+            raw.append(record)
+            if len(raw) >= batch_size:
+                await flush()
+        await flush()
+    finally:
+        if inflight is not None:
+            await inflight
+    if fmt == "csv" and header is None:
+        raise ValueError("empty CSV (no header row)")
+    return report.as_dict()
+
+
+async def _file_chunks(f, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load CSV / NDJSON into the loads table")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_ROWS)
+    parser.add_argument("--errors", action="store_true", help="print per-batch validation errors")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("Database URL not found!")
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    f = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    try:
+        result = asyncio.run(ingest(_file_chunks(f), fmt, args.batch_size))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        f.close()
+    batches = result.pop("batches")
+    for b in batches:
+        if b.get("error") or (args.errors and b["errors"]):
+            print(json.dumps(b, default=str))
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
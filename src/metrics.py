@@ -0,0 +1,112 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# latency buckets in ms (upper bounds), last bucket is +Inf
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; cheap enough to observe on every request."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (None if empty)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(list(self.buckets) + ["+Inf"], self.counts)},
+        }
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+_HISTOGRAMS: Dict[str, Dict[LabelKey, Histogram]] = {}
+_lock = threading.Lock()
+
+
+def observe(metric: str, value_ms: float, **labels: Any) -> None:
+    key: LabelKey = tuple(sorted((k, str(v)) for k, v in labels.items()))
+    family = _HISTOGRAMS.get(metric)
+    if family is None or key not in family:
+        with _lock:
+            family = _HISTOGRAMS.setdefault(metric, {})
+            family.setdefault(key, Histogram())
+    family[key].observe(value_ms)
+
+
+def histograms(metric: str) -> List[Dict[str, Any]]:
+    """Snapshot of every label set recorded for `metric`."""
+    family = _HISTOGRAMS.get(metric) or {}
+    return [{"labels": dict(key), **h.snapshot()} for key, h in list(family.items())]
+
+
+# ---- Prometheus text exposition (GET /metrics) ----
+Sample = Tuple[str, Dict[str, Any], Optional[float]]
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, esc)) + "}"
+
+
+def _num(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def prometheus_text(samples: Sequence[Sample] = (), prefix: str = "fb_") -> str:
+    """
+    Every histogram as a Prometheus histogram (cumulative `le` buckets in ms,
+    _sum, _count), followed by the point-in-time `samples` (name, labels, value).
+    Sample names ending in _total are typed as counters, the rest as gauges;
+    None values are skipped.
+    """
+    lines: List[str] = []
+    for metric, family in sorted(_HISTOGRAMS.items()):
+        name = prefix + metric
+        lines.append(f"# TYPE {name} histogram")
+        for key, h in list(family.items()):
+            labels = dict(key)
+            seen = 0
+            for bound, c in zip(list(h.buckets) + [float("inf")], h.counts):
+                seen += c
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _num(bound)})} {seen}")
+            lines.append(f"{name}_sum{_labels(labels)} {_num(h.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {h.count}")
+    typed = set()
+    for metric, labels, value in samples:
+        if value is None:
+            continue
+        name = prefix + metric
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+        lines.append(f"{name}{_labels(labels)} {_num(value)}")
+    return "\n".join(lines) + "\n"
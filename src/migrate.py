@@ -1,8 +1,13 @@
 
 
-
+import argparse
+import datetime
+import hashlib
 import os
+import re
+import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 from psycopg import sql as psql
 import psycopg
 
@@ -11,40 +16,313 @@ INIT_DIR_CANDIDATES = [
     Path("/app/db/init"),                                    # explicit path (Fly image)
 ]
 
+# schema_migrations: one row per db/init file, applied once in file-name order
+LEDGER_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version      TEXT PRIMARY KEY,              -- file name, e.g. 003_events.sql
+        checksum     TEXT NOT NULL,                 -- sha256 of the file as applied
+        applied_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        duration_ms  INTEGER,
+        baseline     BOOLEAN NOT NULL DEFAULT false -- recorded, not run (pre-ledger database)
+    )
+"""
+MIGRATE_LOCK = "schema_migrations"
+# last file the pre-ledger migrator shipped (008_seed_negotiation.sql); 009 and later
+# came with the ledger, so on an older database they still have to run
+MIGRATIONS_BASELINE = os.getenv("MIGRATIONS_BASELINE", "008")
+OPTIONAL_MARKER = "-- migrate: optional"   # in a file's first lines: failure is skipped, not fatal
+
+# monthly range partitions on the append-only tables; 0 retention keeps every month.
+# Both default to 0: expiring history is opt-in, never a side effect of a deploy
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", "0"))
+NEGOTIATIONS_RETENTION_DAYS = int(os.getenv("NEGOTIATIONS_RETENTION_DAYS", "0"))
+PARTITIONED_TABLES = {   # table -> (range column, retention days)
+    "events": ("ts", EVENTS_RETENTION_DAYS),
+    "negotiations": ("ts", NEGOTIATIONS_RETENTION_DAYS),
+}
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+PARTITION_EXPIRE = os.getenv("PARTITION_EXPIRE", "drop").lower()   # drop | detach (keep as a plain table)
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")  # maintenance gives way to traffic
+PARTITION_NAME_RE = re.compile(r"_p(\d{4})_(\d{2})$")
+
 def find_init_dir() -> Path:
     for p in INIT_DIR_CANDIDATES:
         if p.exists():
             return p
     raise SystemExit("Could not find db/init directory in the image.")
 
-def main():
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        raise SystemExit("Database URL not found!")
-    
-    init_dir = find_init_dir()
-    sql_files = sorted(init_dir.glob("*.sql"))
-    if not sql_files:
-        raise SystemExit(f"No .sql files found in {init_dir}")
-    
-    print(f"[migrate] Using DATABASE_URL={db_url.split('@')[-1]} (redacted user/pass)")
-    print(f"[migrate] Applying {len(sql_files)} file(s) from {init_dir}")
+def _add_months(month: datetime.date, n: int) -> datetime.date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return datetime.date(y, m + 1, 1)
+
+def _this_month() -> datetime.date:
+    return datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+
+def _partition_name(table: str, month: datetime.date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+def is_partitioned(cur, table: str) -> bool:
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+def _partitions(cur, table: str) -> Dict[str, datetime.date]:
+    """Monthly partitions of `table` (by name), excluding the default partition."""
+    cur.execute("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+    """, (table,))
+    out = {}
+    for (name,) in cur.fetchall():
+        m = PARTITION_NAME_RE.search(name)
+        if m and name.startswith(f"{table}_p"):
+            out[name] = datetime.date(int(m.group(1)), int(m.group(2)), 1)
+    return out
+
+def create_partition(cur, table: str, column: str, month: datetime.date) -> str:
+    """
+    Build the month as a plain table and ATTACH it, which only takes SHARE UPDATE
+    EXCLUSIVE on the parent. Rows that already landed in the default partition for
+    that month are moved across first.
+    """
+    name = _partition_name(table, month)
+    lo, hi = psql.Literal(month.isoformat()), psql.Literal(_add_months(month, 1).isoformat())
+    fmt = dict(t=psql.Identifier(table), p=psql.Identifier(name), d=psql.Identifier(f"{table}_default"),
+               c=psql.Identifier(column), lo=lo, hi=hi)
+    cur.execute(psql.SQL("CREATE TABLE {p} (LIKE {t} INCLUDING DEFAULTS INCLUDING GENERATED)").format(**fmt))
+    cur.execute(psql.SQL("""
+        WITH moved AS (DELETE FROM {d} WHERE {c} >= {lo} AND {c} < {hi} RETURNING *)
+        INSERT INTO {p} SELECT * FROM moved
+    """).format(**fmt))
+    # lets ATTACH skip the validation scan of the new table
+    cur.execute(psql.SQL("ALTER TABLE {p} ADD CONSTRAINT {k} CHECK ({c} IS NOT NULL AND {c} >= {lo} AND {c} < {hi})")
+                .format(k=psql.Identifier(f"{name}_bound"), **fmt))
+    cur.execute(psql.SQL("ALTER TABLE {t} ATTACH PARTITION {p} FOR VALUES FROM ({lo}) TO ({hi})").format(**fmt))
+    cur.execute(psql.SQL("ALTER TABLE {p} DROP CONSTRAINT {k}").format(k=psql.Identifier(f"{name}_bound"), **fmt))
+    return name
+
+def convert_to_partitioned(conn, table: str, column: str) -> None:
+    """
+    One-off swap of a plain table for a partitioned one with the same name, columns,
+    id sequence, indexes and triggers, so existing INSERTs and queries keep working.
+    Holds an ACCESS EXCLUSIVE lock on the table while the rows are copied.
+    """
+    old = f"{table}_unpartitioned"
+    with conn.transaction(), conn.cursor() as cur:
+        t, o, c = psql.Identifier(table), psql.Identifier(old), psql.Identifier(column)
+        cur.execute(psql.SQL("LOCK TABLE {} IN ACCESS EXCLUSIVE MODE").format(t))
+        cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        seq = cur.fetchone()[0]
+        cur.execute("SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+                    (table,))
+        index_defs = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal",
+                    (table,))
+        trigger_defs = [r[0] for r in cur.fetchall()]
+        cur.execute("SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped "
+                    "ORDER BY attnum", (table,))
+        cols = [r[0] for r in cur.fetchall()]
+        cur.execute(psql.SQL("SELECT min({c})::date FROM {t}").format(c=c, t=t))
+        first = cur.fetchone()[0]
+
+        cur.execute(psql.SQL("ALTER TABLE {} RENAME TO {}").format(t, o))
+        cur.execute(psql.SQL("""
+            CREATE TABLE {t} (LIKE {o} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STATISTICS)
+            PARTITION BY RANGE ({c})
+        """).format(t=t, o=o, c=c))
+        if seq:
+            cur.execute(psql.SQL("ALTER SEQUENCE {} OWNED BY {}.id").format(psql.SQL(seq), t))
+        cur.execute(psql.SQL("CREATE TABLE {} PARTITION OF {} DEFAULT").format(psql.Identifier(f"{table}_default"), t))
+        month = first.replace(day=1) if first else _this_month()
+        while month <= _add_months(_this_month(), PARTITION_PREMAKE_MONTHS):
+            cur.execute(psql.SQL("CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                psql.Identifier(_partition_name(table, month)), t,
+                psql.Literal(month.isoformat()), psql.Literal(_add_months(month, 1).isoformat())))
+            month = _add_months(month, 1)
+
+        # the range column becomes part of the primary key, so it can't stay NULL
+        select = [psql.SQL("coalesce({}, 'epoch')").format(c) if col == column else psql.Identifier(col) for col in cols]
+        cur.execute(psql.SQL("INSERT INTO {t} ({cols}) SELECT {sel} FROM {o}").format(
+            t=t, o=o, cols=psql.SQL(", ").join(map(psql.Identifier, cols)), sel=psql.SQL(", ").join(select)))
+        cur.execute(psql.SQL("DROP TABLE {}").format(o))
+        cur.execute(psql.SQL("ALTER TABLE {} ADD PRIMARY KEY (id, {})").format(t, c))
+        for ddl in index_defs + trigger_defs:
+            cur.execute(ddl)   # generated before the rename, so they name the new table
+    print(f"[migrate] partitioned {table} by month on {column} ({len(index_defs)} indexes, {len(trigger_defs)} triggers)")
 
-    # Connect and run files one-by-one (transaction per file)
+def maintain_partitions(db_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create the current and next PARTITION_PREMAKE_MONTHS partitions and detach (and
+    by default drop) partitions that lie wholly past the table's retention. Tables
+    that aren't partitioned yet are left alone; `python -m src.migrate` converts them.
+    """
+    db_url = db_url or os.getenv("DATABASE_URL")
+    out: Dict[str, Any] = {}
+    with psycopg.connect(db_url, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute("SET TIME ZONE 'UTC'")   # month bounds are UTC midnights
+        cur.execute(psql.SQL("SET lock_timeout = {}").format(psql.Literal(PARTITION_LOCK_TIMEOUT)))
+        for table, (column, days) in PARTITIONED_TABLES.items():
+            if not is_partitioned(cur, table):
+                continue
+            created: List[str] = []
+            expired: List[str] = []
+            have = set(_partitions(cur, table).values())
+            for n in range(PARTITION_PREMAKE_MONTHS + 1):
+                month = _add_months(_this_month(), n)
+                if month in have:
+                    continue
+                try:
+                    with conn.transaction():
+                        created.append(create_partition(cur, table, column, month))
+                except Exception as e:
+                    print(f"[migrate] WARN creating {_partition_name(table, month)}: {e}")
+            if days > 0:
+                cutoff = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days)
+                for name, month in sorted(_partitions(cur, table).items(), key=lambda kv: kv[1]):
+                    if _add_months(month, 1) > cutoff:
+                        continue
+                    try:
+                        with conn.transaction():
+                            cur.execute(psql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                                psql.Identifier(table), psql.Identifier(name)))
+                            if PARTITION_EXPIRE == "drop":
+                                cur.execute(psql.SQL("DROP TABLE {}").format(psql.Identifier(name)))
+                        expired.append(name)
+                    except Exception as e:
+                        print(f"[migrate] WARN expiring {name}: {e}")
+            out[table] = {"created": created, "dropped" if PARTITION_EXPIRE == "drop" else "detached": expired}
+    return out
+
+def partition_tables(db_url: str, dry_run: bool = False) -> None:
     with psycopg.connect(db_url) as conn:
+        conn.execute("SET TIME ZONE 'UTC'")
+        conn.commit()
+        for table, (column, _) in PARTITIONED_TABLES.items():
+            with conn.cursor() as cur:
+                exists = cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,)).fetchone()[0]
+                partitioned = is_partitioned(cur, table)
+            conn.commit()
+            if exists and not partitioned:
+                if dry_run:
+                    print(f"[migrate] would partition {table} by month on {column}")
+                    continue
+                try:
+                    convert_to_partitioned(conn, table, column)
+                except Exception as e:
+                    print(f"[migrate] WARN partitioning {table}: {e}")
+    if not dry_run:
+        print(f"[migrate] partitions: {maintain_partitions(db_url)}")
+
+def _checksum(sql: str) -> str:
+    return hashlib.sha256(sql.replace("\r\n", "\n").encode("utf-8")).hexdigest()
+
+def _optional(sql: str) -> bool:
+    return any(line.strip() == OPTIONAL_MARKER for line in sql.splitlines()[:5])
+
+def _ledger(conn) -> Optional[Dict[str, str]]:
+    """version -> checksum of applied files, or None when there is no ledger yet."""
+    with conn.cursor() as cur:
+        if not cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL").fetchone()[0]:
+            return None
+        return dict(cur.execute("SELECT version, checksum FROM schema_migrations").fetchall())
+
+def _baseline_files(conn, sql_files: List[Path]) -> List[Path]:
+    """
+    Files to record as applied (without running them) on the first ledger run
+    against a database the old run-everything migrator already set up: the ones
+    it shipped with (<= MIGRATIONS_BASELINE), whose seed INSERTs and ALTERs must
+    not run twice. Empty for a fresh database.
+    """
+    with conn.cursor() as cur:
+        if not cur.execute("SELECT to_regclass('negotiations') IS NOT NULL").fetchone()[0]:
+            return []
+    return [f for f in sql_files if f.name.split("_", 1)[0] <= MIGRATIONS_BASELINE]
+
+def _baseline(conn, sql_files: List[Path]) -> None:
+    with conn.transaction(), conn.cursor() as cur:
+        cur.execute(LEDGER_SQL)
+        for f in _baseline_files(conn, sql_files):
+            cur.execute("INSERT INTO schema_migrations (version, checksum, baseline) VALUES (%s, %s, true)",
+                        (f.name, _checksum(f.read_text(encoding="utf-8"))))
+            print(f"[migrate] baseline {f.name}")
+
+def migrate(db_url: str, dry_run: bool = False, allow_changed: bool = False) -> int:
+    """
+    Apply every db/init file not yet in schema_migrations, each in its own
+    transaction together with its ledger row. Returns the number of failed files.
+    """
+    t0 = time.perf_counter()
+    sql_files = sorted(find_init_dir().glob("*.sql"))
+    if not sql_files:
+        raise SystemExit("No .sql files found in db/init")
+    failed = 0
+    # autocommit: each file gets its own real transaction below
+    with psycopg.connect(db_url, autocommit=True) as conn:
+        # concurrent boots queue here; whoever comes second finds nothing left to do
+        if not dry_run:
+            conn.execute("SELECT pg_advisory_lock(hashtext(%s))", (MIGRATE_LOCK,))
+        applied = _ledger(conn)
+        if applied is None:
+            if dry_run:
+                applied = {f.name: _checksum(f.read_text(encoding="utf-8")) for f in _baseline_files(conn, sql_files)}
+                for name in applied:
+                    print(f"[migrate] would baseline {name}")
+            else:
+                _baseline(conn, sql_files)
+                applied = _ledger(conn)
+        applied = applied or {}
+
+        pending = []
         for f in sql_files:
             sql = f.read_text(encoding="utf-8")
-            print(f"[migrate] -> {f.name} ({len(sql)} bytes)")
+            if f.name not in applied:
+                pending.append((f, sql))
+            elif applied[f.name] != _checksum(sql):
+                print(f"[migrate] CHANGED {f.name}: edited after it was applied (add a new file instead)")
+                failed += 0 if allow_changed else 1
+        print(f"[migrate] {len(sql_files) - len(pending)} applied, {len(pending)} pending")
+
+        for f, sql in ([] if failed else pending):
+            if dry_run:
+                print(f"[migrate] pending {f.name} ({len(sql)} bytes)")
+                continue
+            t_file = time.perf_counter()
             try:
-                with conn.transaction():
-                    with conn.cursor() as cur:
-                        cur.execute(psql.SQL(sql))# type: ignore[arg-type]
-                print(f"[migrate] OK  {f.name}")
+                with conn.transaction(), conn.cursor() as cur:
+                    cur.execute(psql.SQL(sql))# type: ignore[arg-type]
+                    ms = int((time.perf_counter() - t_file) * 1000)
+                    cur.execute("INSERT INTO schema_migrations (version, checksum, duration_ms) VALUES (%s, %s, %s)",
+                                (f.name, _checksum(sql), ms))
+                print(f"[migrate] OK  {f.name} ({ms} ms)")
             except Exception as e:
-                # Don’t fail the whole deploy for harmless extension errors, etc.
-                print(f"[migrate] WARN {f.name}: {e}")
+                if _optional(sql):
+                    # e.g. an extension this Postgres doesn't ship; retried on the next run
+                    print(f"[migrate] SKIP {f.name} (optional): {e}")
+                    continue
+                print(f"[migrate] FAIL {f.name}: {e}")
+                failed += 1
+                break   # later files may depend on this one
+
+        if not failed:
+            partition_tables(db_url, dry_run)
+        if not dry_run:
+            conn.execute("SELECT pg_advisory_unlock(hashtext(%s))", (MIGRATE_LOCK,))
+    print(f"[migrate] {'Dry run done' if dry_run else 'Done'} in {int((time.perf_counter() - t0) * 1000)} ms.")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending db/init migrations")
+    parser.add_argument("--dry-run", action="store_true", help="list pending files without applying them")
+    parser.add_argument("--allow-changed", action="store_true",
+                        help="warn instead of failing when an applied file was edited")
+    args = parser.parse_args()
 
-    print("[migrate] Done.")
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("Database URL not found!")
+    print(f"[migrate] Using DATABASE_URL={db_url.split('@')[-1]} (redacted user/pass)")
+    if migrate(db_url, dry_run=args.dry_run, allow_changed=args.allow_changed):
+        raise SystemExit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
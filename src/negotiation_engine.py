@@ -0,0 +1,114 @@
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .negotiation_turns import _price
+
+# Local pricing rules for /negotiate/start. Each round the carrier asks a price for a
+# load posted at loadboard_rate R; the broker side answers one of:
+#   accept    the ask is at most R * (1 + NEGOTIATION_ACCEPT_MARGIN), at most the
+#             broker's last counter, or at most the ceiling on the last round
+#   counter   otherwise; counters concede from the floor R * (1 - NEGOTIATION_FLOOR_MARGIN)
+#             to the ceiling R * (1 + NEGOTIATION_CEILING_MARGIN) over max_rounds, never
+#             go down between rounds and are rounded down to NEGOTIATION_PRICE_STEP
+#   escalate  anything the rules can't settle: no rate or no price, an ask further than
+#             NEGOTIATION_ESCALATE_MARGIN from R either way (typo, or needs a reason),
+#             a carrier raising its own ask, or an ask above the ceiling on the last round
+# Only escalations go to the negotiation workflow (NEGOTIATION_WEBHOOK_URL). With
+# NEGOTIATION_MAX_RATE_PER_MILE set and the load's miles known, the ceiling is also
+# capped at miles * that rate (but never below R).
+NEGOTIATION_ENGINE = os.getenv("NEGOTIATION_ENGINE", "true").lower() in ("1", "true", "yes")
+NEGOTIATION_ACCEPT_MARGIN = float(os.getenv("NEGOTIATION_ACCEPT_MARGIN", "0.02"))
+NEGOTIATION_FLOOR_MARGIN = float(os.getenv("NEGOTIATION_FLOOR_MARGIN", "0.0"))
+NEGOTIATION_CEILING_MARGIN = float(os.getenv("NEGOTIATION_CEILING_MARGIN", "0.10"))
+NEGOTIATION_ESCALATE_MARGIN = float(os.getenv("NEGOTIATION_ESCALATE_MARGIN", "0.30"))
+NEGOTIATION_MAX_RATE_PER_MILE = float(os.getenv("NEGOTIATION_MAX_RATE_PER_MILE", "0"))   # $/mile; 0 = no cap
+NEGOTIATION_PRICE_STEP = float(os.getenv("NEGOTIATION_PRICE_STEP", "5"))
+NEGOTIATION_MAX_ROUNDS = 3      # same cap as the workflow's constraints.max_rounds
+
+ACCEPT, COUNTER, ESCALATE = "accept", "counter", "escalate"
+COUNTERS: Dict[str, int] = {ACCEPT: 0, COUNTER: 0, ESCALATE: 0}
+
+
+@dataclass
+class Decision:
+    action: str
+    price: Optional[float]
+    reason: str
+
+
+def _money(v: float) -> str:
+    return f"${v:,.0f}" if v == int(v) else f"${v:,.2f}"
+
+
+def band(rate: float, miles: Optional[float] = None) -> tuple:
+    """(floor, ceiling) the broker counters within for a load at `rate`."""
+    floor = rate * (1 - NEGOTIATION_FLOOR_MARGIN)
+    ceiling = rate * (1 + NEGOTIATION_CEILING_MARGIN)
+    if NEGOTIATION_MAX_RATE_PER_MILE > 0 and miles:
+        ceiling = max(rate, min(ceiling, miles * NEGOTIATION_MAX_RATE_PER_MILE))
+    return min(floor, ceiling), ceiling
+
+
+def _history(entry: Dict[str, Any]) -> tuple:
+    """(broker offers so far, broker's last offer, carrier's last ask) of a session entry."""
+    summary = entry.get("summary") or {}
+    offers = summary.get("ai_turns", 0)
+    last_offer, last_ask = summary.get("ai_last_price"), summary.get("user_last_price")
+    for t in entry.get("turns", ()):
+        if t["role"] == "user":
+            last_ask = t["price"] if t["price"] is not None else last_ask
+        else:
+            offers += 1
+            last_offer = t["price"] if t["price"] is not None else last_offer
+    return offers, last_offer, last_ask
+
+
+def decide(load: Dict[str, Any], ask: Any, max_rounds: Any, entry: Dict[str, Any]) -> Decision:
+    """
+    The broker's answer to this round's `ask`, given the load (loadboard_rate or
+    price, miles) and the session entry *before* this round's turn is appended.
+    """
+    rate, miles, ask = _price(load.get("loadboard_rate", load.get("price"))), _price(load.get("miles")), _price(ask)
+    if not rate or rate <= 0:
+        return Decision(ESCALATE, None, "no loadboard rate for this load")
+    if ask is None or ask <= 0:
+        return Decision(ESCALATE, None, "no price in the request")
+    if abs(ask - rate) > rate * NEGOTIATION_ESCALATE_MARGIN:
+        return Decision(ESCALATE, None, f"ask {_money(ask)} is far from the posted {_money(rate)}")
+
+    offers, last_offer, last_ask = _history(entry)
+    if last_ask is not None and ask > last_ask:
+        return Decision(ESCALATE, None, f"carrier raised its ask from {_money(last_ask)} to {_money(ask)}")
+
+    try:
+        rounds = min(NEGOTIATION_MAX_ROUNDS, max(1, int(max_rounds or NEGOTIATION_MAX_ROUNDS)))
+    except (TypeError, ValueError):
+        rounds = NEGOTIATION_MAX_ROUNDS
+    floor, ceiling = band(rate, miles)
+    per_mile = f" ({_money(ask / miles)}/mile)" if miles else ""
+    if ask <= min(rate * (1 + NEGOTIATION_ACCEPT_MARGIN), ceiling) or (last_offer is not None and ask <= last_offer):
+        return Decision(ACCEPT, ask, f"{_money(ask)}{per_mile} works for us. The load is yours.")
+    if offers + 1 >= rounds:
+        if ask <= ceiling:
+            return Decision(ACCEPT, ask, f"Final round: we can meet you at {_money(ask)}{per_mile}. The load is yours.")
+        return Decision(ESCALATE, None, f"ask {_money(ask)} is above the ceiling {_money(ceiling)} on the last round")
+
+    target = floor + (ceiling - floor) * offers / max(1, rounds - 1)
+    step = NEGOTIATION_PRICE_STEP or 1
+    offer = math.floor(max(target, last_offer or floor) / step) * step
+    if offer >= ask:
+        return Decision(ACCEPT, ask, f"{_money(ask)}{per_mile} works for us. The load is yours.")
+    return Decision(COUNTER, offer, f"We can do {_money(offer)} on this load"
+                    + (f", {_money(offer / miles)}/mile over {miles:g} miles." if miles else "."))
+
+
+def count(decision: Decision) -> None:
+    COUNTERS[decision.action] += 1
+
+
+def stats() -> Dict[str, Any]:
+    total = sum(COUNTERS.values())
+    return {"enabled": NEGOTIATION_ENGINE, **COUNTERS,
+            "local_rate": round(1 - COUNTERS[ESCALATE] / total, 4) if total else None}
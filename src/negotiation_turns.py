@@ -0,0 +1,161 @@
+import datetime
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import psycopg
+
+from .batch_writer import BLOCK, BatchWriter
+from .db_pool import pooled_aconn
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# A session entry keeps only the last NEGOTIATION_HISTORY_WINDOW turns plus a running
+# summary of the ones that scrolled out, so the entry, the state-store write and the
+# history sent to HappyRobot stay the same size however many rounds a session runs.
+# Every turn is also appended to negotiation_turns (db/init/017_negotiation_turns.sql).
+NEGOTIATION_HISTORY_WINDOW = int(os.getenv("NEGOTIATION_HISTORY_WINDOW", "6"))
+NEGOTIATION_TURN_CHARS = int(os.getenv("NEGOTIATION_TURN_CHARS", "500"))   # per message in the window
+TURNS_BATCH_SIZE = int(os.getenv("TURNS_BATCH_SIZE", "200"))
+TURNS_FLUSH_INTERVAL = float(os.getenv("TURNS_FLUSH_INTERVAL", "0.5"))
+
+TURN_COLS = ("session_id", "seq", "role", "ts", "message", "price", "cur_round")
+INSERT_TURN_SQL = f"""
+    INSERT INTO negotiation_turns ({', '.join(TURN_COLS)})
+    VALUES (%s, %s, %s, %s::timestamptz, %s, %s, %s)
+    ON CONFLICT DO NOTHING
+"""
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _price(value: Any) -> Optional[float]:
+    """'$1,250', '1250.5', 1250 -> float; anything without a number -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _NUMBER.search(str(value).replace(",", ""))
+    return float(m.group()) if m else None
+
+
+def _round(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fold(summary: Dict[str, Any], turn: Dict[str, Any]) -> None:
+    summary["turns"] = summary.get("turns", 0) + 1
+    key = "user" if turn["role"] == "user" else "ai"
+    summary[f"{key}_turns"] = summary.get(f"{key}_turns", 0) + 1
+    price = turn.get("price")
+    if price is None:
+        return
+    summary.setdefault(f"{key}_first_price", price)
+    summary[f"{key}_last_price"] = price
+    summary[f"{key}_min_price"] = min(price, summary.get(f"{key}_min_price", price))
+    summary[f"{key}_max_price"] = max(price, summary.get(f"{key}_max_price", price))
+
+
+def append_turn(entry: Dict[str, Any], role: str, message: Optional[str],
+                price: Any = None, cur_round: Any = None) -> Dict[str, Any]:
+    """
+    Add a turn to a session entry (inside SESS.update) and return the full record
+    for negotiation_turns. Turns leaving the window are folded into entry["summary"].
+    """
+    seq = entry.get("turn_count", 0) + 1
+    message = None if message is None else str(message)
+    turn = {
+        "seq": seq,
+        "role": role,
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "message": message,
+        "price": _price(price),
+        "round": _round(cur_round),
+    }
+    window = entry.setdefault("turns", [])
+    window.append(dict(turn, message=message[:NEGOTIATION_TURN_CHARS] if message else message))
+    while len(window) > NEGOTIATION_HISTORY_WINDOW:
+        _fold(entry.setdefault("summary", {}), window.pop(0))
+    entry["turn_count"] = seq
+    return turn
+
+
+def _money(v: Optional[float]) -> str:
+    return "?" if v is None else f"${v:g}"
+
+
+def history_text(entry: Dict[str, Any]) -> str:
+    """The prompt-ready history: one line for the earlier turns, then the window."""
+    lines = []
+    s = entry.get("summary")
+    if s:
+        line = f"[{s['turns']} earlier turns"
+        if "user_first_price" in s:
+            line += f"; carrier asked {_money(s['user_first_price'])} -> {_money(s['user_last_price'])}"
+        if "ai_first_price" in s:
+            line += (f"; AI offered {_money(s['ai_first_price'])} -> {_money(s['ai_last_price'])}"
+                     f" (range {_money(s['ai_min_price'])}-{_money(s['ai_max_price'])})")
+        lines.append(line + "]")
+    for t in entry.get("turns", ()):
+        if t["role"] == "user":
+            lines.append(f"[User @ {t['at']}] {t['message']} (requested_price={_money(t['price'])})")
+        else:
+            lines.append(f"[AI @ {t['at']}] {t['message']} (offer={_money(t['price'])})")
+    return "\n".join(lines)
+
+
+async def _write_turns(rows: List[tuple]) -> None:
+    try:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.executemany(INSERT_TURN_SQL, rows)
+    except psycopg.errors.UndefinedTable:
+        # 017_negotiation_turns.sql not applied: nothing to keep the rows in
+        print(f"[turns] negotiation_turns missing, dropped {len(rows)} turns")
+
+
+TURN_BUFFER = BatchWriter(
+    "turns",
+    _write_turns,
+    batch_size=TURNS_BATCH_SIZE,
+    flush_interval=TURNS_FLUSH_INTERVAL,
+    policy=BLOCK,
+    requeue_failed=True,
+)
+
+
+async def start_turn_log() -> None:
+    if DATABASE_URL:
+        await TURN_BUFFER.start()
+
+
+async def stop_turn_log() -> None:
+    await TURN_BUFFER.stop()
+
+
+async def log_turn(session_id: str, turn: Dict[str, Any]) -> None:
+    if not TURN_BUFFER.running:
+        return
+    try:
+        # a full queue with the DB down falls back to an inline insert
+        await TURN_BUFFER.awrite((session_id, turn["seq"], turn["role"], turn["at"],
+                                  turn["message"], turn["price"], turn["round"]))
+    except Exception as e:
+        # the session already moved on; the loss is counted in TURN_BUFFER.dropped (/health)
+        print(f"[turns] lost turn {turn['seq']} of session {session_id}: {e}")
+
+
+async def afetch_turns(session_id: str, after_seq: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+    if TURN_BUFFER.running:
+        await TURN_BUFFER.flush()   # include turns still queued
+    async with pooled_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(f"""
+            SELECT {', '.join(TURN_COLS[1:])} FROM negotiation_turns
+            WHERE session_id = %s AND seq > %s
+            ORDER BY seq
+            LIMIT %s
+        """, (session_id, after_seq, limit))
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, r)) for r in await cur.fetchall()]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import psycopg
+
+from .db_pool import pooled_aconn
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# memory = subscribers only see publishes from their own process;
+# postgres = LISTEN/NOTIFY fan-out so any worker / machine can publish
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", os.getenv("STATE_BACKEND", "memory")).lower()
+PUBSUB_CHANNEL = "app_pubsub"
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class Broker:
+    """
+    Topic fan-out for "this job / session changed" signals. Messages are small
+    ({"topic", "data"}); subscribers re-read the state store for the full result,
+    which keeps NOTIFY payloads well under Postgres' 8kB limit.
+    """
+
+    def __init__(self, backend: str = PUBSUB_BACKEND):
+        self.backend = backend
+        self._subs: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+        self.published = 0
+        self.delivered = 0
+
+    @property
+    def uses_postgres(self) -> bool:
+        return self.backend == "postgres" and bool(DATABASE_URL)
+
+    async def start(self) -> None:
+        if self.uses_postgres and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="pubsub-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        # dedicated connection: LISTEN holds it for the lifetime of the app
+        assert DATABASE_URL
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {PUBSUB_CHANNEL}")
+                    async for note in conn.notifies():
+                        try:
+                            self._deliver(json.loads(note.payload))
+                        except ValueError:
+                            continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("[pubsub] listener error, reconnecting:", e)
+                await asyncio.sleep(1)
+
+    def _deliver(self, msg: Dict[str, Any]) -> None:
+        for q in list(self._subs.get(msg.get("topic", ""), ())):
+            if q.full():
+                q.get_nowait()   # slow subscriber: keep the newest signal
+            q.put_nowait(msg)
+            self.delivered += 1
+
+    async def publish(self, topic: str, data: Any = None) -> None:
+        msg = {"topic": topic, "data": data}
+        self.published += 1
+        if self.uses_postgres:
+            try:
+                async with pooled_aconn() as conn:
+                    await conn.execute("SELECT pg_notify(%s, %s)", (PUBSUB_CHANNEL, json.dumps(msg)))
+                return
+            except Exception as e:
+                print("[pubsub] notify failed, delivering locally:", e)
+        self._deliver(msg)
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator["asyncio.Queue[Dict[str, Any]]"]:
+        q: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subs[topic].add(q)
+        try:
+            yield q
+        finally:
+            subs = self._subs.get(topic)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subs[topic]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "postgres" if self.uses_postgres else "memory",
+            "topics": len(self._subs),
+            "subscribers": sum(len(s) for s in self._subs.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+BROKER = Broker()
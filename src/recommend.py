@@ -0,0 +1,347 @@
+import datetime
+from decimal import Decimal
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .db_client import (
+    SEARCH_LOADS_COLS,
+    _arows_to_dicts,
+    _place_filter,
+    _rows_to_dicts,
+    get_aconn,
+    get_conn,
+    get_hot_catalog,
+    normalize_place,
+)
+from .tracing import span
+
+# Ranked load suggestions. Every candidate gets a weighted fit in [0, 1] over:
+#   lane       origin / destination city match (1), same state only (RECOMMEND_STATE_MATCH), else 0
+#   weight     1 / (1 + |weight - target| / RECOMMEND_WEIGHT_SCALE)
+#   miles      1 / (1 + |miles - target| / RECOMMEND_MILES_SCALE)
+#   rate       rate per mile / RECOMMEND_RATE_PER_MILE, capped at 1
+#   pickup     1 / (1 + hours between now and pickup / RECOMMEND_PICKUP_SCALE_HOURS)
+#   equipment  1 when equipment_type matches (case-insensitive), else 0
+# Parts without a target in the request (no origin/destination, weight, miles or
+# equipment) drop out of the weighted mean. rate_min / rate_max are hard filters, and so
+# is RECOMMEND_PICKUP_GRACE_HOURS when set (loads whose pickup passed longer ago than
+# that are not candidates); by default past pickups only score lower.
+#
+# With the load catalog warm the whole candidate set is scored as NumPy columns
+# (LoadCatalog.recommend_loads). Otherwise SQL scores up to RECOMMEND_MAX_CANDIDATES
+# latest pickups (soonest after the grace cutoff, when set) from the covering index idx_loads_recommend
+# (db/init/019_loads_recommend.sql) and joins back only the top k. When the request
+# names a lane, a first round scores only loads on it (city indexes); a load off the
+# lane scores at most lane_bound(), so if the k-th score beats that the answer is exact.
+PARTS = ("lane", "weight", "miles", "rate", "pickup", "equipment")
+
+
+def _parse_weights(name: str, default: str) -> Dict[str, float]:
+    # "lane=3,weight=1,miles=1,rate=2,pickup=1,equipment=1"
+    out = {}
+    for part in os.getenv(name, default).split(","):
+        key, _, val = part.partition("=")
+        if key.strip() in PARTS and val.strip():
+            out[key.strip()] = float(val)
+    return out
+
+RECOMMEND_WEIGHTS = _parse_weights("RECOMMEND_WEIGHTS", "lane=3,weight=1,miles=1,rate=2,pickup=1,equipment=1")
+RECOMMEND_WEIGHT_SCALE = float(os.getenv("RECOMMEND_WEIGHT_SCALE", "2000"))          # kg off target that halves the part
+RECOMMEND_MILES_SCALE = float(os.getenv("RECOMMEND_MILES_SCALE", "250"))
+RECOMMEND_RATE_PER_MILE = float(os.getenv("RECOMMEND_RATE_PER_MILE", "3.0"))         # $/mile that scores 1
+RECOMMEND_PICKUP_SCALE_HOURS = float(os.getenv("RECOMMEND_PICKUP_SCALE_HOURS", "48"))
+_GRACE = os.getenv("RECOMMEND_PICKUP_GRACE_HOURS", "")
+RECOMMEND_PICKUP_GRACE_HOURS = float(_GRACE) if _GRACE.strip() else None   # None = past pickups stay candidates
+RECOMMEND_STATE_MATCH = float(os.getenv("RECOMMEND_STATE_MATCH", "0.25"))
+RECOMMEND_MAX_CANDIDATES = int(os.getenv("RECOMMEND_MAX_CANDIDATES", "250000"))     # soonest pickups scored
+RECOMMEND_TIMEOUT_MS = int(os.getenv("RECOMMEND_TIMEOUT_MS", "1000"))                # SQL path statement_timeout
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Query:
+    """A recommendation request, normalized once for both scoring paths."""
+
+    def __init__(self, origin: Optional[str] = None, destination: Optional[str] = None,
+                 weight_kg: Optional[float] = None, miles: Optional[float] = None,
+                 equipment_type: Optional[str] = None, rate_min: Optional[float] = None,
+                 rate_max: Optional[float] = None, limit: int = 10,
+                 weights: Optional[Dict[str, float]] = None,
+                 now: Optional[datetime.datetime] = None):
+        self.origin_text, self.destination_text = origin, destination
+        self.origin = normalize_place(origin) if origin else None
+        self.destination = normalize_place(destination) if destination else None
+        self.weight_kg = float(weight_kg) if weight_kg else None
+        self.miles = float(miles) if miles else None
+        self.equipment = equipment_type.strip().lower() if equipment_type and equipment_type.strip() else None
+        self.rate_min = float(rate_min) if rate_min is not None else None
+        self.rate_max = float(rate_max) if rate_max is not None else None
+        self.limit = int(limit)
+        self.now = now or datetime.datetime.now(datetime.timezone.utc)
+        self.since = (None if RECOMMEND_PICKUP_GRACE_HOURS is None
+                      else self.now - datetime.timedelta(hours=RECOMMEND_PICKUP_GRACE_HOURS))
+        given = {
+            "lane": bool(self.origin or self.destination),
+            "weight": self.weight_kg is not None,
+            "miles": self.miles is not None,
+            "rate": True,
+            "pickup": True,
+            "equipment": self.equipment is not None,
+        }
+        merged = {**RECOMMEND_WEIGHTS, **(weights or {})}
+        self.weights = {p: merged[p] for p in PARTS if given[p] and merged.get(p, 0) > 0}
+
+
+# ---- vectorized scoring (LoadCatalog) ----
+
+def _closeness(x: np.ndarray, target: float, scale: float) -> np.ndarray:
+    return np.nan_to_num(1.0 / (1.0 + np.abs(x - target) / scale), nan=0.0)
+
+
+def score_columns(q: Query, cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Score every row of `cols` (lane_origin / lane_destination match levels, weight,
+    miles, rate, pickup in epoch microseconds, equipment match). Returns the weighted
+    total and the active parts.
+    """
+    parts: Dict[str, np.ndarray] = {}
+    if "lane" in q.weights:
+        sides = [cols[f"lane_{s}"] for s in ("origin", "destination") if getattr(q, s)]
+        parts["lane"] = sum(sides) / len(sides)
+    if "weight" in q.weights:
+        parts["weight"] = _closeness(cols["weight"], q.weight_kg, RECOMMEND_WEIGHT_SCALE)
+    if "miles" in q.weights:
+        parts["miles"] = _closeness(cols["miles"], q.miles, RECOMMEND_MILES_SCALE)
+    if "rate" in q.weights:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rpm = np.where(cols["miles"] > 0, cols["rate"] / cols["miles"], np.nan)
+        parts["rate"] = np.nan_to_num(np.clip(rpm / RECOMMEND_RATE_PER_MILE, 0.0, 1.0), nan=0.0)
+    if "pickup" in q.weights:
+        now_us = (q.now - _EPOCH) // datetime.timedelta(microseconds=1)
+        hours = np.abs(cols["pickup"] - now_us) / 3.6e9
+        parts["pickup"] = 1.0 / (1.0 + hours / RECOMMEND_PICKUP_SCALE_HOURS)
+    if "equipment" in q.weights:
+        parts["equipment"] = cols["equipment"].astype(np.float64)
+    total = sum(q.weights[p] * a for p, a in parts.items()) / sum(q.weights.values())
+    return total, parts
+
+
+def top_k(score: np.ndarray, ids: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k best scores, best first, ties by id (bytewise, as COLLATE "C")."""
+    if k < len(score):
+        # everything tied with the k-th score stays in, so the id tie-break is exact
+        kth = np.partition(score, len(score) - k)[len(score) - k]
+        cand = np.flatnonzero(score >= kth)
+    else:
+        cand = np.arange(len(score))
+    return cand[np.lexsort((ids[cand], -score[cand]))][:k]
+
+
+def attach_scores(rows: List[Dict[str, Any]], total: np.ndarray, parts: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    for i, row in enumerate(rows):
+        row["score"] = round(float(total[i]), 4)
+        row["score_parts"] = {p: round(float(a[i]), 4) for p, a in parts.items()}
+    return rows
+
+
+# ---- SQL scoring ----
+
+def _lane_sql(prefix: str, place: Tuple[str, Optional[str]]) -> Tuple[str, List[Any]]:
+    # full match has the same semantics as db_client._place_filter (non-fuzzy)
+    city, state = place
+    if state:
+        return (f"CASE WHEN {prefix}_city = %s AND {prefix}_state LIKE %s THEN 1.0 "
+                f"WHEN {prefix}_state = %s THEN %s ELSE 0.0 END",
+                [city, _like_prefix(state), state, RECOMMEND_STATE_MATCH])
+    return f"CASE WHEN {prefix}_city LIKE %s THEN 1.0 ELSE 0.0 END", [_like_prefix(city)]
+
+
+def _like_prefix(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _parts_sql(q: Query) -> Tuple[List[str], List[Any]]:
+    exprs, params = [], []
+    for p in q.weights:
+        if p == "lane":
+            sides = [_lane_sql(s, getattr(q, s)) for s in ("origin", "destination") if getattr(q, s)]
+            exprs.append(f"(({' + '.join(e for e, _ in sides)}) / {len(sides)}.0)")
+            params += [x for _, ps in sides for x in ps]
+        elif p in ("weight", "miles"):
+            scale = RECOMMEND_WEIGHT_SCALE if p == "weight" else RECOMMEND_MILES_SCALE
+            exprs.append(f"COALESCE(1.0 / (1.0 + ABS({p} - %s)::float8 / %s), 0.0)")
+            params += [q.weight_kg if p == "weight" else q.miles, scale]
+        elif p == "rate":
+            exprs.append("COALESCE(LEAST(GREATEST(loadboard_rate::float8 / NULLIF(miles, 0) / %s, 0.0), 1.0), 0.0)")
+            params.append(RECOMMEND_RATE_PER_MILE)
+        elif p == "pickup":
+            exprs.append("1.0 / (1.0 + abs(date_part('epoch', pickup_datetime - %s::timestamptz)) / 3600.0 / %s)")
+            params += [q.now, RECOMMEND_PICKUP_SCALE_HOURS]
+        elif p == "equipment":
+            exprs.append("CASE WHEN lower(equipment_type) = %s THEN 1.0 ELSE 0.0 END")
+            params.append(q.equipment)
+    return [f"({e})::float8 AS part_{p}" for e, p in zip(exprs, q.weights)], params
+
+
+def _build_recommend_sql(q: Query, lane_only: bool = False) -> Tuple[str, List[Any]]:
+    """
+    Innermost: the RECOMMEND_MAX_CANDIDATES latest pickups (soonest from q.since when the
+    grace cutoff is set), an index-only range scan on
+    idx_loads_recommend (or, lane_only, the loads matching the origin or destination).
+    Middle: parts, weighted score, top k. Outer: full rows for those k.
+    """
+    parts, part_params = _parts_sql(q)
+    part_cols = [f"part_{p}" for p in q.weights]
+    total = " + ".join(f"%s * part_{p}" for p in q.weights)
+    total_params = list(q.weights.values())
+    where, where_params = ["TRUE"], []
+    if q.since is not None:
+        where, where_params = ["pickup_datetime >= %s"], [q.since]
+    order = candidate_order(q)
+    if q.rate_min is not None:
+        # numeric params keep the comparison on the column's own type (and inside the index)
+        where.append("loadboard_rate >= %s")
+        where_params.append(Decimal(str(q.rate_min)))
+    if q.rate_max is not None:
+        where.append("loadboard_rate <= %s")
+        where_params.append(Decimal(str(q.rate_max)))
+    if lane_only:
+        # same candidates as the full round: nothing past its last (capped) pickup
+        edge = "<= COALESCE(({}), 'infinity')" if order == "ASC" else ">= COALESCE(({}), '-infinity')"
+        where.append("pickup_datetime " + edge.format(f"""
+            SELECT pickup_datetime FROM loads WHERE {" AND ".join(where)}
+            ORDER BY pickup_datetime {order} OFFSET %s LIMIT 1"""))
+        where_params += where_params + [RECOMMEND_MAX_CANDIDATES - 1]
+        sides = [_place_filter(s, text) for s, text in
+                 (("origin", q.origin_text), ("destination", q.destination_text)) if text]
+        where.append("(" + " OR ".join(frag for frag, _ in sides) + ")")
+        where_params += [x for _, ps in sides for x in ps]
+    sql = f"""
+        SELECT {", ".join(f"l.{c}" for c in SEARCH_LOADS_COLS)}, s.score, {", ".join(part_cols)}
+        FROM (
+            SELECT load_id, {", ".join(part_cols)},
+                   ({total}) / %s AS score
+            FROM (
+                SELECT load_id, {", ".join(parts)}
+                FROM (
+                    SELECT load_id, origin_city, origin_state, destination_city, destination_state,
+                           weight, miles, loadboard_rate, pickup_datetime, equipment_type
+                    FROM loads
+                    WHERE {" AND ".join(where)}
+                    ORDER BY pickup_datetime {order}
+                    LIMIT %s
+                ) c
+                OFFSET 0    -- keeps the parts from being inlined (and evaluated again) in score
+            ) p
+            ORDER BY score DESC, load_id COLLATE "C"
+            LIMIT %s
+        ) s
+        JOIN loads l USING (load_id)
+        ORDER BY s.score DESC, s.load_id COLLATE "C"
+    """
+    params = (total_params + [sum(q.weights.values())] + part_params + where_params
+              + [RECOMMEND_MAX_CANDIDATES, q.limit])
+    return sql, params
+
+
+def candidate_order(q: Query) -> str:
+    # with the grace cutoff: the soonest pickups after it; without: the latest pickups,
+    # which hold every upcoming load on any table up to RECOMMEND_MAX_CANDIDATES rows
+    return "ASC" if q.since is not None else "DESC"
+
+
+def lane_bound(q: Query) -> float:
+    """Best possible score of a load matching neither the origin nor the destination city."""
+    # off the lane, a side scores at most the state match, and only when a state was given
+    sides = [RECOMMEND_STATE_MATCH if place[1] else 0.0 for place in (q.origin, q.destination) if place]
+    lane = sum(sides) / len(sides) if sides else 0.0
+    return 1.0 - q.weights.get("lane", 0.0) * (1.0 - lane) / sum(q.weights.values())
+
+
+def _recommend_rounds(q: Query):
+    if "lane" in q.weights:
+        yield lane_bound(q), _build_recommend_sql(q, lane_only=True)
+    yield None, _build_recommend_sql(q)
+
+
+def _recommend_done(rows: List[Dict[str, Any]], bound: Optional[float], limit: int) -> bool:
+    return bound is None or (len(rows) >= limit and rows[-1]["score"] >= bound)
+
+
+def _sql_rows(q: Query, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in rows:
+        row["score"] = round(row["score"], 4)
+        row["score_parts"] = {p: round(row.pop(f"part_{p}"), 4) for p in q.weights}
+    return rows
+
+
+def recommend_loads(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    weight_kg: Optional[float] = None,
+    miles: Optional[float] = None,
+    equipment_type: Optional[str] = None,
+    rate_min: Optional[float] = None,
+    rate_max: Optional[float] = None,
+    limit: int = 10,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Top `limit` loads by weighted fit (see the module comment), best first. Rows are
+    search_loads rows plus `score` and `score_parts`. Fail-soft: [] on a database error.
+    """
+    q = Query(origin, destination, weight_kg, miles, equipment_type, rate_min, rate_max, limit, weights)
+    catalog = get_hot_catalog()
+    if catalog is not None:
+        with span("recommend", "catalog"):
+            return catalog.recommend_loads(q)
+    rows: List[Dict[str, Any]] = []
+    try:
+        with span("recommend", "sql"), get_conn() as conn, conn.cursor() as cur:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(RECOMMEND_TIMEOUT_MS),))
+            for bound, (sql, params) in _recommend_rounds(q):
+                cur.execute(sql, params)
+                rows = _rows_to_dicts(cur)
+                if _recommend_done(rows, bound, q.limit):
+                    break
+        return _sql_rows(q, rows)
+    except Exception as e:
+        print("[recommend] query failed:", e)
+        return []
+
+
+async def arecommend_loads(
+    origin: Optional[str] = None,
+    destination: Optional[str] = None,
+    weight_kg: Optional[float] = None,
+    miles: Optional[float] = None,
+    equipment_type: Optional[str] = None,
+    rate_min: Optional[float] = None,
+    rate_max: Optional[float] = None,
+    limit: int = 10,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Async variant of recommend_loads.
+    """
+    q = Query(origin, destination, weight_kg, miles, equipment_type, rate_min, rate_max, limit, weights)
+    catalog = get_hot_catalog()
+    if catalog is not None:
+        with span("recommend", "catalog"):
+            return catalog.recommend_loads(q)
+    rows: List[Dict[str, Any]] = []
+    try:
+        with span("recommend", "sql"):
+            async with get_aconn() as conn, conn.cursor() as cur:
+                await cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(RECOMMEND_TIMEOUT_MS),))
+                for bound, (sql, params) in _recommend_rounds(q):
+                    await cur.execute(sql, params)
+                    rows = await _arows_to_dicts(cur)
+                    if _recommend_done(rows, bound, q.limit):
+                        break
+        return _sql_rows(q, rows)
+    except Exception as e:
+        print("[recommend] query failed:", e)
+        return []
@@ -0,0 +1,72 @@
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence
+
+from jinja2 import Environment, FileSystemLoader, Template
+
+from .db_client import encode_cursor
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+RENDER_CHUNK_BYTES = 16 * 1024   # coalesce template output into writes of about this size
+
+# autoescaped, async so templates can loop over rows straight off a server-side cursor
+ENV = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    enable_async=True,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+
+
+def template(name: str) -> Template:
+    return ENV.get_template(name)
+
+
+async def render_stream(tmpl: Template, **context: Any) -> AsyncIterator[str]:
+    """Render `tmpl` in one pass, yielding the output in RENDER_CHUNK_BYTES pieces as it is produced."""
+    buf = []
+    size = 0
+    async for piece in tmpl.generate_async(**context):
+        buf.append(piece)
+        size += len(piece)
+        if size >= RENDER_CHUNK_BYTES:
+            yield "".join(buf)
+            buf.clear()
+            size = 0
+    if buf:
+        yield "".join(buf)
+
+
+class Page:
+    """
+    Async-iterable page of rows for a template. The query should ask for limit + 1
+    rows; the extra one only sets `next_cursor`, which templates read after the loop.
+    """
+
+    def __init__(self, rows: AsyncIterator[tuple], cols: Sequence[str], limit: int,
+                 key: Callable[[Dict[str, Any]], tuple]):
+        self._rows = rows
+        self.cols = list(cols)
+        self.limit = limit
+        self._key = key
+        self.next_cursor: Optional[str] = None
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        last = None
+        n = 0
+        async with aclosing(self._rows) as rows:
+            async for r in rows:
+                if n == self.limit:
+                    if last is not None:
+                        self.next_cursor = encode_cursor(*self._key(last))
+                    break
+                last = dict(zip(self.cols, r))
+                n += 1
+                yield last
+
+
+# compiled once at import; every request reuses them
+EVENTS_DASHBOARD = template("events_dashboard.html")
+NEGOTIATIONS_DASHBOARD = template("negotiations_dashboard.html")
@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import psycopg
+from psycopg import sql as psql
+
+from .db_pool import pooled_aconn
+from .migrate import EVENTS_RETENTION_DAYS, maintain_partitions
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# event_rollups_minute / event_rollups_hour (db/init/016_event_rollups.sql) are kept
+# current by a trigger on events; this module only reads and prunes them.
+GRANULARITIES = {"minute": "event_rollups_minute", "hour": "event_rollups_hour"}
+GROUP_COLS = ("source", "name", "route")
+ROLLUP_MINUTE_MAX_HOURS = int(os.getenv("ROLLUP_MINUTE_MAX_HOURS", "24"))   # auto: wider windows read hours
+
+# retention; 0 keeps forever (raw events: EVENTS_RETENTION_DAYS in src/migrate.py)
+ROLLUP_MINUTE_RETENTION_DAYS = int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "14"))
+ROLLUP_HOUR_RETENTION_DAYS = int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "400"))
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))
+RETENTION_BATCH = int(os.getenv("RETENTION_BATCH", "10000"))   # raw events deleted per transaction
+RETENTION_LOCK = "event_retention"                             # one pruner across workers / machines
+
+
+def pick_granularity(hours: float, granularity: str = "auto") -> str:
+    if granularity == "auto":
+        return "minute" if hours <= ROLLUP_MINUTE_MAX_HOURS else "hour"
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"unknown granularity {granularity!r} (expected auto, minute or hour)")
+    return granularity
+
+
+def _rollup_sql(granularity: str, by: Sequence[str], series: bool,
+                filters: Dict[str, str], limit: Optional[int]) -> psql.Composed:
+    bad = [c for c in by if c not in GROUP_COLS]
+    if bad:
+        raise ValueError(f"cannot group by {bad} (expected any of {GROUP_COLS})")
+    keys = (["bucket"] if series else []) + list(by)
+    where = [psql.SQL("bucket >= date_trunc({}, NOW() - %(hours)s * INTERVAL '1 hour')")
+             .format(psql.Literal(granularity))]
+    where += [psql.SQL("{} = %({})s").format(psql.Identifier(c), psql.SQL(c)) for c in filters]
+    cols = psql.SQL(", ").join(psql.Identifier(k) for k in keys)
+    query = psql.SQL("""
+        SELECT {cols}{comma}
+               sum(events)::bigint AS events,
+               sum(errors)::bigint AS errors,
+               sum(duration_sum)::float8 / nullif(sum(timed), 0) AS avg_ms,
+               max(duration_max) AS max_ms,
+               event_hist_quantile(event_hist_sum(hist), 0.5, max(duration_max)) AS p50_ms,
+               event_hist_quantile(event_hist_sum(hist), 0.95, max(duration_max)) AS p95_ms,
+               event_hist_quantile(event_hist_sum(hist), 0.99, max(duration_max)) AS p99_ms
+        FROM {table}
+        WHERE {where}
+        {group}
+        ORDER BY {order}
+    """).format(
+        cols=cols,
+        comma=psql.SQL(",") if keys else psql.SQL(""),
+        table=psql.Identifier(GRANULARITIES[granularity]),
+        where=psql.SQL(" AND ").join(where),
+        group=psql.SQL("GROUP BY {}").format(cols) if keys else psql.SQL(""),
+        order=psql.SQL("bucket DESC, events DESC") if series else psql.SQL("events DESC"),
+    )
+    if limit is not None:
+        query += psql.SQL(" LIMIT %(limit)s")
+    return query
+
+
+async def query_rollups(hours: float = 24, *, granularity: str = "auto",
+                        by: Sequence[str] = ("route", "name"), series: bool = False,
+                        source: Optional[str] = None, name: Optional[str] = None,
+                        route: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Event counts, error counts and duration stats (avg / max / p50 / p95 / p99,
+    estimated from the histogram buckets) over the last `hours`, grouped by `by`.
+    series=True adds the bucket (minute or hour) to the grouping, newest first.
+    """
+    granularity = pick_granularity(hours, granularity)
+    filters = {k: v for k, v in (("source", source), ("name", name), ("route", route)) if v is not None}
+    query = _rollup_sql(granularity, by, series, filters, limit)
+    async with pooled_aconn() as conn, conn.cursor() as cur:
+        await cur.execute(query, {"hours": hours, "limit": limit, **filters})
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in await cur.fetchall()]
+
+
+async def _delete_batched(conn: psycopg.AsyncConnection, days: int) -> int:
+    total = 0
+    while True:
+        cur = await conn.execute("""
+            DELETE FROM events WHERE (id, ts) IN (
+                SELECT id, ts FROM events
+                WHERE ts < NOW() - make_interval(days => %s)
+                ORDER BY ts
+                LIMIT %s
+            )
+        """, (days, RETENTION_BATCH))
+        total += cur.rowcount
+        if cur.rowcount < RETENTION_BATCH:
+            return total
+
+
+async def prune() -> Dict[str, Any]:
+    """
+    Roll the monthly partitions forward (dropping expired months), then delete the
+    remaining raw events older than EVENTS_RETENTION_DAYS in RETENTION_BATCH chunks
+    so no lock is held for long, and rollup rows past their own retention. The
+    rollups keep the history the raw rows no longer carry.
+    """
+    assert DATABASE_URL
+    # own autocommit connection: every batch commits, and the session lock is
+    # released with the connection
+    async with await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True) as conn:
+        cur = await conn.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (RETENTION_LOCK,))
+        row = await cur.fetchone()
+        if not (row and row[0]):
+            return {"skipped": "another pruner is running"}
+        out: Dict[str, Any] = {"partitions": await asyncio.to_thread(maintain_partitions, DATABASE_URL)}
+        if EVENTS_RETENTION_DAYS > 0:
+            out["events"] = await _delete_batched(conn, EVENTS_RETENTION_DAYS)
+        for granularity, days in (("minute", ROLLUP_MINUTE_RETENTION_DAYS),
+                                  ("hour", ROLLUP_HOUR_RETENTION_DAYS)):
+            if days > 0:
+                cur = await conn.execute(psql.SQL(
+                    "DELETE FROM {} WHERE bucket < NOW() - make_interval(days => %s)"
+                ).format(psql.Identifier(GRANULARITIES[granularity])), (days,))
+                out[f"rollups_{granularity}"] = cur.rowcount
+        return out
+
+
+async def retention_loop(interval: float = RETENTION_INTERVAL) -> None:
+    """Background task: prune() every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await prune()
+            moved = any(names for t in result.get("partitions", {}).values() for names in t.values())
+            if moved or any(isinstance(v, int) and v for v in result.values()):
+                print("[rollups] pruned", result)
+        except Exception as e:
+            print("[rollups] prune failed:", e)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query or prune the event rollups")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query")
+    q.add_argument("--hours", type=float, default=24)
+    q.add_argument("--granularity", default="auto", choices=["auto", *GRANULARITIES])
+    q.add_argument("--by", default="route,name")
+    q.add_argument("--series", action="store_true")
+    sub.add_parser("prune")
+    args = parser.parse_args()
+
+    if not DATABASE_URL:
+        raise SystemExit("Database URL not found!")
+    if args.cmd == "prune":
+        print(json.dumps(asyncio.run(prune())))
+        return
+    by = [c for c in args.by.split(",") if c]
+    rows = asyncio.run(query_rollups(args.hours, granularity=args.granularity, by=by, series=args.series))
+    for r in rows:
+        print(json.dumps(r, default=str))
+
+
+if __name__ == "__main__":
+    main()
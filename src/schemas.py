@@ -0,0 +1,110 @@
+import math
+from typing import Any, ClassVar, Dict, Optional, Tuple, Union
+
+# Request bodies for the webhook / negotiation endpoints, decoded by
+# json_codec.decode(). With msgspec installed they are Structs: parsed and
+# validated in one pass, numeric strings coerced ("1500" -> 1500, "" -> None).
+# Without it the names are None and decode() hands back a plain dict. Both shapes
+# support body.get(key, default), `key in body` and body[key] = value, so the
+# handlers read them the same way.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _num(value: Any, field: str) -> Any:
+    if isinstance(value, float):
+        # JSON 1 arrives as 1.0 through the float branch of the union
+        return int(value) if value.is_integer() else value
+    if value is None or isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        text = value.strip().lstrip("$").replace(",", "")
+        if not text:
+            return None
+        try:
+            n = float(text)
+        except ValueError:
+            raise ValueError(f"{field}: expected a number, got {value!r}") from None
+        if not math.isfinite(n):    # "nan" / "inf" parse as floats but aren't amounts
+            raise ValueError(f"{field}: expected a number, got {value!r}")
+        return int(n) if n.is_integer() else n
+    raise ValueError(f"{field}: expected a number, got {value!r}")
+
+
+def as_dict(body: Any) -> Dict[str, Any]:
+    """The fields that were actually sent, as a plain dict (for the state store)."""
+    if isinstance(body, dict):
+        return body
+    return {f: v for f in body.__struct_fields__ if (v := getattr(body, f)) is not msgspec.UNSET}
+
+
+if msgspec is not None:
+    UNSET = msgspec.UNSET
+    Num = Union[float, str, None, msgspec.UnsetType]
+    Text = Union[str, None, msgspec.UnsetType]
+
+    class _Body(msgspec.Struct, kw_only=True):
+        _numeric: ClassVar[Tuple[str, ...]] = ()
+
+        def __post_init__(self) -> None:
+            for f in self._numeric:
+                v = getattr(self, f)
+                if v is not UNSET:
+                    setattr(self, f, _num(v, f))
+
+        def get(self, key: str, default: Any = None) -> Any:
+            v = getattr(self, key, UNSET)
+            return default if v is UNSET else v
+
+        def __contains__(self, key: str) -> bool:
+            return getattr(self, key, UNSET) is not UNSET
+
+        def __setitem__(self, key: str, value: Any) -> None:
+            setattr(self, key, value)
+
+    class WebhookBody(_Body):
+        """POST /webhook: a structured search, or free text for the regex fallback."""
+        _numeric: ClassVar[Tuple[str, ...]] = ("weight_kg", "miles", "rate_min", "rate_max", "limit",
+                                               "origin_radius_miles", "destination_radius_miles")
+        job_id: Optional[str] = None
+        echo: Any = None
+        origin: Text = UNSET
+        destination: Text = UNSET
+        weight_kg: Num = UNSET
+        miles: Num = UNSET
+        rate_min: Num = UNSET
+        rate_max: Num = UNSET
+        limit: Num = UNSET
+        equipment_type: Text = UNSET
+        origin_radius_miles: Num = UNSET
+        destination_radius_miles: Num = UNSET
+        fuzzy: Any = False
+        rank: Any = None
+
+    class NegotiationBody(_Body):
+        """POST /negotiate/start and /negotiate/start/v2."""
+        _numeric: ClassVar[Tuple[str, ...]] = ("cur_round", "max_rounds")
+        session_id: Optional[str] = None
+        load: Union[Dict[str, Any], msgspec.UnsetType] = UNSET
+        user_message: Any = None
+        user_requested_price: Any = None
+        cur_round: Num = UNSET
+        max_rounds: Num = UNSET
+        ai_negotiated_price: Any = None
+        ai_negotiated_reason: Any = None
+        history: Optional[str] = None
+        sentiment: Any = None
+
+    class NegotiationResultBody(_Body):
+        """POST /negotiate/result (sent by HappyRobot)."""
+        session_id: Optional[str] = None
+        ai_negotiated_price: Any = None
+        ai_negotiation_reason: Any = None
+
+    class StartCleanBody(_Body):
+        """POST /start_clean."""
+        user_message: Any = None
+else:
+    WebhookBody = NegotiationBody = NegotiationResultBody = StartCleanBody = None
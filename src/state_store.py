@@ -0,0 +1,172 @@
+from abc import ABC, abstractmethod
+import asyncio
+import datetime
+import decimal
+import json
+import os
+from typing import Any, Callable, Dict, Optional
+
+from .cache import MISSING, TTLCache
+from .db_pool import pooled_aconn
+
+# memory = per process (single worker only), postgres = shared by every worker / Fly machine
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_TTL = float(os.getenv("STATE_TTL", "21600"))          # seconds since last write (6h)
+STATE_MAX_ENTRIES = int(os.getenv("STATE_MAX_ENTRIES", "10000"))  # per namespace, memory backend
+STATE_SWEEP_INTERVAL = float(os.getenv("STATE_SWEEP_INTERVAL", "300"))
+
+Value = Dict[str, Any]
+Updater = Callable[[Optional[Value]], Value]
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, (datetime.datetime, datetime.date)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class StateStore(ABC):
+    """
+    Keyed JSON-able state (jobs, negotiation sessions) with expiry.
+    Writes refresh the TTL; expired entries read as missing.
+    """
+
+    def __init__(self, namespace: str, ttl: float = STATE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Value]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Value) -> None:
+        ...
+
+    @abstractmethod
+    async def update(self, key: str, fn: Updater) -> Value:
+        """Atomic read-modify-write: fn gets the current value (or None) and returns the new one."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def purge_expired(self) -> int:
+        return 0
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "namespace": self.namespace, "ttl": self.ttl}
+
+
+class MemoryStateStore(StateStore):
+    """Per-process LRU + TTL dict; O(1) reads/writes and at most `max_size` entries."""
+
+    def __init__(self, namespace: str, ttl: float = STATE_TTL, max_size: int = STATE_MAX_ENTRIES):
+        super().__init__(namespace, ttl)
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Value]:
+        value = self._cache.get(key)
+        return None if value is MISSING else value
+
+    async def set(self, key: str, value: Value) -> None:
+        self._cache.set(key, value)
+
+    async def update(self, key: str, fn: Updater) -> Value:
+        # no await between read and write, so this is atomic on the event loop
+        current = self._cache.get(key)
+        value = fn(None if current is MISSING else current)
+        self._cache.set(key, value)
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    async def purge_expired(self) -> int:
+        return self._cache.purge_expired()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {**await super().stats(), "size": len(self._cache),
+                "max_size": self._cache.max_size, "evictions": self._cache.evictions}
+
+
+class PostgresStateStore(StateStore):
+    """
+    Rows in the UNLOGGED app_state table (db/init/010_app_state.sql), keyed by
+    (namespace, key). Lookups are primary-key probes; update() serializes writers
+    for a key with a transaction-scoped advisory lock.
+    """
+
+    async def get(self, key: str) -> Optional[Value]:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.execute("""
+                SELECT value FROM app_state
+                WHERE namespace = %s AND key = %s AND expires_at > NOW()
+            """, (self.namespace, key))
+            row = await cur.fetchone()
+        return row[0] if row else None
+
+    async def _write(self, cur, key: str, value: Value) -> None:
+        await cur.execute("""
+            INSERT INTO app_state (namespace, key, value, expires_at)
+            VALUES (%s, %s, %s, NOW() + make_interval(secs => %s))
+            ON CONFLICT (namespace, key) DO UPDATE
+            SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+        """, (self.namespace, key, json.dumps(value, default=_json_default), self.ttl))
+
+    async def set(self, key: str, value: Value) -> None:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await self._write(cur, key, value)
+
+    async def update(self, key: str, fn: Updater) -> Value:
+        async with pooled_aconn() as conn:
+            async with conn.transaction(), conn.cursor() as cur:
+                await cur.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))",
+                                  (f"{self.namespace}:{key}",))
+                await cur.execute("""
+                    SELECT value FROM app_state
+                    WHERE namespace = %s AND key = %s AND expires_at > NOW()
+                """, (self.namespace, key))
+                row = await cur.fetchone()
+                value = fn(row[0] if row else None)
+                await self._write(cur, key, value)
+        return value
+
+    async def delete(self, key: str) -> None:
+        async with pooled_aconn() as conn:
+            await conn.execute("DELETE FROM app_state WHERE namespace = %s AND key = %s",
+                               (self.namespace, key))
+
+    async def purge_expired(self) -> int:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.execute("DELETE FROM app_state WHERE namespace = %s AND expires_at <= NOW()",
+                              (self.namespace,))
+            return cur.rowcount
+
+    async def stats(self) -> Dict[str, Any]:
+        async with pooled_aconn() as conn, conn.cursor() as cur:
+            await cur.execute("SELECT count(*) FROM app_state WHERE namespace = %s AND expires_at > NOW()",
+                              (self.namespace,))
+            row = await cur.fetchone()
+        return {**await super().stats(), "size": row[0] if row else 0}
+
+
+def get_store(namespace: str, backend: str = STATE_BACKEND, ttl: float = STATE_TTL) -> StateStore:
+    if backend == "postgres":
+        return PostgresStateStore(namespace, ttl)
+    if backend == "memory":
+        return MemoryStateStore(namespace, ttl)
+    raise ValueError(f"unknown STATE_BACKEND {backend!r} (expected memory or postgres)")
+
+
+async def sweep_expired(*stores: StateStore, interval: float = STATE_SWEEP_INTERVAL) -> None:
+    """Background task: drop expired entries so the shared table stays small."""
+    while True:
+        await asyncio.sleep(interval)
+        for store in stores:
+            try:
+                await store.purge_expired()
+            except Exception as e:
+                print(f"[state_store] purge {store.namespace} failed:", e)
@@ -0,0 +1,228 @@
+import contextvars
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .metrics import observe
+
+# Spans: one per request (TracingMiddleware), per DB statement (db_pool's cursor
+# factory), per pool checkout (db_pool.pooled_conn / pooled_aconn: the wait for a
+# free connection) and per outbound HTTP call (http_clients). Each span
+# feeds the `span_ms` histogram (kind, name) shown on /metrics. Requests slower
+# than TRACE_SLOW_MS are logged once with their spans; nothing is printed otherwise.
+# With OTEL_EXPORTER_OTLP_ENDPOINT set and the `otel` extra installed, spans are
+# also exported over OTLP/HTTP.
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "1000"))        # 0 = never log
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "200"))        # kept per request for the slow log
+TRACE_SERVER_TIMING = os.getenv("TRACE_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "freight-broker-api")
+
+_tracer: Any = None
+
+
+def setup_otel() -> bool:
+    """Start the OTLP exporter if configured; safe to call more than once."""
+    global _tracer
+    if _tracer is not None or not OTEL_ENDPOINT:
+        return _tracer is not None
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        print("[tracing] OTEL_EXPORTER_OTLP_ENDPOINT set but the otel extra is not installed")
+        return False
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    # the exporter appends /v1/traces to the endpoint itself
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("src.tracing")
+    print(f"[tracing] exporting spans to {OTEL_ENDPOINT}")
+    return True
+
+
+def shutdown_otel() -> None:
+    global _tracer
+    if _tracer is not None:
+        from opentelemetry import trace
+        trace.get_tracer_provider().shutdown()
+        _tracer = None
+
+
+class Trace:
+    """Spans recorded while handling one request."""
+    __slots__ = ("id", "spans", "dropped", "totals")
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex[:16]
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.totals: Dict[str, List[float]] = {}    # kind -> [count, ms] for Server-Timing
+
+    def add(self, kind: str, name: str, ms: float, attrs: Dict[str, Any]) -> None:
+        total = self.totals.setdefault(kind, [0, 0.0])
+        total[0] += 1
+        total[1] += ms
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append({"kind": kind, "name": name, "ms": round(ms, 2), **attrs})
+        else:
+            self.dropped += 1
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+class span:
+    """
+    Time a block (sync or async code):
+
+        with span("db", "SELECT loads", rows=10) as s:
+            ...
+        s.ms            # duration once closed; s.elapsed() while open
+
+    Records into `span_ms`, the current request's trace and, if enabled, OTel.
+    """
+    __slots__ = ("kind", "name", "attrs", "t0", "ms", "_otel")
+
+    def __init__(self, kind: str, name: str, **attrs: Any):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.ms: Optional[int] = None
+        self._otel: Any = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def elapsed(self) -> int:
+        return int((time.perf_counter() - self.t0) * 1000)
+
+    def __enter__(self) -> "span":
+        if _tracer is not None:
+            self._otel = _tracer.start_as_current_span(
+                f"{self.kind} {self.name}", attributes={"kind": self.kind, **_otel_attrs(self.attrs)})
+            self._otel.__enter__()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = (time.perf_counter() - self.t0) * 1000
+        self.ms = int(elapsed)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        observe("span_ms", elapsed, kind=self.kind, name=self.name)
+        tr = _current.get()
+        if tr is not None:
+            tr.add(self.kind, self.name, elapsed, self.attrs)
+        if self._otel is not None:
+            otel_span = _otel_current()
+            if otel_span is not None and self.attrs:
+                otel_span.set_attributes(_otel_attrs(self.attrs))
+            self._otel.__exit__(exc_type, exc, tb)
+            self._otel = None
+
+
+def _otel_attrs(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, bool, int, float)) else str(v)
+            for k, v in attrs.items() if v is not None}
+
+
+def _otel_current() -> Any:
+    from opentelemetry import trace
+    return trace.get_current_span()
+
+
+# ---- SQL statement labels: "SELECT loads", "INSERT events", bounded cardinality ----
+_SQL_VERB = re.compile(r"^\s*(?:--[^\n]*\n\s*)*(\w+)", re.S)
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+([A-Za-z_][\w.]*)", re.I)
+_labels: Dict[str, str] = {}
+
+
+def sql_label(query: Any, context: Any = None) -> str:
+    if not isinstance(query, (str, bytes)):
+        try:
+            query = query.as_string(context)    # psycopg sql.Composed
+        except Exception:
+            return "composed"
+    label = _labels.get(query)
+    if label is None:
+        text = query.decode(errors="replace") if isinstance(query, bytes) else query
+        if not text.strip():
+            return "ping"       # the pools' connection check
+        verb = _SQL_VERB.match(text)
+        table = _SQL_TABLE.search(text[:2000])
+        label = " ".join(p for p in ((verb.group(1).upper() if verb else "SQL"),
+                                     table.group(1).lower() if table else "") if p)
+        if len(_labels) < 1000:
+            _labels[query] = label
+    return label
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one `http` span per request, labelled with the route template
+    (/negotiate/result/{session_id}) rather than the raw path, plus the
+    `http_server_ms` histogram by route, method and status. Adds Server-Timing.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tr = Trace()
+        token = _current.set(tr)
+        status = [500]
+        t0 = time.perf_counter()
+        otel_ctx = None
+        if _tracer is not None:
+            otel_ctx = _tracer.start_as_current_span(f"{scope['method']} request", kind=_server_kind())
+            otel_ctx.__enter__()
+            tr.id = format(_otel_current().get_span_context().trace_id, "032x")
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if TRACE_SERVER_TIMING:
+                    ms = (time.perf_counter() - t0) * 1000
+                    parts = [f"{k};desc=\"{int(c)} calls\";dur={v:.1f}" for k, (c, v) in tr.totals.items()]
+                    parts.append(f"app;dur={ms:.1f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(parts).encode()))
+                    headers.append((b"x-trace-id", tr.id.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            observe("http_server_ms", ms, route=route, method=method, status=status[0])
+            if otel_ctx is not None:
+                s = _otel_current()
+                s.update_name(f"{method} {route}")
+                s.set_attributes({"http.route": route, "http.method": method,
+                                  "http.status_code": status[0]})
+                otel_ctx.__exit__(None, None, None)
+            _current.reset(token)
+            if TRACE_SLOW_MS and ms >= TRACE_SLOW_MS:
+                print(f"[tracing] slow {method} {route} {status[0]} {ms:.0f}ms trace={tr.id} "
+                      f"spans={tr.spans}{f' (+{tr.dropped} more)' if tr.dropped else ''}")
+
+
+def _server_kind() -> Any:
+    from opentelemetry.trace import SpanKind
+    return SpanKind.SERVER
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from .db_pool import DATABASE_URL, check_health
+from .tracing import span
+
+# Startup warmup and readiness for one worker process. The lifespan runs the warmup
+# steps (DB pools, first queries, upstream connections, caches) before the worker
+# takes traffic; GET /health reports ready only once they ran, while the database
+# answers and until shutdown starts draining. Failed steps are logged and reported
+# but don't block startup: the same work then happens lazily on first use.
+WARMUP_ENABLED = os.getenv("WARMUP", "true").lower() in ("1", "true", "yes")
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))            # seconds, all steps together
+READINESS_DB_TIMEOUT = float(os.getenv("READINESS_DB_TIMEOUT", "2"))
+
+
+class Readiness:
+    """Warmup results and ready / draining state of this process."""
+
+    def __init__(self) -> None:
+        self.warm = False
+        self.draining = False
+        self.warmup_ms: Any = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    async def warmup(self, steps: Dict[str, Callable[[], Awaitable[Any]]]) -> None:
+        t0 = time.perf_counter()
+        if WARMUP_ENABLED:
+            try:
+                async with asyncio.timeout(WARMUP_TIMEOUT):
+                    for name, step in steps.items():
+                        await self._run(name, step)
+            except TimeoutError:
+                print(f"[warmup] gave up after {WARMUP_TIMEOUT}s: {self.steps}")
+        self.warmup_ms = round((time.perf_counter() - t0) * 1000, 1)
+        self.warm = True
+        print(f"[warmup] pid={os.getpid()} ready in {self.warmup_ms}ms {self.steps}")
+
+    async def _run(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        entry: Dict[str, Any] = {}
+        self.steps[name] = entry
+        with span("warmup", name) as s:
+            try:
+                result = await step()
+                if result is not None:
+                    entry["result"] = result
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+        entry["ms"] = s.ms
+
+    async def check(self) -> Dict[str, Any]:
+        if DATABASE_URL:
+            try:
+                db = await asyncio.wait_for(check_health(), READINESS_DB_TIMEOUT)
+            except TimeoutError:
+                db = {"ok": False, "error": f"no connection within {READINESS_DB_TIMEOUT}s"}
+        else:
+            db = {"ok": True, "skipped": "DATABASE_URL not set"}
+        return {
+            "ready": self.warm and not self.draining and db["ok"],
+            "warm": self.warm,
+            "draining": self.draining,
+            "pid": os.getpid(),
+            "db": {k: v for k, v in db.items() if k != "pools"},
+            "warmup_ms": self.warmup_ms,
+            "warmup": self.steps,
+        }
+
+
+READINESS = Readiness()
@@ -1,41 +1,172 @@
+import asyncio
+from contextlib import aclosing, asynccontextmanager
 import datetime
 import json
-import os, httpx
-import time
+import os
 
 import uuid
 from pathlib import Path
 import re
-from typing import Any, Dict, Optional
-from fastapi import FastAPI, HTTPException, Header, Query, Request
-from fastapi.responses import FileResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 import psycopg
+from fastapi import FastAPI, HTTPException, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
 
-from src.analytics import log_event
-
-from .db_client import fetch_negotiations_by_session, fetch_recent_loads, find_closest_by_weight, insert_negotiation, search_loads
-
-class Timer:
-    def __enter__(self):
-        self.start = time.perf_counter()
-        self.ms = None
-        return self
-    def __exit__(self, exc_type, exc, tb):
-        self.ms = int((time.perf_counter() - self.start) * 1000)
-    def elapsed(self):
-        return int((time.perf_counter() - self.start) * 1000)
-    
+from src.analytics import (
+    EVENT_BUFFER,
+    alog_event,
+    events_per_minute,
+    latency_by_route,
+    negotiation_close_rates,
+    start_event_buffer,
+    stop_event_buffer,
+)
+
+from .db_client import (
+    EVENTS_KEY,
+    NEGOTIATION_BUFFER,
+    NEGOTIATIONS_KEY,
+    afetch_load,
+    afetch_loads_page,
+    afetch_negotiations_by_session,
+    afetch_recent_loads,
+    afind_closest_by_weight,
+    afind_nearest_loads,
+    ainsert_negotiation,
+    asearch_loads,
+    astream_loads,
+    astream_rows,
+    check_radius,
+    decode_cursor,
+    encode_cursor,
+    keyset_sql,
+    start_negotiation_buffer,
+    stop_negotiation_buffer,
+)
+from .carriers import cache_stats as carrier_cache_stats, lookup_carrier, warm_cache as warm_carrier_cache
+from .dispatch import DISPATCHER, Job, QueueFull
+from .db_pool import DATABASE_URL, check_health, close_pools, open_pools, pool_stats, wait_pools
+from .load_catalog import CATALOG
+from .load_ingest import INGEST_BATCH_ROWS, ingest as ingest_loads
+from .negotiation_engine import (
+    Decision, ESCALATE, NEGOTIATION_ENGINE, NEGOTIATION_MAX_ROUNDS, count as count_decision, decide as decide_round,
+    stats as negotiation_engine_stats,
+)
+from .negotiation_turns import TURN_BUFFER, afetch_turns, append_turn, history_text, log_turn, start_turn_log, stop_turn_log
+from .pubsub import BROKER
+from .recommend import arecommend_loads
+from .schemas import NegotiationBody, NegotiationResultBody, StartCleanBody, WebhookBody, as_dict
+from .rollups import DATABASE_URL as ROLLUPS_DB, pick_granularity, query_rollups, retention_loop
+from .rendering import EVENTS_DASHBOARD, NEGOTIATIONS_DASHBOARD, Page, render_stream
+from .state_store import StateStore, get_store, sweep_expired
+from .json_codec import FastJSONResponse, RawJSONResponse, decode as decode_json, dumps as dumps_json
+from .http_clients import (
+    FMCSA, FMCSA_BASE_URL, HAPPYROBOT, NEGOTIATION, close_clients, latency_stats, open_clients, prime_clients,
+    request as http_request,
+)
+from .metrics import prometheus_text
+from .tracing import TracingMiddleware, setup_otel, shutdown_otel, span
+from .warmup import READINESS, WARMUP_TIMEOUT
+
+async def _read_body(request: Request, type_: Optional[type] = None) -> tuple:
+    """(raw bytes, decoded body); a malformed or non-object body is a 400."""
+    raw = await request.body()
+    try:
+        body = decode_json(raw, type_)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if isinstance(body, dict) or hasattr(body, "__struct_fields__"):
+        return raw, body
+    raise HTTPException(status_code=400, detail="expected a JSON object")
 
 DIST_DIR = Path(__file__).resolve().parents[1] / "frontend" / "dist"
-SESS: Dict[str, Dict[str, Any]] = {}
-JOBS: Dict[str, Dict[str, Any]] = {}
-JOBS["job-id-1234"] = {}
-JOBS["job_12345"] = {}
+# job / negotiation-session state; STATE_BACKEND=postgres shares it across workers and machines
+SESS = get_store("sessions")
+JOBS = get_store("jobs")
 NEGOTIATION_WEBHOOK_URL = os.environ.get("NEGOTIATION_WEBHOOK_URL")
 NEGOTIATION_API_KEY = os.environ.get("NEGOTIATION_API_KEY")  # secret stays on server
-
-app = FastAPI(title="Webhook Receiver")
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))      # seconds between SSE/WS keepalives
+LONGPOLL_MAX_TIMEOUT = float(os.getenv("LONGPOLL_MAX_TIMEOUT", "30"))
+LOADS_PAGE_MAX = 1000
+DASHBOARD_MAX_ROWS = int(os.getenv("DASHBOARD_MAX_ROWS", "100000"))   # per streamed page
+STREAM_CHUNK_ROWS = 200     # NDJSON rows per chunk written to the client
+PAYLOAD_PREVIEW_CHARS = 2000  # dashboards show a bounded slice of each event payload
+# /webhook suggestions ranked by src.recommend; a body can still ask for the plain
+# filtered search with "rank": false
+RECOMMEND_WEBHOOK = os.getenv("RECOMMEND_WEBHOOK", "true").lower() in ("1", "true", "yes")
+# warmup opens keep-alive connections to the upstream hosts; off where egress is slow or billed
+WARMUP_HTTP = os.getenv("WARMUP_HTTP", "true").lower() in ("1", "true", "yes")
+
+
+async def _warm_queries() -> None:
+    # first execution per connection plans and caches the hot statements
+    if DATABASE_URL:
+        await asearch_loads(limit=1)
+        await arecommend_loads(limit=1)
+        await afetch_recent_loads(1)
+
+
+async def _warm_http() -> Any:
+    if WARMUP_HTTP:
+        return await prime_clients({
+            FMCSA: FMCSA_BASE_URL,
+            HAPPYROBOT: os.getenv("WEBHOOK_URL"),
+            NEGOTIATION: NEGOTIATION_WEBHOOK_URL,
+        })
+
+
+async def _warm_json() -> None:
+    dumps_json({"load_id": "warmup", "loadboard_rate": 1.0, "pickup_datetime": datetime.datetime.now()})
+
+
+WARMUP_STEPS: Dict[str, Callable[[], Awaitable[Any]]] = {
+    "db_pools": lambda: wait_pools(WARMUP_TIMEOUT),
+    "queries": _warm_queries,
+    "http": _warm_http,
+    "carrier_cache": warm_carrier_cache,
+    "json": _warm_json,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_otel()
+    await open_pools()
+    await start_event_buffer()
+    await start_negotiation_buffer()
+    await start_turn_log()
+    await open_clients()
+    await DISPATCHER.start()
+    await BROKER.start()
+    await CATALOG.start()
+    sweeper = asyncio.create_task(sweep_expired(JOBS, SESS))
+    retention = asyncio.create_task(retention_loop()) if ROLLUPS_DB else None
+    await READINESS.warmup(WARMUP_STEPS)
+    try:
+        yield
+    finally:
+        # fail readiness first so the load balancer stops routing here
+        READINESS.draining = True
+        sweeper.cancel()
+        if retention is not None:
+            retention.cancel()
+        await CATALOG.stop()
+        # queued webhook calls go out (or to the dead-letter table) while the
+        # HTTP clients, the broker and the pool are still up
+        await DISPATCHER.stop()
+        await BROKER.stop()
+        await close_clients()
+        # drain buffered negotiations / events while the pool is still open
+        await stop_negotiation_buffer()
+        await stop_turn_log()
+        await stop_event_buffer()
+        await close_pools()
+        shutdown_otel()
+
+app = FastAPI(title="Webhook Receiver", lifespan=lifespan)
+app.add_middleware(TracingMiddleware)
 app.mount("/assets", StaticFiles(directory=DIST_DIR / "assets"), name="assets")
 
 
@@ -44,11 +175,123 @@ def index():
     return FileResponse(DIST_DIR / "index.html")
     
 INCOMING_TOKEN = "shared_Secret_key"
-FMCSA_API_KEY = os.environ.get("FMCSA_API_KEY")
 API_KEY  = os.getenv("API_KEY")
 @app.get("/health")
-def health() -> Dict[str, str]:
-    return {"ok": "true"}
+async def health():
+    """Readiness: 200 once this worker warmed up and reaches the database, else 503."""
+    status = await READINESS.check()
+    # rows the write buffers could neither queue nor write (not part of readiness)
+    status["dropped"] = {b.name: b.dropped for b in (EVENT_BUFFER, NEGOTIATION_BUFFER, TURN_BUFFER)}
+    return FastJSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/health/live")
+def health_live() -> Dict[str, Any]:
+    return {"ok": True, "pid": os.getpid()}
+
+@app.get("/health/db")
+async def health_db():
+    return await check_health()
+
+@app.get("/health/events")
+async def health_events():
+    return EVENT_BUFFER.stats()
+
+@app.get("/health/negotiations")
+async def health_negotiations():
+    return NEGOTIATION_BUFFER.stats()
+
+@app.get("/health/turns")
+async def health_turns():
+    return TURN_BUFFER.stats()
+
+@app.get("/health/catalog")
+async def health_catalog(verify: bool = False, samples: int = Query(20, ge=1, le=500)):
+    stats = CATALOG.stats()
+    if verify:
+        stats["verify"] = await CATALOG.verify(samples)
+    return stats
+
+@app.get("/metrics/http")
+async def metrics_http():
+    return latency_stats()
+
+def _metric_samples() -> List[tuple]:
+    """Point-in-time gauges / counters appended to the histograms on /metrics."""
+    out: List[tuple] = []
+    pools = pool_stats()
+    for key in ("pool_size", "pool_available", "pool_max", "requests_waiting"):
+        out += [(f"db_{key}", {"pool": name}, st.get(key, 0)) for name, st in pools.items()]
+    for key in ("requests_num", "requests_wait_ms", "requests_errors", "connections_errors"):
+        out += [(f"db_{key}_total", {"pool": name}, st.get(key, 0)) for name, st in pools.items()]
+
+    carriers = carrier_cache_stats()
+    out += [("carrier_cache_lookups_total", {"result": r}, carriers[r])
+            for r in ("hits", "negative_hits", "misses")]
+    out += [("carrier_cache_hit_rate", {}, carriers["hit_rate"]),
+            ("carrier_cache_size", {}, carriers["size"])]
+
+    engine = negotiation_engine_stats()
+    out += [("negotiation_rounds_total", {"decision": d}, engine[d]) for d in ("accept", "counter", "escalate")]
+
+    catalog = CATALOG.stats()
+    out += [("catalog_rows", {}, catalog["rows"]), ("catalog_ready", {}, int(catalog["ready"])),
+            ("catalog_queries_total", {}, catalog["queries"])]
+
+    buffers = {b.name: b.stats() for b in (EVENT_BUFFER, NEGOTIATION_BUFFER, TURN_BUFFER)}
+    for key in ("queued", "max_size"):
+        out += [(f"buffer_{key}", {"buffer": n}, st[key]) for n, st in buffers.items()]
+    for key in ("flushed", "dropped", "failed", "requeued", "direct"):
+        out += [(f"buffer_{key}_total", {"buffer": n}, st[key]) for n, st in buffers.items()]
+
+    ups = DISPATCHER.stats()["upstreams"]
+    for key in ("queued", "waiting_retry", "in_flight", "concurrency"):
+        out += [(f"dispatch_{key}", {"upstream": n}, st[key]) for n, st in ups.items()]
+    for key in ("sent", "retried", "dead_lettered", "rejected"):
+        out += [(f"dispatch_{key}_total", {"upstream": n}, st[key]) for n, st in ups.items()]
+    return out
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_prometheus():
+    """Prometheus exposition: latency histograms (http_server_ms, span_ms, ...) and gauges."""
+    return PlainTextResponse(prometheus_text(_metric_samples()),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/analytics/rollups")
+async def analytics_rollups(
+    hours: float = Query(24, gt=0, le=24 * 400),
+    granularity: str = Query("auto", pattern="^(auto|minute|hour)$"),
+    by: str = "route,name",
+    series: bool = False,
+    source: Optional[str] = None,
+    name: Optional[str] = None,
+    route: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+):
+    if not ROLLUPS_DB:
+        raise HTTPException(500, "No database URL found")
+    try:
+        granularity = pick_granularity(hours, granularity)
+        rows = await query_rollups(hours, granularity=granularity, by=[c for c in by.split(",") if c],
+                                   series=series, source=source, name=name, route=route, limit=limit)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"granularity": granularity, "rows": rows}
+
+@app.get("/metrics/carriers")
+async def metrics_carriers():
+    return carrier_cache_stats()
+
+@app.get("/metrics/negotiations")
+async def metrics_negotiations():
+    return negotiation_engine_stats()
+
+@app.get("/metrics/dispatch")
+async def metrics_dispatch():
+    return DISPATCHER.stats()
+
+@app.get("/metrics/state")
+async def metrics_state():
+    return {"jobs": await JOBS.stats(), "sessions": await SESS.stats(), "pubsub": BROKER.stats()}
 
 @app.post("/mc_key/{mc_key}")
 async def fetch_carrier_information(
@@ -61,33 +304,12 @@ async def fetch_carrier_information(
         if authorization != expected:
             raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # call FMCSA
-    url = f"https://mobile.fmcsa.dot.gov/qc/services/carriers/{mc_key}?webKey={FMCSA_API_KEY}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        raw = r.json()
-
-    content = (raw or {}).get("content") or {}
-    carrier = content.get("carrier") or {}
-
-    status_code = (carrier.get("statusCode") or "").upper()
-    allowed = str(carrier.get("allowedToOperate") or "").upper() == "Y"
-    eligible = status_code == "A" and allowed
-
-    return {
-        "mc": mc_key,
-        "legal_name": carrier.get("legalName"),
-        "dba_name": carrier.get("dbaName"),
-        "status": status_code,
-        "eligible": eligible,
-        "city": carrier.get("phyCity"),
-        "state": carrier.get("phyState"),
-    }
+    # FMCSA, through the carrier cache
+    return await lookup_carrier(mc_key)
 
 @app.post("/start_clean")
 async def start_clean(request: Request):
-    body = await request.json()
+    _, body = await _read_body(request, StartCleanBody)
     user_message = body.get("user_message")
     if not user_message:
         raise HTTPException(status_code=400, detail="Missing user_message")
@@ -100,25 +322,27 @@ async def start_clean(request: Request):
     job_id = str(uuid.uuid4())
 
     # 2. Store job as pending
-    JOBS[job_id] = {
+    await JOBS.set(job_id, {
         "status": "pending",
         "started_at": datetime.datetime.now().isoformat(),
         "user_message": user_message,
         "result": None,
-    }
+    })
     
     headers = {"Content-Type": "application/json",
                "Authorization": f"Bearer {INCOMING_TOKEN}"}
     if API_KEY:
         headers["X-API-Key"] = API_KEY
-    # 3. Forward request to HappyRobot
+    # 3. Queue the forward to HappyRobot; a dispatch worker sends (and retries) it
     try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                WEBHOOK_URL,
-                json={"text": user_message, "job_id": job_id},  # include job_id!
-                headers=headers
-            )
+        await _dispatch(
+            HAPPYROBOT, WEBHOOK_URL,
+            {"text": user_message, "job_id": job_id},  # include job_id!
+            headers, ref=job_id, on_dead=_fail_job,
+        )
+    except QueueFull as e:
+        await _fail_job_id(job_id, str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error forwarding to HappyRobot: {e}")
 
@@ -126,23 +350,187 @@ async def start_clean(request: Request):
     return {"ok": True, "job_id": job_id}
 
 
+async def _dispatch(upstream: str, url: str, body: Dict[str, Any], headers: Dict[str, str], *,
+                    ref: str, on_dead: Callable[[Job], Awaitable[None]]) -> None:
+    if DISPATCHER.running:
+        DISPATCHER.submit(upstream, "POST", url, json_body=body, headers=headers, ref=ref, on_dead=on_dead)
+    else:
+        # no lifespan (scripts): send inline
+        await http_request(upstream, "POST", url, json=body, headers=headers)
+
+async def _fail_job_id(job_id: str, error: str) -> None:
+    def fail(job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        job = job or {}
+        job["status"] = "error"
+        job["error"] = error
+        return job
+    await JOBS.update(job_id, fail)
+    await BROKER.publish(f"job:{job_id}", {"status": "error"})
+
+async def _fail_job(dead: Job) -> None:
+    await _fail_job_id(dead.ref, f"HappyRobot unreachable: {dead.last_status or dead.last_error}")
+
+async def _fail_session_id(session_id: str, error: str) -> None:
+    def fail(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        entry = entry or {}
+        entry["status"] = "error"
+        entry["error"] = error
+        return entry
+    await SESS.update(session_id, fail)
+    await BROKER.publish(f"session:{session_id}", {"status": "error"})
+
+async def _fail_session(dead: Job) -> None:
+    await _fail_session_id(dead.ref, f"negotiation webhook unreachable: {dead.last_status or dead.last_error}")
+
+
 @app.get("/result/{job_id}")
 async def get_result(job_id: str, authorization: Optional[str] = Header(None)):
     expected = f"Bearer {INCOMING_TOKEN}"
     if authorization != expected:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    job = JOBS.get(job_id)
+    job = await JOBS.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Unknown job_id")
-    # print(f"Found job for {job_id} is {job}")
+    return _job_view(job)
+
+
+# === Push delivery: long-poll, Server-Sent Events and WebSocket ===
+# /webhook and /negotiate/result publish "job:<id>" / "session:<id>" on BROKER;
+# subscribers re-read the state store and get the same shape as the polling endpoints.
+
+def _job_view(job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not job:
+        return {"ok": False, "status": "unknown"}
     return {
         "ok": True,
-        "status": job["status"],
+        "status": job.get("status", "unknown"),
         "echo": job.get("echo"),
         "suggested_loads": job.get("suggested_loads"),
+        "error": job.get("error"),
     }
 
+def _job_done(view: Dict[str, Any]) -> bool:
+    return view.get("status") in ("done", "error")
+
+def _negotiation_view(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not entry:
+        # Not created yet (or expired after STATE_TTL)
+        return {"ok": False,
+                "status": "unknown",
+                "pending": True}
+
+    if entry.get("status") == "error":
+        return {"ok": False,
+                "status": "error",
+                "error": entry.get("error"),
+                "pending": False}
+
+    if entry.get("status") != "complete":
+        return {"ok": False,
+                "status": entry.get("status", "unknown"),
+                "pending": True}
+
+    # Return only the result in the shape your TS expects
+    return {"ok": True,
+            "status": entry.get("status", "unknown"),
+            "result": entry.get("result")}
+
+def _negotiation_done(view: Dict[str, Any]) -> bool:
+    return view.get("status") in ("complete", "error")
+
+def _check_token(authorization: Optional[str], token: Optional[str]) -> None:
+    # EventSource / WebSocket can't set headers, so ?token= is accepted too
+    if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}" and token != INCOMING_TOKEN:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+async def _wait_for_update(store: StateStore, key: str, topic: str,
+                           view: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]],
+                           done: Callable[[Dict[str, Any]], bool], timeout: float) -> Dict[str, Any]:
+    """Long-poll: return as soon as the state is final, or the current state after `timeout`."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(max(timeout, 0.0), LONGPOLL_MAX_TIMEOUT)
+    # subscribe before reading so a publish between the read and the wait isn't missed
+    async with BROKER.subscribe(topic) as q:
+        current = view(await store.get(key))
+        while not done(current):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(q.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            current = view(await store.get(key))
+        return current
+
+async def _watch_updates(store: StateStore, key: str, topic: str,
+                         view: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """Yield the current state, then the new state after every publish; None means heartbeat."""
+    async with BROKER.subscribe(topic) as q:
+        yield view(await store.get(key))
+        while True:
+            try:
+                await asyncio.wait_for(q.get(), timeout=STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield view(await store.get(key))
+
+async def _sse(updates: AsyncIterator[Optional[Dict[str, Any]]],
+               done: Callable[[Dict[str, Any]], bool], close_when_done: bool) -> AsyncIterator[str]:
+    async for view in updates:
+        if view is None:
+            yield ": keepalive\n\n"
+            continue
+        yield f"data: {json.dumps(jsonable_encoder(view))}\n\n"
+        if close_when_done and done(view):
+            return
+
+async def _ws_forward(websocket: WebSocket, updates: AsyncIterator[Optional[Dict[str, Any]]],
+                      done: Callable[[Dict[str, Any]], bool], close_when_done: bool) -> None:
+    await websocket.accept()
+    try:
+        async for view in updates:
+            if view is None:
+                await websocket.send_json({"type": "keepalive"})
+                continue
+            await websocket.send_json(jsonable_encoder(view))
+            if close_when_done and done(view):
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.get("/result/{job_id}/wait")
+async def wait_result(job_id: str, timeout: float = Query(25, ge=0),
+                      authorization: Optional[str] = Header(None)):
+    _check_token(authorization, None)
+    view = await _wait_for_update(JOBS, job_id, f"job:{job_id}", _job_view, _job_done, timeout)
+    if view.get("status") == "unknown":
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    return view
+
+@app.get("/result/{job_id}/stream")
+async def stream_result(job_id: str, token: Optional[str] = None,
+                        authorization: Optional[str] = Header(None)):
+    _check_token(authorization, token)
+    if not await JOBS.get(job_id):
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    updates = _watch_updates(JOBS, job_id, f"job:{job_id}", _job_view)
+    return StreamingResponse(_sse(updates, _job_done, close_when_done=True),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.websocket("/ws/result/{job_id}")
+async def ws_result(websocket: WebSocket, job_id: str, token: Optional[str] = None):
+    if INCOMING_TOKEN and token != INCOMING_TOKEN:
+        await websocket.close(code=1008)
+        return
+    updates = _watch_updates(JOBS, job_id, f"job:{job_id}", _job_view)
+    await _ws_forward(websocket, updates, _job_done, close_when_done=True)
+
 @app.post("/webhook")
 async def receive_webhook(request : Request,
                           authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
@@ -152,33 +540,55 @@ async def receive_webhook(request : Request,
             raise HTTPException(status_code=401, detail="Unauthorized")
     
     
-    with Timer() as t: # type: ignore
-        body = await request.json()
+    with span("handler", "webhook") as t:
+        raw, body = await _read_body(request, WebhookBody)
 
         # === Structured agent request (preferred) ===
-        # print("body is")
-        # print(body)
         job_id = body.get("job_id")
         if not job_id:
             raise HTTPException(status_code=400, detail="Missing job_id")
         loads: list = []
         echo = body.get("echo")
 
-        if isinstance(body, dict) and any(k in body for k in (
-            "origin", "destination", "weight_kg", "miles", "rate_min", "rate_max"
+        if any(k in body for k in (
+            "origin", "destination", "weight_kg", "miles", "rate_min", "rate_max", "equipment_type"
         )):
-            loads = search_loads(
-                origin=body.get("origin") or None,
-                destination=body.get("destination") or None,
-                weight_kg=body.get("weight_kg") or None,
-                miles=body.get("miles") or None,
-                rate_min=body.get("rate_min") if body.get("rate_min") not in ("", None) else None,
-                rate_max=body.get("rate_max") if body.get("rate_max") not in ("", None) else None,
-                limit=body.get("limit") or 10,
-            )
-            print(f"Time is {t.elapsed()}")
-
-            log_event(
+            rank = body.get("rank")
+            try:
+                origin_radius = check_radius(body.get("origin_radius_miles"))
+                destination_radius = check_radius(body.get("destination_radius_miles"))
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            radius = origin_radius or destination_radius
+            # radius / deadhead searches are filters on the geocoded lane, not ranked
+            ranked = not radius and (RECOMMEND_WEBHOOK if rank is None else bool(rank))
+            rate_min = body.get("rate_min") if body.get("rate_min") not in ("", None) else None
+            rate_max = body.get("rate_max") if body.get("rate_max") not in ("", None) else None
+            if ranked:
+                loads = await arecommend_loads(
+                    origin=body.get("origin") or None,
+                    destination=body.get("destination") or None,
+                    weight_kg=body.get("weight_kg") or None,
+                    miles=body.get("miles") or None,
+                    equipment_type=body.get("equipment_type") or None,
+                    rate_min=rate_min,
+                    rate_max=rate_max,
+                    limit=body.get("limit") or 10,
+                )
+            else:
+                loads = await asearch_loads(
+                    origin=body.get("origin") or None,
+                    destination=body.get("destination") or None,
+                    weight_kg=body.get("weight_kg") or None,
+                    miles=body.get("miles") or None,
+                    rate_min=rate_min,
+                    rate_max=rate_max,
+                    limit=body.get("limit") or 10,
+                    fuzzy=bool(body.get("fuzzy")),
+                    origin_radius_miles=origin_radius,
+                    destination_radius_miles=destination_radius,
+                )
+            await alog_event(
                 source="webhook",
                 name="structured_query",
                 status="ok",
@@ -191,15 +601,30 @@ async def receive_webhook(request : Request,
                     "miles": body.get("miles"),
                     "rate_min": body.get("rate_min"),
                     "rate_max": body.get("rate_max"),
+                    "equipment_type": body.get("equipment_type"),
+                    "origin_radius_miles": body.get("origin_radius_miles"),
+                    "destination_radius_miles": body.get("destination_radius_miles"),
                     "limit": body.get("limit"),
+                    "ranked": ranked,
                 }
             )
         else:
-            text = str(body)
+            text = raw.decode("utf-8", "replace")
             m = re.search(r"(\d+)\s*kg", text, flags=re.I)
+            mi = re.search(r"(\d+)\s*(?:mi|miles)\b", text, flags=re.I)
+            rate = re.search(r"\$\s*(\d+(?:\.\d+)?)", text)
             if m:
-                loads = [find_closest_by_weight(int(m.group(1)))]
-                log_event(
+                if mi or rate:
+                    strategy = "nearest_weight_miles_rate"
+                    loads = await afind_nearest_loads(
+                        weight_kg=int(m.group(1)),
+                        miles=int(mi.group(1)) if mi else None,
+                        rate=float(rate.group(1)) if rate else None,
+                    )
+                else:
+                    strategy = "closest_by_weight"
+                    loads = await afind_closest_by_weight(int(m.group(1)))
+                await alog_event(
                 source="webhook",
                 name="fallback_text_query",
                 status="ok",
@@ -208,11 +633,13 @@ async def receive_webhook(request : Request,
                 payload={
                     "raw_text": text,
                     "weight_guess": int(m.group(1)) if m else None,
-                    "strategy": "closest_by_weight" if m else "recent_loads",
+                    "miles_guess": int(mi.group(1)) if mi else None,
+                    "rate_guess": float(rate.group(1)) if rate else None,
+                    "strategy": strategy,
                 }
             )
             else:
-                loads = fetch_recent_loads(5)
+                loads = await afetch_recent_loads(5)
             
     
     # naive weight extraction e.g., "10kg"
@@ -220,54 +647,161 @@ async def receive_webhook(request : Request,
     # m = re.search(r"(\d+)\s*kg", text, flags=re.I)
     # closest = find_closest_by_weight(int(m.group(1))) if m else fetch_recent_loads(5)
     
-    JOBS[job_id]["status"] = "done"
-    JOBS[job_id]["suggested_loads"] = loads
-    JOBS[job_id]["echo"] = body.get("echo")
+    def finish(job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        job = job or {}
+        job["status"] = "done"
+        job["suggested_loads"] = loads
+        job["echo"] = body.get("echo")
+        return job
+
+    await JOBS.update(job_id, finish)
+    await BROKER.publish(f"job:{job_id}", {"status": "done"})
     
-    return {
-        "ok": True,
-        "echo": body,
-        "suggested_loads": loads
-    }
+    # echo the request bytes as they came instead of re-encoding the parsed body
+    return RawJSONResponse(b'{"ok":true,"echo":' + raw.strip() + b',"suggested_loads":'
+                           + dumps_json(loads) + b"}")
+
+async def _ndjson(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    chunk = []
+    async with aclosing(rows):
+        async for row in rows:
+            chunk.append(dumps_json(row))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield b"\n".join(chunk) + b"\n"
+                chunk.clear()
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
 
 @app.get("/loads")
-def loads(limit: int = 10):
-    return {"loads": fetch_recent_loads(limit)}
+async def loads(
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Newest pickups first. JSON pages carry `next_cursor` for the following page;
+    format=ndjson streams every matching load (or `limit` of them), one per line.
+    """
+    try:
+        if cursor:
+            decode_cursor(cursor)
+        if format == "ndjson":
+            return StreamingResponse(_ndjson(astream_loads(cursor, limit)), media_type="application/x-ndjson")
+        rows, next_cursor = await afetch_loads_page(min(limit or 10, LOADS_PAGE_MAX), cursor)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return FastJSONResponse({"loads": rows, "next_cursor": next_cursor})
+
+@app.post("/loads/bulk")
+async def loads_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    batch_size: int = Query(INGEST_BATCH_ROWS, ge=100, le=200000),
+    authorization: Optional[str] = Header(None),
+):
+    """
+    Streamed CSV (header row required) or NDJSON upload, upserted into loads on
+    load_id. The format comes from ?format= or the Content-Type. The response
+    reports inserted / updated / invalid counts and per-batch errors.
+    """
+    if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if not os.getenv("DATABASE_URL"):
+        raise HTTPException(500, "No database URL found")
+    ctype = request.headers.get("content-type", "")
+    fmt = format or ("ndjson" if "ndjson" in ctype or "jsonl" in ctype else "csv")
+    with span("handler", "loads_bulk") as t:
+        try:
+            result = await ingest_loads(request.stream(), fmt, batch_size)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+    await alog_event(
+        source="api",
+        name="loads_bulk",
+        status="ok" if not result["failed"] else "error",
+        duration_ms=t.ms,
+        route="/loads/bulk",
+        payload={k: v for k, v in result.items() if k != "batches"},
+    )
+    return result
+
+async def _load_terms(load: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # the posted rate and miles come from the loads table, never from the client, so a
+    # caller can't move the pricing band by sending its own rate. None when the load
+    # can't be read from loads (no load_id, unknown id, no database, lookup error):
+    # the round then escalates instead of being priced locally
+    if not (DATABASE_URL and load.get("load_id")):
+        return None
+    try:
+        row = await afetch_load(str(load["load_id"]))
+    except Exception as e:
+        print(f"[negotiate] load lookup failed for {load['load_id']}: {e}")
+        return None
+    if not row:
+        return None
+    return {**load, "loadboard_rate": row["loadboard_rate"], "miles": row["miles"] or load.get("miles")}
 
 # Start negotiation
 @app.post("/negotiate/start")
 async def negotiate_start(request: Request, authorization: Optional[str] = Header(None)):
     if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    if not NEGOTIATION_WEBHOOK_URL:
+    if not (NEGOTIATION_WEBHOOK_URL or NEGOTIATION_ENGINE):
         raise HTTPException(status_code=500, detail="NEGOTIATION_WEBHOOK_URL not set")
     
-    # print(f"start of START start")
-    body = await request.json()
+    _, body = await _read_body(request, NegotiationBody)
     session_id = body.get("session_id")
     if not session_id:
         session_id = str(uuid.uuid4())
-    print(f"Session ID is {session_id}")
-    # set defaults
-    entry = SESS.setdefault(session_id, {
-        "status": "pending",
-        "started_at": datetime.datetime.now().isoformat(),
-        "request": body,  # optional: store full input
-        "negotiation_history": ""   # new
-    })
-
-    # append to SESSION In memory
-    entry["negotiation_history"] += (
-    f"\n[User @ {datetime.datetime.now().isoformat()}] "
-    f"{body.get('user_message')} "
-    f"(requested_price={body.get('user_requested_price')})"
-    )
-    entry["status"] = "pending"
-    entry["last_update"] = datetime.datetime.now().isoformat()
-    entry["request"] = body
-    print(f"lloads is {body.get("load")}")
-    print(f"Cur round is {body.get("cur_round")}")
-    print(f"Max rounds is {body.get("max_rounds")}")
+    load = await _load_terms(body.get("load") or {}) if NEGOTIATION_ENGINE else {}
+    turn: Dict[str, Any] = {}
+    reply: Dict[str, Any] = {}
+    def append_user_turn(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # set defaults
+        entry = entry or {
+            "status": "pending",
+            "started_at": datetime.datetime.now().isoformat(),
+            "request": as_dict(body),  # optional: store full input
+        }
+        # decided against the history before this round, in the same write as the turns
+        if not NEGOTIATION_ENGINE:
+            decision = None
+        elif load is None:
+            decision = Decision(ESCALATE, None, "load not found in loads; its rate can't be verified")
+        else:
+            decision = decide_round(load, body.get("user_requested_price"), body.get("max_rounds"), entry)
+        if decision is not None and decision.action == ESCALATE and not NEGOTIATION_WEBHOOK_URL:
+            raise HTTPException(status_code=500, detail="NEGOTIATION_WEBHOOK_URL not set")
+
+        # append to session state
+        turn.update(append_turn(entry, "user", body.get("user_message"),
+                                body.get("user_requested_price"), body.get("cur_round")))
+        entry["status"] = "pending"
+        entry["last_update"] = datetime.datetime.now().isoformat()
+        entry["request"] = as_dict(body)
+        reply.clear()
+        reply["decision"] = decision
+        if decision is not None and decision.action != ESCALATE:
+            # settled by the pricing rules: answer like /negotiate/result would
+            reply["turn"] = append_turn(entry, "ai", decision.reason, decision.price, body.get("cur_round"))
+            entry["result"] = {
+                "ai_negotiated_price": decision.price,
+                "ai_negotiation_reason": decision.reason,
+                "decision": decision.action,
+            }
+            entry["status"] = "complete"
+        return entry
+
+    entry = await SESS.update(session_id, append_user_turn)
+    await log_turn(session_id, turn)
+    decision = reply["decision"]
+    if decision is not None:
+        count_decision(decision)
+        if decision.action != ESCALATE:
+            await log_turn(session_id, reply["turn"])
+            await BROKER.publish(f"session:{session_id}", {"status": "complete"})
+            return {"ok": True, "session_id": session_id, "status": "negotiation started",
+                    "decision": decision.action}
     
     # make the request ot send to Happy robot negotiation workflow endpoint
     # SESS: Dict[str, Dict[str, Any]] = {}
@@ -280,33 +814,45 @@ async def negotiate_start(request: Request, authorization: Optional[str] = Heade
             "message": body.get("user_message"),
             "requested_price": body.get("user_requested_price"),
         },
-        "constraints": {"max_rounds": min(3, int(body.get("max_rounds") or 3)) },
-        "history": entry["negotiation_history"],
+        "constraints": {"max_rounds": min(NEGOTIATION_MAX_ROUNDS, int(body.get("max_rounds") or NEGOTIATION_MAX_ROUNDS)) },
+        "history": history_text(entry),     # summary + last NEGOTIATION_HISTORY_WINDOW turns
+        "turn_count": entry["turn_count"],
     }
+    if decision is not None:
+        forward_body["escalation_reason"] = decision.reason
 
 
     headers = {"Content-Type": "application/json"}
     if NEGOTIATION_API_KEY:
         headers["X-API-Key"] = NEGOTIATION_API_KEY
-    # print(f"INSIDE start")
-    # fire and forget
-    async with httpx.AsyncClient(timeout=10) as client:
-        await client.post(NEGOTIATION_WEBHOOK_URL, json=forward_body, headers=headers)
+    # fire and forget: queued for a dispatch worker, the answer comes back on /negotiate/result
+    try:
+        await _dispatch(NEGOTIATION, NEGOTIATION_WEBHOOK_URL, forward_body, headers,
+                        ref=session_id, on_dead=_fail_session)
+    except QueueFull as e:
+        await _fail_session_id(session_id, str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
-    return {"ok": True, "session_id": session_id, "status": "negotiation started"}
+    return {"ok": True, "session_id": session_id, "status": "negotiation started",
+            "decision": decision.action if decision is not None else None}
 
 @app.post("/negotiate/start/v2")
 async def negotiate_start_v2_db(request: Request, authorization: Optional[str] = Header(None)):
     if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    body = await request.json()
+    _, body = await _read_body(request, NegotiationBody)
     session_id = body.get("session_id") or str(uuid.uuid4())
     body["session_id"] = session_id  # ensure always present
 
     # Insert into DB
     try:
-        row_id = insert_negotiation(body)
+        row_id = await ainsert_negotiation(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except psycopg.OperationalError as e:
+        # buffer full and the database unreachable: the row was not stored
+        raise HTTPException(status_code=503, detail=f"DB unavailable: {e}", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB insert failed: {e}")
 
@@ -329,189 +875,141 @@ async def negotiate_result(request: Request, authorization: Optional[str] = Head
     if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    body = await request.json()
+    _, body = await _read_body(request, NegotiationResultBody)
     session_id = body.get("session_id")
     if not session_id:
         raise HTTPException(status_code=400, detail="session_id required")
 
-    # Create entry if missing (idempotent)
-    entry = SESS.setdefault(session_id, {
-        "status": "pending",
-        "started_at": datetime.datetime.now().isoformat(),
-        "request": {},
-        "negotiation_history": ""
-    })
-
-
-    entry["negotiation_history"] += (
-        f"\n[AI @ {datetime.datetime.now().isoformat()}] "
-        f"{body.get("ai_negotiation_reason")} "
-        f"(offer=${body.get("ai_negotiated_price")})"
-        )
-
-    # Save result & mark complete
-    entry["result"] = {
-        "ai_negotiated_price": body.get("ai_negotiated_price"),
-        "ai_negotiation_reason": body.get("ai_negotiation_reason"),
-        # keep the whole body too if you want:
-        # "_raw": body
-    }
-    entry["status"] = "complete"
-    entry["last_update"] = datetime.datetime.now().isoformat()
-    
-    print(f"entry updated for {session_id} is {entry}")
+    turn: Dict[str, Any] = {}
+    def append_ai_turn(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Create entry if missing (idempotent)
+        entry = entry or {
+            "status": "pending",
+            "started_at": datetime.datetime.now().isoformat(),
+            "request": {},
+        }
+
+        turn.update(append_turn(entry, "ai", body.get("ai_negotiation_reason"),
+                                body.get("ai_negotiated_price"), (entry.get("request") or {}).get("cur_round")))
+
+        # Save result & mark complete
+        entry["result"] = {
+            "ai_negotiated_price": body.get("ai_negotiated_price"),
+            "ai_negotiation_reason": body.get("ai_negotiation_reason"),
+            # keep the whole body too if you want:
+            # "_raw": body
+        }
+        entry["status"] = "complete"
+        entry["last_update"] = datetime.datetime.now().isoformat()
+        return entry
+
+    entry = await SESS.update(session_id, append_ai_turn)
+    await log_turn(session_id, turn)
+    await BROKER.publish(f"session:{session_id}", {"status": "complete"})
     return {"ok": True}
 
 
 @app.get("/negotiate/result/{session_id}")
 async def get_negotiation_result(session_id: str):
-    entry = SESS.get(session_id)
-    if not entry:
-        # Not created yet (or expired if you later add TTL)
-        return {"ok": False, 
-                "status": "unknown",
-                "pending": True}
+    return _negotiation_view(await SESS.get(session_id))
 
-    if entry.get("status") != "complete":
-        return {"ok": False, 
-                "status": entry.get("status", "unknown"),
-                "pending": True}
+@app.get("/negotiate/result/{session_id}/wait")
+async def wait_negotiation_result(session_id: str, timeout: float = Query(25, ge=0)):
+    return await _wait_for_update(SESS, session_id, f"session:{session_id}",
+                                  _negotiation_view, _negotiation_done, timeout)
 
-    # Return only the result in the shape your TS expects
-    return {"ok": True, 
-            "status": entry.get("status", "unknown"),
-            "result": entry.get("result")}
+@app.get("/negotiate/result/{session_id}/stream")
+async def stream_negotiation_result(session_id: str):
+    # stays open across rounds; every AI answer is pushed as it arrives
+    updates = _watch_updates(SESS, session_id, f"session:{session_id}", _negotiation_view)
+    return StreamingResponse(_sse(updates, _negotiation_done, close_when_done=False),
+                             media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.websocket("/ws/negotiate/{session_id}")
+async def ws_negotiation_result(websocket: WebSocket, session_id: str):
+    updates = _watch_updates(SESS, session_id, f"session:{session_id}", _negotiation_view)
+    await _ws_forward(websocket, updates, _negotiation_done, close_when_done=False)
 
 @app.get("/negotiate/history/{session_id}")
 async def get_negotiation_history(session_id: str, authorization: Optional[str] = Header(None)):
     if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
         raise HTTPException(status_code=401, detail="Unauthorized")
     try:
-        rows = fetch_negotiations_by_session(session_id)
+        rows = await afetch_negotiations_by_session(session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB fetch failed: {e}")
 
-    return {"ok": True, "session_id": session_id, "history": rows}
+    return FastJSONResponse({"ok": True, "session_id": session_id, "history": rows})
+
+@app.get("/negotiate/turns/{session_id}")
+async def get_negotiation_turns(session_id: str, after: int = Query(0, ge=0),
+                                limit: int = Query(200, ge=1, le=1000),
+                                authorization: Optional[str] = Header(None)):
+    """Every turn of a session from negotiation_turns, oldest first; ?after=<seq> pages."""
+    if INCOMING_TOKEN and authorization != f"Bearer {INCOMING_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        rows = await afetch_turns(session_id, after, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"DB fetch failed: {e}")
+    return FastJSONResponse({"ok": True, "session_id": session_id, "turns": rows})
+
+def _page_after(cursor: Optional[str]) -> Optional[tuple]:
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+EVENT_ROW_COLS = ["id", "ts", "source", "name", "status", "duration_ms", "route", "payload"]
+NEGOTIATION_ROW_COLS = ["id", "ts", "session_id", "load_id", "miles", "loadboard_rate",
+                        "price", "user_message", "user_requested_price", "cur_round", "max_rounds",
+                        "ai_negotiated_price", "ai_negotiated_reason", "history", "sentiment"]
 
 @app.get("/dashboard", response_class=HTMLResponse)
-def dashboard(limit: int = Query(20, ge=1, le=100)):
+async def dashboard(
+    limit: int = Query(20, ge=1, le=DASHBOARD_MAX_ROWS),
+    cursor: Optional[str] = None,
+    hours: int = Query(24, ge=1, le=24 * 90),
+    minutes: int = Query(60, ge=1, le=24 * 60),
+):
     DATABASE_URL = os.getenv("DATABASE_URL")
     if not DATABASE_URL:
         raise HTTPException(500, "No database URL found")
-       
-    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, ts, source, name, status, duration_ms, route, payload::text
-                FROM events
-                ORDER BY ts DESC
-                LIMIT %s
-            """, (limit,))
-            rows = cur.fetchall()
-
-    # Build HTML
-    html = """
-    <html>
-    <head>
-        <title>Events Dashboard</title>
-        <style>
-            body { font-family: sans-serif; margin: 20px; }
-            table { border-collapse: collapse; width: 100%; }
-            th, td { border: 1px solid #ccc; padding: 6px 10px; font-size: 14px; }
-            th { background: #eee; }
-            pre { margin: 0; white-space: pre-wrap; }
-        </style>
-    </head>
-    <body>
-        <h1>Events Dashboard</h1>
-        <table>
-            <tr>
-                <th>Timestamp</th><th>Source</th><th>Name</th><th>Status</th>
-                <th>Duration (ms)</th><th>Route</th><th>Payload</th>
-            </tr>
-    """
 
-    for r in rows:
-        html += f"""
-        <tr>
-            <td>{r[1]}</td>
-            <td>{r[2]}</td>
-            <td>{r[3]}</td>
-            <td>{r[4]}</td>
-            <td>{r[5] or ''}</td>
-            <td>{r[6] or ''}</td>
-            <td><pre>{r[7] or ''}</pre></td>
-        </tr>
-        """
-
-    html += "</table></body></html>"
-    return HTMLResponse(content=html)
-
-from fastapi.responses import HTMLResponse
+    sql, params = keyset_sql(f"""
+        SELECT id, ts, source, name, status, duration_ms, route,
+               left(payload::text, {PAYLOAD_PREVIEW_CHARS}) AS payload
+        FROM events
+    """, EVENTS_KEY, _page_after(cursor), limit + 1)
+    latency, per_minute = await asyncio.gather(latency_by_route(hours), events_per_minute(minutes))
+    rows = Page(astream_rows(sql, params), EVENT_ROW_COLS, limit, key=lambda r: (r["ts"], r["id"]))
+
+    return StreamingResponse(render_stream(
+        EVENTS_DASHBOARD, title="Events Dashboard", rows=rows, latency=latency,
+        per_minute_rows=per_minute, hours=hours, minutes=minutes,
+    ), media_type="text/html")
+
 @app.get("/negotiations_dashboard", response_class=HTMLResponse)
-def negotiations_dashboard(limit: int = Query(50, ge=1, le=500)):
+async def negotiations_dashboard(
+    limit: int = Query(50, ge=1, le=DASHBOARD_MAX_ROWS),
+    cursor: Optional[str] = None,
+    hours: int = Query(24 * 7, ge=1, le=24 * 90),
+):
     DATABASE_URL = os.getenv("DATABASE_URL")
     if not DATABASE_URL:
         raise HTTPException(500, "No database URL found")
-       
-    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, ts, session_id, load_id, miles, loadboard_rate,
-                       price, user_message, user_requested_price,
-                       cur_round, max_rounds,
-                       ai_negotiated_price, ai_negotiated_reason, history, sentiment
-                FROM negotiations
-                ORDER BY ts DESC
-                LIMIT %s
-            """, (limit,))
-            rows = cur.fetchall()
-
-    # Build HTML
-    html = """
-    <html>
-    <head>
-        <title>Negotiations Dashboard</title>
-        <style>
-            body { font-family: sans-serif; margin: 20px; }
-            table { border-collapse: collapse; width: 100%; font-size: 13px; }
-            th, td { border: 1px solid #ccc; padding: 6px 10px; vertical-align: top; }
-            th { background: #eee; }
-            pre { margin: 0; white-space: pre-wrap; }
-            details { margin: 0; }
-        </style>
-    </head>
-    <body>
-        <h1>Negotiations Dashboard</h1>
-        <table>
-            <tr>
-                <th>ID</th><th>Timestamp</th><th>Session</th><th>Load</th>
-                <th>Miles</th><th>Loadboard Rate</th><th>User Msg</th><th>User Price</th>
-                <th>Round</th><th>Max Rounds</th>
-                <th>AI Price</th><th>AI Reason</th><th>History</th><th>Sentiment</th>
-            </tr>
-    """
 
-    for r in rows:
-    
-        html += f"""
-        <tr>
-            <td>{r[0]}</td>
-            <td>{r[1]}</td>
-            <td>{r[2]}</td>
-            <td>{r[3]}</td>
-            <td>{r[4] or ''}</td>
-            <td>{r[5] or ''}</td>
-            <td><pre>{r[7] or ''}</pre></td>
-            <td>{r[8] or ''}</td>
-            <td>{r[9]}</td>
-            <td>{r[10]}</td>
-            <td>{r[11] or ''}</td>
-            <td><pre>{r[12] or ''}</pre></td>
-            <td>{r[13]}</td>
-            <td>{r[14] or ''}</td>
-        </tr>
-        """
-
-    html += "</table></body></html>"
-    return HTMLResponse(content=html)
\ No newline at end of file
+    sql, params = keyset_sql("""
+        SELECT id, ts, session_id, load_id, miles, loadboard_rate,
+               price, user_message, user_requested_price,
+               cur_round, max_rounds,
+               ai_negotiated_price, ai_negotiated_reason, history, sentiment
+        FROM negotiations
+    """, NEGOTIATIONS_KEY, _page_after(cursor), limit + 1)
+    close_rates = await negotiation_close_rates(hours)
+    rows = Page(astream_rows(sql, params), NEGOTIATION_ROW_COLS, limit, key=lambda r: (r["ts"], r["id"]))
+
+    return StreamingResponse(render_stream(
+        NEGOTIATIONS_DASHBOARD, title="Negotiations Dashboard", rows=rows,
+        close_rate_rows=close_rates, hours=hours,
+    ), media_type="text/html")
@@ -0,0 +1,32 @@
+import ast
+import datetime
+import re
+from pathlib import Path
+
+import pytest
+
+from src.db_client import normalize_place
+from src.load_catalog import LoadCatalog, _Snapshot
+
+SEED_SQL = Path(__file__).resolve().parents[1] / "db" / "init" / "002_seed_data.sql"
+
+
+def seed_loads() -> list:
+    """The loads rows of db/init/002_seed_data.sql, in RECENT_LOADS_COLS order."""
+    text = SEED_SQL.read_text(encoding="utf-8")
+    values = text[text.index("VALUES") + len("VALUES"):text.index("ON CONFLICT")]
+    rows = []
+    for r in ast.literal_eval("[" + re.sub(r"\bNULL\b", "None", values.strip()) + "]"):
+        pickup, delivery = (datetime.datetime.fromisoformat(t) for t in r[3:5])
+        rows.append((*r[:3], pickup, delivery, *r[5:]))
+    return rows
+
+
+@pytest.fixture
+def seed_catalog() -> LoadCatalog:
+    """A warm LoadCatalog over the seed loads, as if read with CATALOG_SQL."""
+    updated = datetime.datetime(2025, 8, 1, tzinfo=datetime.timezone.utc)
+    rows = [(*r, *normalize_place(r[1]), *normalize_place(r[2]), updated) for r in seed_loads()]
+    catalog = LoadCatalog()
+    catalog._snap = _Snapshot(rows)
+    return catalog
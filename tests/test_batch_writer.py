@@ -0,0 +1,128 @@
+import asyncio
+
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+
+from src import db_client, negotiation_turns, webhook_api
+from src.batch_writer import BLOCK, BatchWriter
+from src.webhook_api import INCOMING_TOKEN, app
+
+
+class Writer:
+    """flush_fn that fails while `down` is set, like _write_negotiations with the DB gone."""
+
+    def __init__(self):
+        self.down = True
+        self.rows = []
+
+    async def __call__(self, rows):
+        if self.down:
+            raise psycopg.OperationalError("connection refused")
+        self.rows += rows
+
+
+def full_buffer(writer, max_size=2):
+    buf = BatchWriter("test", writer, max_size=max_size, batch_size=100, flush_interval=60,
+                      policy=BLOCK, requeue_failed=True)
+    buf._q.extend(range(max_size))
+    return buf
+
+
+def test_full_block_buffer_with_failing_writer():
+    async def run():
+        writer = Writer()
+        buf = full_buffer(writer)
+        await buf.start()
+        try:
+            assert await buf.aput("a") is False        # waited for a flush that was requeued
+            with pytest.raises(psycopg.OperationalError):
+                await buf.awrite("b")
+            assert buf.stats()["dropped"] == 2 and buf.stats()["requeued"] == 4
+            assert list(buf._q) == [0, 1]
+
+            # the DB comes back between the failed flush and the inline write
+            async def flaky(rows):
+                buf.flush_fn = writer
+                writer.down = False
+                raise psycopg.OperationalError("connection reset")
+
+            buf.flush_fn = flaky
+            await buf.awrite("c")
+            assert writer.rows == ["c"] and buf.direct == 1 and list(buf._q) == [0, 1]
+        finally:
+            buf._q.clear()
+            await buf.stop()
+
+    asyncio.run(run())
+
+
+def test_awrite_queues_when_there_is_room():
+    async def run():
+        writer = Writer()
+        writer.down = False
+        buf = BatchWriter("test", writer, max_size=10, batch_size=100, flush_interval=60, policy=BLOCK)
+        await buf.start()
+        await buf.awrite("a")
+        assert buf.stats()["queued"] == 1 and buf.direct == 0
+        await buf.stop()
+        assert writer.rows == ["a"]
+
+    asyncio.run(run())
+
+
+def _negotiation():
+    return {"session_id": "s-1", "load": {"load_id": "LD-1001", "miles": 118, "loadboard_rate": 450},
+            "user_message": "500?", "user_requested_price": 500, "cur_round": 1, "max_rounds": 3,
+            "history": "[User] 500?"}
+
+
+def test_ainsert_negotiation_raises_instead_of_losing_the_row(monkeypatch):
+    async def next_id():
+        return 42
+
+    monkeypatch.setattr(db_client, "_next_negotiation_id", next_id)
+
+    async def run():
+        buf = full_buffer(Writer())
+        monkeypatch.setattr(db_client, "NEGOTIATION_BUFFER", buf)
+        await buf.start()
+        try:
+            with pytest.raises(psycopg.OperationalError):
+                await db_client.ainsert_negotiation(_negotiation())
+            assert 42 not in [r for r in buf._q]
+        finally:
+            buf._q.clear()
+            await buf.stop()
+
+    asyncio.run(run())
+
+
+def test_negotiate_start_v2_answers_503_when_the_row_is_not_stored(monkeypatch):
+    async def ainsert_negotiation(entry):
+        raise psycopg.OperationalError("connection refused")
+
+    monkeypatch.setattr(webhook_api, "ainsert_negotiation", ainsert_negotiation)
+    r = TestClient(app).post("/negotiate/start/v2", headers={"Authorization": f"Bearer {INCOMING_TOKEN}"},
+                             json=_negotiation())
+    assert r.status_code == 503 and r.headers["Retry-After"] == "5"
+
+
+def test_lost_turn_is_counted_and_shown_on_health(monkeypatch):
+    buf = full_buffer(Writer())
+    monkeypatch.setattr(negotiation_turns, "TURN_BUFFER", buf)
+    monkeypatch.setattr(webhook_api, "TURN_BUFFER", buf)
+    turn = {"seq": 1, "role": "user", "at": "2025-08-01T00:00:00", "message": "500?", "price": 500, "round": 1}
+
+    async def run():
+        await buf.start()
+        try:
+            await negotiation_turns.log_turn("s-1", turn)     # logged, not raised
+        finally:
+            buf._q.clear()
+            await buf.stop()
+
+    asyncio.run(run())
+    assert buf.dropped == 1
+    r = TestClient(app).get("/health")
+    assert r.json()["dropped"]["test"] == 1
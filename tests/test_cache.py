@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from src import cache
+from src.cache import MISSING, SingleFlight, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_ttl_expiry(clock):
+    c = TTLCache(max_size=10, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2, ttl=5)
+    clock[0] += 5
+    assert c.get("b") is MISSING
+    assert c.get("b", None) is None
+    assert c.get("a") == 1
+    clock[0] += 55
+    assert c.get("a") is MISSING
+    assert len(c) == 0
+
+
+def test_purge_expired(clock):
+    c = TTLCache(max_size=10, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2, ttl=120)
+    clock[0] += 60
+    assert c.purge_expired() == 1
+    assert c.get("b") == 2
+
+
+def test_lru_eviction(clock):
+    c = TTLCache(max_size=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1      # "b" is now the least recently used
+    c.set("c", 3)
+    assert c.get("b") is MISSING
+    assert (c.get("a"), c.get("c")) == (1, 3)
+    assert c.evictions == 1
+
+
+def test_set_refreshes_recency_and_ttl(clock):
+    c = TTLCache(max_size=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    clock[0] += 50
+    c.set("a", 10)
+    c.set("c", 3)
+    assert c.get("b") is MISSING
+    clock[0] += 50
+    assert c.get("a") == 10
+
+
+def test_pop_and_falsy_values(clock):
+    c = TTLCache()
+    c.set("none", None)
+    assert c.get("none") is None        # a cached None is not a miss
+    assert c.pop("none", "x") is None
+    assert c.pop("none", "x") == "x"
+
+
+def test_single_flight_coalesces():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        sf = SingleFlight()
+        results = await asyncio.gather(*(sf.do("k", load) for _ in range(5)), sf.do("other", load))
+        return sf, results
+
+    sf, results = asyncio.run(main())
+    assert results == ["value"] * 6
+    assert len(calls) == 2
+    assert sf.coalesced == 4
+    assert len(sf) == 0
+
+
+def test_single_flight_shares_errors_and_retries():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        sf = SingleFlight()
+        results = await asyncio.gather(sf.do("k", fail), sf.do("k", fail), return_exceptions=True)
+        again = await asyncio.gather(sf.do("k", fail), return_exceptions=True)
+        return results + again
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(calls) == 2       # the failure isn't cached: the next call runs again
+
+
+def test_single_flight_caller_cancel_keeps_call():
+    async def slow():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        sf = SingleFlight()
+        first = asyncio.ensure_future(sf.do("k", slow))
+        second = asyncio.ensure_future(sf.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 42
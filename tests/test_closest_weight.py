@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from src.load_catalog import _I, LoadCatalog, _Snapshot
+from tests.conftest import seed_loads
+
+
+def catalog(weights):
+    """Catalog over seed-shaped rows with the given {load_id: weight}, in that row order."""
+    template = seed_loads()[0]
+    rows = []
+    for load_id, weight in weights.items():
+        row = list(template)
+        row[_I["load_id"]], row[_I["weight"]] = load_id, weight
+        rows.append((*row, "san jose", "ca", "sacramento", "ca", None))
+    c = LoadCatalog()
+    c._snap = _Snapshot(rows)
+    return c
+
+
+def closest(c, target, limit):
+    return [r["load_id"] for r in c.find_closest_by_weight(target, limit)]
+
+
+def test_equal_distance_ties_go_by_load_id():
+    # row order deliberately differs from load_id order
+    c = catalog({"LD-5": 1100, "LD-3": 900, "LD-4": 1100, "LD-1": 900, "LD-2": 1100, "LD-9": 1000})
+    assert closest(c, 1000, 3) == ["LD-9", "LD-1", "LD-2"]
+    assert closest(c, 1000, 6) == ["LD-9", "LD-1", "LD-2", "LD-3", "LD-4", "LD-5"]
+
+
+@pytest.mark.parametrize("target, expected", [(2000, ["LD-1", "LD-5"]), (500, ["LD-1", "LD-5"])])
+def test_ties_at_the_window_edge(target, expected):
+    # every candidate on one side of the target, all tied
+    c = catalog({"LD-7": 1000, "LD-6": 1000, "LD-5": 1000, "LD-1": 1000, "LD-8": 1000})
+    assert closest(c, target, 2) == expected
+
+
+def test_matches_a_full_sort():
+    rng = random.Random(7)
+    weights = {f"LD-{n:04d}": rng.choice([None, 800, 900, 1000, 1000, 1100, 1200]) for n in range(300)}
+    ids = list(weights)
+    rng.shuffle(ids)
+    c = catalog({k: weights[k] for k in ids})
+    for target in (0, 850, 900, 1000, 1150, 5000):
+        for limit in (1, 5, 20):
+            want = sorted((abs(w - target), k) for k, w in weights.items() if w is not None)[:limit]
+            assert closest(c, target, limit) == [k for _, k in want]
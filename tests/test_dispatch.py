@@ -0,0 +1,30 @@
+import asyncio
+
+from src import dispatch
+from src.dispatch import Dispatcher
+
+
+def test_stop_dead_letters_jobs_cancelled_in_flight(monkeypatch):
+    async def slow_request(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(dispatch, "DATABASE_URL", None)
+    monkeypatch.setattr(dispatch, "http_request", slow_request)
+
+    async def run():
+        dead = []
+
+        async def on_dead(job):
+            dead.append(job.id)
+
+        d = Dispatcher({"test": 1})
+        await d.start()
+        jobs = [d.submit("test", "POST", "http://upstream.test", json_body={"n": n}, on_dead=on_dead)
+                for n in range(2)]
+        await asyncio.sleep(0)      # job 1 is in flight, job 2 queued behind it
+        up = d._ups["test"]
+        await d.stop(timeout=0.1)
+        assert sorted(dead) == [j.id for j in jobs]
+        assert up.dead == 2 and up.active == {} and up.in_flight == 0
+
+    asyncio.run(run())
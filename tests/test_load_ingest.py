@@ -0,0 +1,22 @@
+import pytest
+
+from src.load_ingest import _int
+
+
+@pytest.mark.parametrize("value, expected", [(118, 118), ("118", 118), (" 42 ", 42), (40000.0, 40000),
+                                             (None, None), ("", None)])
+def test_int_accepts(value, expected):
+    got = _int(value)
+    assert got == expected and type(got) is type(expected)
+
+
+@pytest.mark.parametrize("value", [1.5, "1.5", 0.1, float("nan"), float("inf"), "12kg", True])
+def test_int_rejects_non_integers(value):
+    with pytest.raises(ValueError, match="not an integer"):
+        _int(value)
+
+
+@pytest.mark.parametrize("value", [-1, "-1", 2 ** 31, 2.0 ** 31])
+def test_int_range(value):
+    with pytest.raises(ValueError, match="out of range"):
+        _int(value)
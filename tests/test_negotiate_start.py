@@ -0,0 +1,66 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src import webhook_api
+from src.webhook_api import INCOMING_TOKEN, app
+
+AUTH = {"Authorization": f"Bearer {INCOMING_TOKEN}"}
+INFLATED = {"load_id": "LD-9999", "loadboard_rate": 10000, "miles": 100}
+
+
+@pytest.fixture
+def forwarded(monkeypatch):
+    sent = []
+
+    async def dispatch(upstream, url, body, headers, *, ref, on_dead):
+        sent.append(body)
+
+    monkeypatch.setattr(webhook_api, "NEGOTIATION_WEBHOOK_URL", "http://workflow.test/negotiate")
+    monkeypatch.setattr(webhook_api, "_dispatch", dispatch)
+    return sent
+
+
+def start(session_id, load, ask=10000):
+    r = TestClient(app).post("/negotiate/start", headers=AUTH, json={
+        "session_id": session_id, "load": load, "user_message": f"I'll take it at {ask}",
+        "user_requested_price": ask, "cur_round": 1, "max_rounds": 3})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_unverified_rate_escalates_without_a_database(forwarded, monkeypatch):
+    monkeypatch.setattr(webhook_api, "DATABASE_URL", None)
+    assert start("s-nodb", INFLATED)["decision"] == "escalate"
+    assert "not found" in forwarded[0]["escalation_reason"]
+
+
+def test_unknown_load_with_inflated_rate_escalates(forwarded, monkeypatch):
+    async def afetch_load(load_id):
+        return None
+
+    monkeypatch.setattr(webhook_api, "DATABASE_URL", "postgresql://test")
+    monkeypatch.setattr(webhook_api, "afetch_load", afetch_load)
+    assert start("s-unknown", INFLATED)["decision"] == "escalate"
+    assert start("s-no-id", {"loadboard_rate": 10000})["decision"] == "escalate"
+    assert len(forwarded) == 2
+
+
+def test_failed_lookup_escalates(forwarded, monkeypatch):
+    async def afetch_load(load_id):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(webhook_api, "DATABASE_URL", "postgresql://test")
+    monkeypatch.setattr(webhook_api, "afetch_load", afetch_load)
+    assert start("s-db-down", INFLATED)["decision"] == "escalate"
+
+
+def test_known_load_is_priced_at_the_table_rate(forwarded, monkeypatch):
+    async def afetch_load(load_id):
+        return {"load_id": load_id, "loadboard_rate": 1000, "miles": 500}
+
+    monkeypatch.setattr(webhook_api, "DATABASE_URL", "postgresql://test")
+    monkeypatch.setattr(webhook_api, "afetch_load", afetch_load)
+    # the client's 10000 is ignored: 10000 is far from the posted 1000
+    assert start("s-known-high", INFLATED)["decision"] == "escalate"
+    assert start("s-known", INFLATED, ask=1010)["decision"] == "accept"
+    assert len(forwarded) == 1
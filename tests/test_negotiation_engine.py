@@ -0,0 +1,126 @@
+import pytest
+
+from src import negotiation_engine as engine
+from src.negotiation_engine import ACCEPT, COUNTER, ESCALATE, band, decide
+from src.negotiation_turns import NEGOTIATION_HISTORY_WINDOW, append_turn
+
+LOAD = {"load_id": "LD-1", "loadboard_rate": 1000, "miles": 500}
+
+
+def session(*turns):
+    """Session entry with alternating ("user" | "ai", price) turns, as /negotiate/start builds it."""
+    entry = {}
+    for role, price in turns:
+        append_turn(entry, role, f"{role} says {price}", price)
+    return entry
+
+
+def check(ask, expected_action, expected_price=None, entry=None, load=LOAD, max_rounds=3):
+    d = decide(load, ask, max_rounds, entry or {})
+    assert (d.action, d.price) == (expected_action, expected_price), d.reason
+    return d
+
+
+def test_defaults_band():
+    assert band(1000) == pytest.approx((1000, 1100))
+
+
+@pytest.mark.parametrize("ask, action, price", [
+    (1000, ACCEPT, 1000),
+    (1020, ACCEPT, 1020),            # within NEGOTIATION_ACCEPT_MARGIN
+    (850, ACCEPT, 850),              # below the posted rate
+    ("$1,015", ACCEPT, 1015),
+    (1021, COUNTER, 1000),           # first counter at the floor
+    (1250, COUNTER, 1000),
+    (1301, ESCALATE, None),          # further than NEGOTIATION_ESCALATE_MARGIN above
+    (690, ESCALATE, None),           # ... or below (a typo, most likely)
+])
+def test_first_round(ask, action, price):
+    check(ask, action, price)
+
+
+@pytest.mark.parametrize("ask", [None, "", "call me", "best you can do?", 0, -50, True])
+def test_non_numeric_or_non_positive_ask_escalates(ask):
+    d = check(ask, ESCALATE)
+    assert "no price" in d.reason
+
+
+@pytest.mark.parametrize("load", [{}, {"loadboard_rate": None}, {"loadboard_rate": "tbd"}, {"loadboard_rate": 0}])
+def test_missing_rate_escalates(load):
+    check(1000, ESCALATE, load=load)
+
+
+def test_rate_from_price_and_strings():
+    check(1050, COUNTER, 1000, load={"price": 1000})
+    check(1050, COUNTER, 1000, load={"loadboard_rate": "1,000.00"})
+
+
+def test_counters_concede_towards_the_ceiling():
+    # second round of three: halfway from floor (1000) to ceiling (1100)
+    check(1080, COUNTER, 1050, entry=session(("user", 1090), ("ai", 1000)))
+
+
+def test_counters_never_go_down():
+    check(1080, COUNTER, 1060, entry=session(("user", 1090), ("ai", 1060)))
+
+
+def test_counter_at_or_above_the_ask_accepts_the_ask():
+    check(1040, ACCEPT, 1040, entry=session(("user", 1090), ("ai", 1000)))
+
+
+def test_ask_at_or_below_last_offer_accepts():
+    check(1030, ACCEPT, 1030, entry=session(("user", 1090), ("ai", 1030)))
+
+
+def test_raised_ask_escalates():
+    d = check(1095, ESCALATE, entry=session(("user", 1090), ("ai", 1000)))
+    assert "raised" in d.reason
+
+
+@pytest.mark.parametrize("ask, action, price", [
+    (1100, ACCEPT, 1100),      # last round: anything up to the ceiling
+    (1099.5, ACCEPT, 1099.5),
+    (1101, ESCALATE, None),    # above the ceiling on the last round
+])
+def test_last_round(ask, action, price):
+    entry = session(("user", 1200), ("ai", 1000), ("user", 1150), ("ai", 1050))
+    check(ask, action, price, entry=entry)
+
+
+@pytest.mark.parametrize("max_rounds, action", [(1, ACCEPT), ("1", ACCEPT), (10, COUNTER), ("abc", COUNTER), (None, COUNTER)])
+def test_max_rounds_is_capped_and_parsed(max_rounds, action):
+    # one round: the first answer is already the last one
+    check(1080, action, 1080 if action == ACCEPT else 1000, max_rounds=max_rounds)
+
+
+def test_history_beyond_the_window_still_counts_rounds():
+    turns = [("user", 1200 - 10 * i) if i % 2 == 0 else ("ai", 1000) for i in range(NEGOTIATION_HISTORY_WINDOW + 2)]
+    entry = session(*turns)
+    assert len(entry["turns"]) == NEGOTIATION_HISTORY_WINDOW and entry["summary"]["ai_turns"] >= 1
+    check(1090, ACCEPT, 1090, entry=entry)    # offers made >= max_rounds - 1: last round
+
+
+def test_price_step_rounds_counters_down(monkeypatch):
+    monkeypatch.setattr(engine, "NEGOTIATION_PRICE_STEP", 25.0)
+    check(1080, COUNTER, 1050, entry=session(("user", 1090), ("ai", 1000)))
+    check(1200, COUNTER, 1000, load={"loadboard_rate": 1012})
+
+
+def test_floor_margin(monkeypatch):
+    monkeypatch.setattr(engine, "NEGOTIATION_FLOOR_MARGIN", 0.05)
+    assert band(1000) == pytest.approx((950, 1100))
+    check(1080, COUNTER, 950)
+
+
+def test_per_mile_cap_lowers_the_ceiling(monkeypatch):
+    monkeypatch.setattr(engine, "NEGOTIATION_MAX_RATE_PER_MILE", 2.05)
+    assert band(1000, 500) == pytest.approx((1000, 1025))
+    assert band(1000, 100) == pytest.approx((1000, 1000))    # never below the posted rate
+    assert band(1000) == pytest.approx((1000, 1100))         # miles unknown: no cap
+    entry = session(("user", 1200), ("ai", 1000), ("user", 1150), ("ai", 1010))
+    check(1030, ESCALATE, entry=entry)
+
+
+def test_reason_mentions_rate_per_mile():
+    d = check(1250, COUNTER, 1000)
+    assert "$1,000" in d.reason and "$2/mile" in d.reason
@@ -0,0 +1,55 @@
+import pytest
+
+from src.db_client import _check_negotiation, _negotiation_params
+
+
+def _entry(**overrides):
+    entry = {
+        "session_id": "s-1",
+        "load": {"load_id": "LD-1001", "miles": 118, "loadboard_rate": "450.00", "price": 450},
+        "user_message": "can you do 500?",
+        "user_requested_price": 500,
+        "cur_round": 1,
+        "max_rounds": 3,
+        "history": "[User] can you do 500?",
+    }
+    load = {**entry["load"], **overrides.pop("load", {})}
+    return {**entry, "load": load, **overrides}
+
+
+def test_params_follow_insert_column_order():
+    params = _negotiation_params(_entry())
+    assert params[:4] == ("s-1", "LD-1001", 118, "450.00")
+    assert params[7:9] == (1, 3)
+    assert params[11] == "[User] can you do 500?"
+
+
+def test_missing_load_is_tolerated_by_params():
+    params = _negotiation_params({"session_id": "s-1"})
+    assert params[1:5] == (None, None, None, None)
+
+
+@pytest.mark.parametrize("entry", [
+    _entry(),
+    _entry(cur_round="2", max_rounds="3", load={"miles": "-5"}),
+    _entry(cur_round=None, max_rounds=None, load={"miles": None, "loadboard_rate": None}),
+    _entry(load={"loadboard_rate": 1250.5}),
+])
+def test_valid_rows_pass(entry):
+    _check_negotiation(_negotiation_params(entry))
+
+
+@pytest.mark.parametrize("entry, message", [
+    (_entry(session_id=None), "session_id is required"),
+    (_entry(load={"load_id": None}), "load_id is required"),
+    (_entry(history=None), "history is required"),
+    (_entry(cur_round="two"), "cur_round must be an integer"),
+    (_entry(max_rounds=2.5), "max_rounds must be an integer"),
+    (_entry(cur_round=True), "cur_round must be an integer"),
+    (_entry(load={"miles": "118.5"}), "miles must be an integer"),
+    (_entry(load={"loadboard_rate": "$450"}), "loadboard_rate must be a number"),
+    (_entry(load={"loadboard_rate": "n/a"}), "loadboard_rate must be a number"),
+])
+def test_invalid_rows_raise_value_error(entry, message):
+    with pytest.raises(ValueError, match=message):
+        _check_negotiation(_negotiation_params(entry))
@@ -0,0 +1,39 @@
+import pytest
+
+from src.db_client import _place_filter, normalize_place
+
+
+@pytest.mark.parametrize("place, expected", [
+    ("San Jose, CA", ("san jose", "CA")),
+    ("  Oakland ", ("oakland", None)),
+    ("dallas, tx 75201", ("dallas", "TX 75201")),
+    ("Fremont,", ("fremont", None)),
+    ("", ("", None)),
+])
+def test_normalize_place(place, expected):
+    assert normalize_place(place) == expected
+
+
+def test_city_and_state_match_city_exactly_state_by_prefix():
+    sql, params = _place_filter("origin", "San Jose, CA")
+    assert sql == "(origin_city = %s AND origin_state LIKE %s)"
+    assert params == ["san jose", "CA%"]
+
+
+def test_bare_city_matches_by_prefix():
+    sql, params = _place_filter("destination", "Sacra")
+    assert sql == "destination_city LIKE %s"
+    assert params == ["sacra%"]
+
+
+def test_like_wildcards_are_escaped():
+    _, params = _place_filter("origin", "100%_City\\")
+    assert params == ["100\\%\\_city\\\\%"]
+    _, params = _place_filter("origin", "x, C_")
+    assert params == ["x", "C\\_%"]
+
+
+def test_fuzzy_adds_trigram_match():
+    sql, params = _place_filter("origin", "Sna Jose, CA", fuzzy=True)
+    assert sql == "((origin_city = %s AND origin_state LIKE %s) OR origin_city %% %s)"
+    assert params == ["sna jose", "CA%", "sna jose"]
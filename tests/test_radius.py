@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.db_client import MAX_RADIUS_MILES, _radius_filter, check_radius
+from src.webhook_api import INCOMING_TOKEN, app
+
+AUTH = {"Authorization": f"Bearer {INCOMING_TOKEN}"}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), (0, None), (25, 25.0), ("150", 150.0), (MAX_RADIUS_MILES, MAX_RADIUS_MILES),
+])
+def test_check_radius_accepts(value, expected):
+    assert check_radius(value) == expected
+
+
+@pytest.mark.parametrize("value", [MAX_RADIUS_MILES + 1, 20000, -5, "far", float("nan")])
+def test_check_radius_rejects(value):
+    with pytest.raises(ValueError):
+        check_radius(value)
+
+
+def test_radius_filter_is_capped():
+    _, params, _, _ = _radius_filter("origin", "Dallas, TX", 20000)
+    assert params == ["Dallas, TX", MAX_RADIUS_MILES, "Dallas, TX", MAX_RADIUS_MILES]
+
+
+@pytest.mark.parametrize("field", ["origin_radius_miles", "destination_radius_miles"])
+def test_webhook_rejects_radius_over_the_cap(field):
+    # rejected before any database work, so no DATABASE_URL is needed
+    r = TestClient(app).post("/webhook", headers=AUTH,
+                             json={"job_id": "radius-cap", "origin": "Dallas, TX", field: 20000})
+    assert r.status_code == 422
+    assert str(int(MAX_RADIUS_MILES)) in r.json()["detail"]
@@ -0,0 +1,93 @@
+import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src import recommend
+from src.db_client import set_hot_catalog
+from src.recommend import Query, _build_recommend_sql, candidate_order, lane_bound, score_columns, top_k
+from src.webhook_api import INCOMING_TOKEN, app
+
+UTC = datetime.timezone.utc
+AUTH = {"Authorization": f"Bearer {INCOMING_TOKEN}"}
+
+
+@pytest.fixture
+def hot(seed_catalog):
+    set_hot_catalog(seed_catalog)
+    yield seed_catalog
+    set_hot_catalog(None)
+
+
+def ids(rows):
+    return [r["load_id"] for r in rows]
+
+
+def test_seed_pickups_in_the_past_are_still_ranked(seed_catalog):
+    # every seed pickup is in August 2025; ranking must not silently drop them
+    searched = ids(seed_catalog.search_loads(origin="San Jose"))
+    ranked = ids(seed_catalog.recommend_loads(Query(origin="San Jose", limit=len(searched))))
+    assert searched and sorted(ranked) == sorted(searched)
+
+
+def test_no_criteria_ranks_up_to_limit(seed_catalog):
+    rows = seed_catalog.recommend_loads(Query(limit=5))
+    assert len(rows) == 5
+    assert [r["score"] for r in rows] == sorted((r["score"] for r in rows), reverse=True)
+    assert set(rows[0]["score_parts"]) == {"rate", "pickup"}
+
+
+def test_grace_cutoff_is_opt_in(seed_catalog, monkeypatch):
+    assert Query().since is None
+    monkeypatch.setattr(recommend, "RECOMMEND_PICKUP_GRACE_HOURS", 2.0)
+    q = Query(origin="San Jose", now=datetime.datetime(2026, 1, 1, tzinfo=UTC))
+    assert q.since == datetime.datetime(2025, 12, 31, 22, tzinfo=UTC)
+    assert seed_catalog.recommend_loads(q) == []
+
+
+def test_sql_candidates_without_and_with_cutoff(monkeypatch):
+    sql, params = _build_recommend_sql(Query(origin="San Jose, CA"))
+    assert "pickup_datetime >=" not in sql and "ORDER BY pickup_datetime DESC" in sql
+    sql, _ = _build_recommend_sql(Query(origin="San Jose, CA"), lane_only=True)
+    assert "'-infinity'" in sql
+
+    monkeypatch.setattr(recommend, "RECOMMEND_PICKUP_GRACE_HOURS", 2.0)
+    q = Query(origin="San Jose, CA")
+    assert candidate_order(q) == "ASC"
+    sql, params = _build_recommend_sql(q, lane_only=True)
+    assert "pickup_datetime >= %s" in sql and "'infinity'" in sql and q.since in params
+
+
+def test_pickup_scores_distance_from_now_both_ways():
+    now = datetime.datetime(2026, 1, 1, tzinfo=UTC)
+    q = Query(now=now, weights={"rate": 0})
+    us = lambda dt: (dt - datetime.datetime(1970, 1, 1, tzinfo=UTC)) // datetime.timedelta(microseconds=1)
+    day = datetime.timedelta(days=1)
+    cols = {"pickup": np.array([us(now - day), us(now), us(now + day)]),
+            "miles": np.ones(3), "rate": np.ones(3)}
+    _, parts = score_columns(q, cols)
+    before, at, after = parts["pickup"]
+    assert at == 1.0 and before == pytest.approx(after) and before < at
+
+
+def test_lane_bound_and_top_k_ties():
+    q = Query(origin="San Jose, CA")
+    assert 0 < lane_bound(q) < 1
+    assert lane_bound(Query(origin="San Jose")) < lane_bound(q)    # no state: no partial credit
+    order = top_k(np.array([0.5, 0.9, 0.9, 0.1]), np.array(["LD-3", "LD-2", "LD-1", "LD-0"]), 2)
+    assert list(order) == [2, 1]
+
+
+def test_webhook_structured_query_returns_seed_loads(hot):
+    r = TestClient(app).post("/webhook", headers=AUTH, json={"job_id": "seed-ranked", "origin": "San Jose"})
+    assert r.status_code == 200
+    loads = r.json()["suggested_loads"]
+    assert {"LD-1001", "LD-1004"} <= set(ids(loads))
+    assert all(isinstance(row, dict) for row in loads)
+
+
+def test_webhook_without_criteria_falls_back_to_recent_loads(hot):
+    r = TestClient(app).post("/webhook", headers=AUTH, json={"job_id": "seed-recent", "note": "anything?"})
+    assert r.status_code == 200
+    assert ids(r.json()["suggested_loads"]) == ids(hot.fetch_recent_loads(5))
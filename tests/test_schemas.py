@@ -0,0 +1,50 @@
+import pytest
+
+from src.json_codec import decode
+from src.schemas import WebhookBody, _num, as_dict
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("$1,500", 1500),
+    ("1,500.50", 1500.5),
+    ("  42 ", 42),
+    ("-3", -3),
+    ("", None),
+    ("   ", None),
+    ("$", None),
+    (None, None),
+    (1.0, 1),
+    (2.5, 2.5),
+    (7, 7),
+])
+def test_num_coerces(value, expected):
+    got = _num(value, "weight_kg")
+    assert got == expected
+    assert type(got) is type(expected)
+
+
+@pytest.mark.parametrize("value", [True, False, "abc", "12kg", "nan", "inf", "-inf", [], {}])
+def test_num_rejects(value):
+    with pytest.raises(ValueError, match="weight_kg: expected a number"):
+        _num(value, "weight_kg")
+
+
+@pytest.mark.skipif(WebhookBody is None, reason="msgspec not installed")
+def test_webhook_body_decodes_numeric_strings():
+    body = decode(b'{"job_id": "j1", "origin": "Dallas, TX", "weight_kg": "40,000", '
+                  b'"rate_min": "", "miles": 800.0}', WebhookBody)
+    assert body.get("weight_kg") == 40000
+    assert body.get("rate_min") is None and "rate_min" in body
+    assert body.get("miles") == 800 and type(body.get("miles")) is int
+    assert "destination" not in body
+    sent = as_dict(body)
+    assert {k: sent[k] for k in ("job_id", "origin", "weight_kg", "rate_min", "miles")} == {
+        "job_id": "j1", "origin": "Dallas, TX", "weight_kg": 40000, "rate_min": None, "miles": 800}
+    assert "destination" not in sent and "destination_radius_miles" not in sent
+
+
+@pytest.mark.skipif(WebhookBody is None, reason="msgspec not installed")
+@pytest.mark.parametrize("raw", [b'{"job_id": "j1", "weight_kg": "heavy"}', b'{"job_id": "j1"', b'[1, 2]'])
+def test_webhook_body_rejects_bad_input(raw):
+    with pytest.raises(ValueError):
+        decode(raw, WebhookBody)
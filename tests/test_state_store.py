@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from src.state_store import MemoryStateStore, StateStore
+
+
+def test_incomplete_backend_fails_at_construction():
+    class GetOnly(StateStore):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        GetOnly("sessions")
+
+
+def test_memory_store_update_and_delete():
+    async def run():
+        store = MemoryStateStore("sessions", ttl=60, max_size=10)
+        assert await store.update("s-1", lambda v: {"n": (v or {"n": 0})["n"] + 1}) == {"n": 1}
+        assert await store.update("s-1", lambda v: {"n": v["n"] + 1}) == {"n": 2}
+        await store.delete("s-1")
+        assert await store.get("s-1") is None
+
+    asyncio.run(run())